@@ -0,0 +1,221 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 30
+MAX_RATE_LIMIT_RETRIES = 5
+
+# ---------- POOLED SESSIONS ----------
+# One keep-alive session per (base URL, pool size), so API sources never share a cookie jar
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url, pool_size=DEFAULT_CONCURRENCY):
+    parts = urlsplit(url)
+    key = (f"{parts.scheme}://{parts.netloc}", pool_size)
+    with _sessions_lock:
+        if key not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+        return _sessions[key]
+
+
+# ---------- RATE LIMITING ----------
+class RateLimiter:
+    """Spaces requests at least 1/rate seconds apart across all threads."""
+
+    def __init__(self, rate=None):
+        self.interval = 1.0 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ---------- CONDITIONAL REQUESTS ----------
+# (url, params) -> {"etag", "last_modified", "records"} of the last 200 response of a completed fetch
+_validators = {}
+_validators_lock = threading.Lock()
+NOT_MODIFIED = object()
+
+
+def cache_key(url, params):
+    return url, tuple(sorted((params or {}).items()))
+
+
+def commit_validators(staged):
+    # Called once every page of a fetch succeeded: a failed (and retried) fetch keeps the old
+    # validators, so pages it already received are not answered with an empty 304 next time
+    with _validators_lock:
+        _validators.update(staged)
+    staged.clear()
+
+
+def fetch_json(session, url, headers=None, params=None, limiter=None, timeout=DEFAULT_TIMEOUT,
+               data_field="data", staged=None):
+    """GET one response as JSON, honoring 429 Retry-After and ETag/Last-Modified validators.
+
+    Returns NOT_MODIFIED when the server answers 304 for a previously seen response.
+    New validators go to ``staged`` (for ``commit_validators``) when given.
+    """
+    key = cache_key(url, params)
+    request_headers = dict(headers or {})
+    with _validators_lock:
+        validator = _validators.get(key)
+    if validator:
+        if validator.get("etag"):
+            request_headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            request_headers["If-Modified-Since"] = validator["last_modified"]
+
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        if limiter:
+            limiter.wait()
+        response = session.get(url, headers=request_headers, params=params, timeout=timeout)
+        if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+            break
+        retry_after = response.headers.get("Retry-After", "1")
+        delay = float(retry_after) if retry_after.replace(".", "", 1).isdigit() else 1.0
+        logging.warning("Rate limited by %s, retrying in %ss", url, delay)
+        time.sleep(delay)
+
+    if response.status_code == 304:
+        return NOT_MODIFIED
+    response.raise_for_status()
+    data = response.json()
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if etag or last_modified:
+        validator = {"etag": etag, "last_modified": last_modified, "records": record_count(data, data_field)}
+        if staged is None:
+            with _validators_lock:
+                _validators[key] = validator
+        else:
+            staged[key] = validator
+    return data
+
+
+def record_count(data, data_field="data"):
+    if isinstance(data, dict):
+        data = data.get(data_field, [])
+    return len(data) if isinstance(data, list) else 1
+
+
+# ---------- PAGINATION ----------
+def records_of(data, data_field):
+    if isinstance(data, dict) and data_field in data:
+        return data[data_field]
+    return data
+
+
+def iter_api_pages(url, auth_token=None, folder_param=None, pagination=None, rate_limit=None,
+                   concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+    """Yield one DataFrame per API page as pages arrive.
+
+    ``pagination`` selects the scheme: ``{"type": "page"}`` (page number +
+    page size), ``{"type": "offset"}`` (offset + limit) or ``{"type": "cursor"}``
+    (next cursor read from the response). Page and offset pages are fetched
+    ``concurrency`` at a time over a pooled keep-alive session; cursor pages are
+    sequential. Pages answered with 304 Not Modified are skipped. New ETag /
+    Last-Modified validators only take effect once the last page was fetched.
+    """
+    staged = {}
+    yield from iter_pages(url, auth_token, folder_param, pagination, rate_limit, concurrency, timeout, staged)
+    commit_validators(staged)
+
+
+def iter_pages(url, auth_token, folder_param, pagination, rate_limit, concurrency, timeout, staged):
+    headers = {"Authorization": auth_token} if auth_token else {}
+    base_params = {"path": folder_param} if folder_param else {}
+    session = get_session(url, max(concurrency, 1))
+    limiter = RateLimiter(rate_limit)
+    pagination = pagination or {}
+    page_type = pagination.get("type")
+    data_field = pagination.get("data_field", "data")
+
+    if page_type is None:
+        data = fetch_json(session, url, headers, base_params, limiter, timeout, staged=staged)
+        if data is NOT_MODIFIED:
+            logging.info("API response unchanged (304), skipped: %s", url)
+            return
+        yield pd.DataFrame(data)
+        return
+
+    if page_type == "cursor":
+        cursor_param = pagination.get("cursor_param", "cursor")
+        cursor_field = pagination.get("cursor_field", "next_cursor")
+        cursor = None
+        while True:
+            params = dict(base_params)
+            if cursor is not None:
+                params[cursor_param] = cursor
+            data = fetch_json(session, url, headers, params, limiter, timeout, data_field, staged)
+            if data is NOT_MODIFIED:
+                logging.info("API page unchanged (304); cursor pagination stops here: %s", url)
+                return
+            records = records_of(data, data_field)
+            if records:
+                yield pd.DataFrame(records)
+            cursor = data.get(cursor_field) if isinstance(data, dict) else None
+            if not cursor:
+                return
+
+    page_size = pagination.get("page_size", DEFAULT_PAGE_SIZE)
+    max_pages = pagination.get("max_pages")
+    if page_type not in ("page", "offset"):
+        raise ValueError(f"Unknown pagination type: {page_type}")
+
+    def page_params(n):
+        if page_type == "page":
+            return {pagination.get("page_param", "page"): pagination.get("start", 1) + n,
+                    pagination.get("size_param", "page_size"): page_size}
+        return {pagination.get("offset_param", "offset"): n * page_size,
+                pagination.get("limit_param", "limit"): page_size}
+
+    def fetch_page(n):
+        params = {**base_params, **page_params(n)}
+        data = fetch_json(session, url, headers, params, limiter, timeout, data_field, staged)
+        if data is NOT_MODIFIED:
+            with _validators_lock:
+                records = _validators[cache_key(url, params)]["records"]
+            return None, records
+        records = records_of(data, data_field)
+        return records, len(records)
+
+    # Fetch pages in waves of `concurrency`; a short (or empty) page marks the end
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        n = 0
+        while max_pages is None or n < max_pages:
+            wave = range(n, n + concurrency if max_pages is None else min(n + concurrency, max_pages))
+            for records, count in pool.map(fetch_page, wave):
+                if records:
+                    yield pd.DataFrame(records)
+                if count < page_size:
+                    return
+            n = wave.stop
+
+
+def fetch_api(url, auth_token=None, folder_param=None, **options):
+    """Fetch every page and return them as one DataFrame."""
+    pages = list(iter_api_pages(url, auth_token, folder_param, **options))
+    return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame()
@@ -0,0 +1,68 @@
+"""Rows/sec of the old per-row SHA-256 dedup vs the vectorized fingerprint dedup.
+
+Usage: python benchmarks/bench_dedup.py [--rows 1000000]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from dedup import hash_rows, filter_new_rows
+
+
+def make_frame(rows):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id": np.arange(rows, dtype=np.int64),
+        "name": rng.choice(["Alice", "Bob", "Carol", "Dave"], rows),
+        "role": rng.choice(["admin", "user", "analyst"], rows),
+        "score": rng.random(rows),
+    })
+
+
+# Previous implementation: hash every row twice through apply/iterrows
+def legacy_dedup(df, known):
+    def hash_row(row):
+        return hashlib.sha256(str(row.values).encode()).hexdigest()
+
+    new_rows = df[~df.apply(lambda row: hash_row(row) in known, axis=1)]
+    for _, row in new_rows.iterrows():
+        known.add(hash_row(row))
+    return new_rows
+
+
+def vectorized_dedup(df, known):
+    hashes = hash_rows(df)
+    is_new = filter_new_rows(hashes, known)
+    known.update(hashes[is_new].tolist())
+    return df[is_new]
+
+
+def bench(name, fn, df):
+    known = set()
+    start = time.perf_counter()
+    fn(df, known)                       # first tick: everything is new
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    fn(df, known)                       # steady-state tick: nothing is new
+    second = time.perf_counter() - start
+    print(f"{name:<12} new: {len(df) / first:>12,.0f} rows/s   "
+          f"unchanged: {len(df) / second:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"Deduplicating {args.rows:,} rows")
+    if not args.skip_legacy:
+        bench("legacy", legacy_dedup, df)
+    bench("vectorized", vectorized_dedup, df)
@@ -0,0 +1,61 @@
+"""Rows/sec of the loader modes (to_sql append, COPY, execute_values, merge) against PostgreSQL.
+
+Usage: python benchmarks/bench_load.py [--rows 1000000] [--host localhost --database elt_db ...]
+Each mode loads into its own scratch table, which is dropped afterwards.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from loader import load_csv_to_postgres, build_engine_url
+
+MODES = ["append", "copy", "values", "merge"]
+
+
+def make_csv(rows, path):
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "id": np.arange(rows, dtype=np.int64),
+        "name": rng.choice(["Alice", "Bob", "Carol", "Dave"], rows),
+        "role": rng.choice(["admin", "user", "analyst"], rows),
+        "score": rng.random(rows),
+    }).to_csv(path, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--database", default="elt_db")
+    parser.add_argument("--user", default="elt_user")
+    parser.add_argument("--password", default="elt_password")
+    args = parser.parse_args()
+
+    db_config = {"host": args.host, "port": args.port, "database": args.database,
+                 "user": args.user, "password": args.password}
+    engine = create_engine(build_engine_url(db_config))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "bench.csv")
+        make_csv(args.rows, csv_path)
+        print(f"Loading {args.rows:,} rows")
+
+        for mode in args.modes:
+            table_name = f"bench_load_{mode}"
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+            start = time.perf_counter()
+            load_csv_to_postgres(csv_path, {**db_config, "load_mode": mode}, table_name)
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<8} {elapsed:>8.2f}s  {args.rows / elapsed:>12,.0f} rows/s")
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP TABLE {table_name}"))
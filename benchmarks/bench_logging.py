@@ -0,0 +1,79 @@
+"""Caller-side logging overhead per 1M rows: synchronous handlers + f-strings vs the queue pipeline.
+
+Each row is one hot-path record (the worst case, e.g. a per-row warning); the
+disabled case logs below the level, where only lazy %-formatting is free.
+
+Usage: python benchmarks/bench_logging.py [--rows 1000000]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from logger import setup_logging, stop_logging, LOG_FORMAT
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.setLevel(logging.INFO)
+
+
+def sync_setup(log_file):
+    # Previous setup: basicConfig with a FileHandler and a StreamHandler on the root logger
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT, force=True,
+                        handlers=[logging.FileHandler(log_file), logging.StreamHandler(open(os.devnull, "w"))])
+
+
+def emit_fstring(log, rows):
+    for i in range(rows):
+        log.info(f"Loaded row {i} into table '{'orders'}' in {0.001:.3f}s")
+
+
+def emit_lazy(log, rows):
+    for i in range(rows):
+        log.info("Loaded row %s into table '%s' in %.3fs", i, "orders", 0.001)
+
+
+def emit_disabled_fstring(log, rows):
+    for i in range(rows):
+        log.debug(f"Row {i} of table '{'orders'}': {[i, i + 1]}")
+
+
+def emit_disabled_lazy(log, rows):
+    for i in range(rows):
+        log.debug("Row %s of table '%s': %s", i, "orders", [i, i + 1])
+
+
+def bench(name, emit, rows, total_rows):
+    log = logging.getLogger("bench")
+    start = time.perf_counter()
+    emit(log, rows)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<34} {elapsed / rows * 1e6:>8.2f} us/record   "
+          f"{elapsed / rows * total_rows:>8.2f} s per {total_rows:,} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    sample = min(args.rows, 200_000)  # records actually emitted; results are scaled to --rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_setup(os.path.join(tmp, "sync.log"))
+        bench("sync handlers, f-string", emit_fstring, sample, args.rows)
+        bench("sync handlers, disabled f-string", emit_disabled_fstring, sample, args.rows)
+        reset_root()
+
+        setup_logging(os.path.join(tmp, "async.log"), console=False)
+        bench("queue listener, lazy %", emit_lazy, sample, args.rows)
+        bench("queue listener, disabled lazy %", emit_disabled_lazy, sample, args.rows)
+        start = time.perf_counter()
+        stop_logging()  # drain the queue
+        print(f"{'listener drain after the run':<34} {time.perf_counter() - start:>8.2f} s (off the caller thread)")
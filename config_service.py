@@ -0,0 +1,139 @@
+import os
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import yaml
+
+CONFIG_DIR = './uploaded_configs'
+CONFIG_CACHE_SIZE = 128
+
+
+# ---------- CONTENT HASH ----------
+def content_hash(content):
+    """sha256 of the YAML body, ignoring leading/trailing whitespace."""
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()
+
+
+# ---------- PARSED CONFIG CACHE ----------
+class LRUCache:
+    """Thread-safe mapping that evicts the least recently used entry beyond max_entries."""
+
+    def __init__(self, max_entries=CONFIG_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+_parsed = LRUCache()
+_hash_by_id = LRUCache()  # config_history ids never change content, so id -> hash is cached too
+
+
+def validate_config(config):
+    if config is None:
+        return {}
+    if not isinstance(config, dict):
+        raise ValueError(f"Config must be a YAML mapping, got {type(config).__name__}")
+    return config
+
+
+def parse_config(content):
+    """Parse and validate YAML content, reusing the cached result for content seen before.
+
+    Callers get their own copy, so changing it never alters the cached config.
+    """
+    digest = content_hash(content)
+    config = _parsed.get(digest)
+    if config is None:
+        config = validate_config(yaml.safe_load(content))
+        _parsed.put(digest, config)
+    return copy.deepcopy(config)
+
+
+def read_config_file(path):
+    with open(path, 'r') as f:
+        return parse_config(f.read())
+
+
+# ---------- CONTENT-ADDRESSED FILES ----------
+def config_file(content, folder=None):
+    """Path of ``<hash>.yaml`` (in folder, default CONFIG_DIR) holding content, written only the first time."""
+    folder = folder or CONFIG_DIR
+    path = os.path.join(folder, f"{content_hash(content)}.yaml")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        part_path = f"{path}.{threading.get_ident()}.part"
+        with open(part_path, 'w') as f:
+            f.write(content)
+        os.replace(part_path, path)
+    return path
+
+
+# ---------- STORED CONFIG VERSIONS ----------
+# config_manager imports this module, so it is only imported by the functions
+# that need config_history
+def register_config(content):
+    """Validate content and store it in config_history once; returns {id, version, content_hash, new, path}."""
+    from config_manager import engine, store_config
+    parse_config(content)
+    with engine.begin() as conn:
+        config_id, version, created = store_config(conn, content)
+    digest = content_hash(content)
+    _hash_by_id.put(config_id, digest)
+    return {"id": config_id, "version": version, "content_hash": digest, "new": created,
+            "path": config_file(content)}
+
+
+def load_config(config_id):
+    """Return (parsed config, path of its YAML file) for a config_history id.
+
+    Known configs are served from the cache without reading the database; raises
+    KeyError when there is no such id.
+    """
+    digest = _hash_by_id.get(config_id)
+    cached = _parsed.get(digest) if digest is not None else None
+    path = os.path.join(CONFIG_DIR, f"{digest}.yaml")
+    if cached is not None and os.path.exists(path):
+        return copy.deepcopy(cached), path
+
+    from config_manager import engine, config_history, config_text
+    with engine.connect() as conn:
+        row = conn.execute(config_history.select().where(config_history.c.id == config_id)).fetchone()
+    if row is None:
+        raise KeyError(config_id)
+    content = config_text(row)
+    _hash_by_id.put(config_id, content_hash(content))
+    logging.info("Loaded config id %s (version %s) from config_history", config_id, row.version)
+    return parse_config(content), config_file(content)
+
+
+def cache_stats():
+    return {"parsed": _parsed.stats(), "ids": _hash_by_id.stats()}
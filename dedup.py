@@ -0,0 +1,168 @@
+import os
+import time
+import logging
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+
+DEFAULT_STORE_PATH = "./data/dedup_state.db"
+
+
+# ---------- ROW FINGERPRINTS ----------
+# Generate a 64-bit fingerprint for every row in one vectorized pass (used for deduplication)
+def hash_rows(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+# ---------- MEMBERSHIP FILTER ----------
+# Boolean mask of rows whose fingerprint is not in the known set
+def filter_new_rows(hashes, known):
+    if not known:
+        return np.ones(len(hashes), dtype=bool)
+    known_arr = np.fromiter(known, dtype=np.uint64, count=len(known))
+    return ~np.isin(hashes, known_arr)
+
+
+# ---------- DEDUP STATE STORES ----------
+class MemoryDedupStore:
+    """Process-local set of fingerprints; lost on restart."""
+
+    def __init__(self):
+        self.hashes = set()
+
+    def filter_new(self, hashes):
+        return filter_new_rows(hashes, self.hashes)
+
+    def add(self, hashes):
+        self.hashes.update(hashes.tolist())
+
+    def clear(self):
+        self.hashes.clear()
+
+    def close(self):
+        pass
+
+
+class SQLiteDedupStore:
+    """On-disk fingerprint store keyed per target table, shared by every job using the same file.
+
+    Each fingerprint is stored as one 8-byte INTEGER in a WITHOUT ROWID table, so
+    memory stays flat and state survives restarts. Optional eviction drops entries
+    older than ``ttl_seconds`` and keeps at most ``max_entries`` per table.
+    """
+
+    def __init__(self, path, table_name, max_entries=None, ttl_seconds=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.table_name = table_name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS row_hashes ("
+            " table_name TEXT NOT NULL, digest INTEGER NOT NULL, inserted_at REAL NOT NULL,"
+            " PRIMARY KEY (table_name, digest)) WITHOUT ROWID"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_row_hashes_age ON row_hashes (table_name, inserted_at)"
+        )
+        self.conn.commit()
+
+    def filter_new(self, hashes):
+        if len(hashes) == 0:
+            return np.ones(0, dtype=bool)
+        digests = hashes.view(np.int64)
+        with self.lock:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch (digest INTEGER PRIMARY KEY)")
+            self.conn.execute("DELETE FROM batch")
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO batch VALUES (?)", ((d,) for d in digests.tolist())
+            )
+            known = self.conn.execute(
+                "SELECT b.digest FROM batch b JOIN row_hashes r"
+                " ON r.table_name = ? AND r.digest = b.digest",
+                (self.table_name,),
+            ).fetchall()
+            self.conn.execute("DELETE FROM batch")
+            self.conn.commit()
+        if not known:
+            return np.ones(len(hashes), dtype=bool)
+        known_arr = np.fromiter((row[0] for row in known), dtype=np.int64, count=len(known))
+        return ~np.isin(digests, known_arr)
+
+    def add(self, hashes):
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO row_hashes VALUES (?, ?, ?)",
+                ((self.table_name, d, now) for d in hashes.view(np.int64).tolist()),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        if self.ttl_seconds:
+            self.conn.execute(
+                "DELETE FROM row_hashes WHERE table_name = ? AND inserted_at < ?",
+                (self.table_name, now - self.ttl_seconds),
+            )
+        if self.max_entries:
+            count = self.conn.execute(
+                "SELECT COUNT(*) FROM row_hashes WHERE table_name = ?", (self.table_name,)
+            ).fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                self.conn.execute(
+                    "DELETE FROM row_hashes WHERE table_name = ? AND digest IN ("
+                    " SELECT digest FROM row_hashes WHERE table_name = ?"
+                    " ORDER BY inserted_at LIMIT ?)",
+                    (self.table_name, self.table_name, excess),
+                )
+                logging.info("Evicted %s dedup hashes for table '%s'.", excess, self.table_name)
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM row_hashes WHERE table_name = ?", (self.table_name,))
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+# ---------- STORE FACTORY ----------
+# Stores are cached per (backend, path, table) so every tick of a job reuses the same one
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_dedup_store(config, scope=None):
+    """Dedup store of the config's target table; ``scope`` keeps a separate set of hashes for it."""
+    dedup_config = config.get("dedup", {}) or {}
+    table_name = config.get("target", {}).get("table", "raw_data")
+    if scope:
+        table_name = f"{table_name}:{scope}"
+    backend = dedup_config.get("store", "sqlite")
+    path = dedup_config.get("path", DEFAULT_STORE_PATH)
+    key = (backend, path, table_name)
+
+    with _stores_lock:
+        if key not in _stores:
+            if backend == "memory":
+                _stores[key] = MemoryDedupStore()
+            elif backend == "sqlite":
+                ttl_days = dedup_config.get("ttl_days")
+                _stores[key] = SQLiteDedupStore(
+                    path,
+                    table_name,
+                    max_entries=dedup_config.get("max_entries"),
+                    ttl_seconds=ttl_days * 86400 if ttl_days else None,
+                )
+            else:
+                raise ValueError(f"Unknown dedup store: {backend}")
+            logging.info("Using %s dedup store for table '%s'.", backend, table_name)
+        return _stores[key]
@@ -1,32 +1,44 @@
 import os
-import yaml
+import io
+import time
+import hashlib
 import logging
+import threading
+import importlib.util
+import contextvars
 import pandas as pd
-import requests
 from tenacity import retry, stop_after_attempt, wait_fixed
 from pandas.api.types import is_dtype_equal
 import json  
-import paramiko
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from output_format import write_output, output_path_for
+from config_service import read_config_file
+from logger import log_context, setup_logging
+from api_client import fetch_api, iter_api_pages
+from json_stream import iter_json_frames, is_json_lines, JSON_LINES_EXTENSIONS
+from schema_types import reader_options, read_csv_typed, coerce_columns, schema_columns
+from quality import RuleSet, append_quarantine, quarantine_path_for, DEFAULT_QUARANTINE_PATH
+from dedup import get_dedup_store
+from transform import apply_transforms, has_aggregate
+from sftp_source import extract_sftp_files, iter_sftp_frames, DEFAULT_SFTP_WORKERS, DEFAULT_LOCAL_DIR
 
 
 
 # ---------- CONFIG ----------
 CONFIG_PATH = "./uploaded_configs/sftp.yaml"
 OUTPUT_FOLDER = "./data/output_files/s.csv"
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_MAX_CONCURRENT_SOURCES = 4
 os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
-# ---------- LOGGING SETUP ----------
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-
 # ---------- YAML CONFIG LOADER ----------
 def read_yaml_config(path):
     try:
-        with open(path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = read_config_file(path)  # parsed once per distinct YAML, then served from cache
         logging.info("YAML config loaded successfully.")
         return config
     except Exception as e:
-        logging.error(f"Error reading YAML config: {e}")
+        logging.error("Error reading YAML config: %s", e)
         return {}
 
 # ---------- SCHEMA VALIDATION & STANDARDIZATION ----------
@@ -39,45 +51,278 @@ def validate_and_standardize(df, schema, strict_mode=False):
         # Ensure all schema columns exist in DataFrame
         for col in columns:
             if col not in df.columns:
-                logging.error(f"Missing required column: {col}")
+                logging.error("Missing required column: %s", col)
                 return None
         # Only keep columns defined in schema if strict_mode is True
         if strict_mode:
             df = df[list(columns.keys())]
+        # Convert to the schema dtypes; unconvertible values become nulls and are reported
+        if schema_columns(schema):
+            df, report = coerce_columns(df, columns)
+            for col, errors in report.items():
+                logging.warning("Column '%s': %s values not convertible to %s set to null, e.g. %s",
+                                col, errors['errors'], errors['dtype'], errors['examples'])
+            df.attrs["coercion_errors"] = report
         return df
     except Exception as e:
-        logging.error(f"Schema validation failed: {e}")
+        logging.error("Schema validation failed: %s", e)
         return None
 
 # ---------- LOCAL EXTRACTION ----------
-def extract_from_local(path):
+SUPPORTED_EXTENSIONS = ('.csv', '.json', '.txt') + JSON_LINES_EXTENSIONS
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+# ---------- INCREMENTAL MANIFEST ----------
+# Per-file state lets steady-state ticks skip unchanged files and parse only appended tails
+HEAD_BYTES = 4096
+MANIFEST_FOLDER = "./data/manifests"
+
+
+def default_manifest_path(path):
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:12]
+    return os.path.join(MANIFEST_FOLDER, f"local_{digest}.json")
+
+
+def default_sftp_manifest_path(host, port, remote_path):
+    digest = hashlib.sha1(f"{host}:{port}{remote_path}".encode()).hexdigest()[:12]
+    return os.path.join(MANIFEST_FOLDER, f"sftp_{digest}.json")
+
+
+def load_manifest(manifest_path):
+    # Only committed state: a staged manifest whose load failed must not hide its files
+    try:
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logging.error("Unreadable manifest %s, re-reading all files: %s", manifest_path, e)
+        return {}
+
+
+def save_manifest(manifest_path, manifest):
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+
+def stage_manifest(manifest_path, manifest, manifests=None):
+    # Without a collector there is no load to wait for, so the manifest is saved right away
+    if manifests is None:
+        save_manifest(manifest_path, manifest)
+    else:
+        manifests[manifest_path] = manifest
+
+
+def commit_manifests(manifests):
+    """Persist the manifests staged by one extraction; call once its rows are safely loaded."""
+    for manifest_path, manifest in list(manifests.items()):
+        save_manifest(manifest_path, manifest)
+        del manifests[manifest_path]
+
+
+def prefix_digest(f, length, algorithm="sha1"):
+    f.seek(0)
+    digest = hashlib.new(algorithm)
+    remaining = length
+    while remaining > 0:
+        block = f.read(min(remaining, 1 << 20))
+        if not block:
+            break
+        digest.update(block)
+        remaining -= len(block)
+    return digest.hexdigest()
+
+
+def read_delimited(full_path, delimiter, csv_engine, entry, checksum, size, read_options=None):
+    """Read a CSV/TXT file, or only the bytes appended since ``entry`` was recorded."""
+    with open(full_path, 'rb') as f:
+        appended = (
+            entry is not None
+            and entry.get("ends_with_newline")
+            and size >= entry["offset"]
+            and prefix_digest(f, entry["head_len"]) == entry["head"]
+            and (not checksum or prefix_digest(f, entry["offset"], "sha256") == entry.get("checksum"))
+        )
+        if appended:
+            f.seek(entry["offset"])
+            data = f.read(size - entry["offset"])
+            columns = entry["columns"]
+            if data.strip():
+                df = read_csv_typed(io.BytesIO(data), read_options, header=None, names=columns,
+                                    delimiter=delimiter, engine=csv_engine)
+            else:
+                df = pd.DataFrame(columns=columns)
+            rows = entry["rows"] + len(df)
+            ends_with_newline = data.endswith(b"\n") if data else True
+        else:
+            if entry is not None:
+                logging.info("%s was rewritten, reading it in full", os.path.basename(full_path))
+            df = read_csv_typed(full_path, read_options, delimiter=delimiter, engine=csv_engine)
+            # The full header, so a tail read still lines up when only schema columns are kept
+            header = pd.read_csv(full_path, nrows=0, delimiter=delimiter).columns if read_options else df.columns
+            columns = [str(col) for col in header]
+            rows = len(df)
+            f.seek(max(size - 1, 0))
+            ends_with_newline = f.read(1) == b"\n"
+
+        new_entry = {
+            "offset": size,
+            "rows": rows,
+            "columns": columns,
+            "head_len": min(size, HEAD_BYTES),
+            "head": prefix_digest(f, min(size, HEAD_BYTES)),
+            # A file without a trailing newline is re-read in full once it grows
+            "ends_with_newline": ends_with_newline,
+        }
+        if checksum:
+            new_entry["checksum"] = prefix_digest(f, size, "sha256")
+    return df, new_entry
+
+
+def read_local_file(full_path, csv_engine=None, entry=None, checksum=False, read_options=None):
+    """Parse one local file; returns (DataFrame or None, error or None, seconds taken, manifest entry).
+
+    With a previous manifest ``entry`` only rows appended since then are parsed
+    (CSV/TXT); JSON files are always read in full. ``read_options`` (from
+    ``reader_options``) parses CSV/TXT columns straight into the schema dtypes.
+    Module-level so it can run inside a process pool worker.
+    """
+    start = time.perf_counter()
+    try:
+        stat = os.stat(full_path)
+        if full_path.endswith('.json') or is_json_lines(full_path):
+            df = pd.read_json(full_path, lines=is_json_lines(full_path))
+            new_entry = {"offset": stat.st_size, "rows": len(df)}
+        else:
+            delimiter = ',' if full_path.endswith('.csv') else '|'
+            df, new_entry = read_delimited(full_path, delimiter, csv_engine, entry, checksum, stat.st_size,
+                                           read_options)
+        new_entry.update(size=stat.st_size, mtime=stat.st_mtime)
+        return df, None, time.perf_counter() - start, new_entry
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start, None
+
+
+# ---------- PROCESS POOL LOGGING ----------
+# A forked worker inherits the queue handler but not the listener thread that writes it,
+# so workers collect their records and hand them back to the parent with the result
+_worker_records = []
+
+
+class WorkerLogCollector(logging.Handler):
+    def emit(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        _worker_records.append(record)
+
+
+def capture_worker_logs(level):
+    root = logging.getLogger()
+    root.handlers = [WorkerLogCollector()]
+    root.setLevel(level)
+
+
+def read_local_file_in_worker(*args):
+    result = read_local_file(*args)
+    records = list(_worker_records)
+    _worker_records.clear()
+    return result, records
+
+
+def map_in_processes(workers, *iterables):
+    """read_local_file over a process pool; records the workers log are re-emitted here."""
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=capture_worker_logs,
+                             initargs=(logging.getLogger().getEffectiveLevel(),)) as pool:
+        # map() yields results in input order, so output is deterministic
+        for result, records in pool.map(read_local_file_in_worker, *iterables):
+            for record in records:
+                logging.getLogger(record.name).handle(record)
+            results.append(result)
+    return results
+
+
+def extract_from_local(path, workers=1, executor="process", manifest_path=None, checksum=False, only_files=None,
+                       read_options=None, manifests=None):
+    """Read every supported file in path, optionally in parallel, in sorted filename order.
+
+    ``executor: process`` parses files in a process pool (CSV/JSON parsing holds the GIL);
+    ``executor: thread`` uses a thread pool with the pyarrow CSV engine when available.
+    With a ``manifest_path`` only new files and the appended tail of grown files are
+    read; the updated manifest is staged in the ``manifests`` dict until
+    ``commit_manifests(manifests)`` is called (saved at once when no dict is
+    given). ``only_files`` restricts the read to the
+    given filenames (e.g. those reported by the file watcher). ``read_options``
+    is passed on to ``read_local_file``.
+    """
     data_frames = []
     if not os.path.exists(path):
-        logging.error(f"Source path does not exist: {path}")
+        logging.error("Source path does not exist: %s", path)
         return pd.DataFrame()
 
-    for filename in os.listdir(path):
-        full_path = os.path.join(path, filename)
-        try:
-            if filename.endswith('.csv'):
-                df = pd.read_csv(full_path)
-            elif filename.endswith('.json'):
-                df = pd.read_json(full_path)
-            elif filename.endswith('.txt'):
-                df = pd.read_csv(full_path, delimiter='|')
-            else:
-                logging.warning(f"Unsupported file type skipped: {filename}")
-                continue
-
-            logging.info(f"Read {filename}, rows: {len(df)}")
+    filenames = []
+    for filename in sorted(os.listdir(path)):
+        if only_files is not None and filename not in only_files:
+            continue
+        if filename.endswith(SUPPORTED_EXTENSIONS):
+            filenames.append(filename)
+        else:
+            logging.warning("Unsupported file type skipped: %s", filename)
+
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    if manifest_path:
+        unchanged = []
+        for filename in filenames:
+            entry = manifest.get(filename)
+            stat = os.stat(os.path.join(path, filename))
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                unchanged.append(filename)
+        filenames = [filename for filename in filenames if filename not in unchanged]
+        logging.info("Manifest: %s unchanged files skipped, %s to read", len(unchanged), len(filenames))
+        for filename in set(manifest) - set(os.listdir(path)):
+            del manifest[filename]  # file was removed
+
+    full_paths = [os.path.join(path, filename) for filename in filenames]
+    entries = [manifest.get(filename) for filename in filenames]
+    checksums = [checksum] * len(full_paths)
+
+    csv_engine = None
+    if workers > 1 and len(full_paths) > 1 and executor != "thread":
+        results = map_in_processes(workers, full_paths, [None] * len(full_paths), entries, checksums,
+                                   [read_options] * len(full_paths))
+    elif workers > 1 and len(full_paths) > 1:
+        csv_engine = "pyarrow" if HAS_PYARROW else None
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields results in input order, so output is deterministic
+            results = list(pool.map(read_local_file, full_paths, [csv_engine] * len(full_paths),
+                                    entries, checksums, [read_options] * len(full_paths)))
+    else:
+        results = [read_local_file(full_path, None, entry, checksum, read_options)
+                   for full_path, entry in zip(full_paths, entries)]
+
+    for filename, (df, error, elapsed, entry) in zip(filenames, results):
+        if error:
+            logging.error("Failed to read %s: %s", filename, error)
+            continue
+        logging.info("Read %s, rows: %s in %.3fs", filename, len(df), elapsed,
+                     extra={"file": filename, "rows": len(df), "duration": round(elapsed, 3)})
+        manifest[filename] = entry
+        if not df.empty:
             data_frames.append(df)
 
-        except Exception as e:
-            logging.error(f"Failed to read {filename}: {e}")
+    if manifest_path:
+        stage_manifest(manifest_path, manifest, manifests)
 
     if data_frames:
         combined_df = pd.concat(data_frames, ignore_index=True)
-        logging.info(f"Total combined rows from local: {len(combined_df)}")
+        logging.info("Total combined rows from local: %s", len(combined_df))
         return combined_df
     else:
         logging.warning("No valid files found in local source.")
@@ -85,151 +330,395 @@ def extract_from_local(path):
 
 # ---------- API EXTRACTION ----------
 @retry(stop=stop_after_attempt(3), wait=wait_fixed(5))
-def extract_from_api(url, auth_token=None, folder_param=None):
-    headers = {}
-    if auth_token:
-        headers["Authorization"] = auth_token
-
-    params = {}
-    if folder_param:
-        params["path"] = folder_param
-
-    response = requests.get(url, headers=headers, params=params)
-    response.raise_for_status()
-    json_data = response.json()  # Parse response as JSON
-    df = pd.DataFrame(json_data)
-    logging.info(f"Extracted {len(df)} rows from API.")
+def extract_from_api(url, auth_token=None, folder_param=None, **options):
+    # options: pagination, rate_limit, concurrency, timeout (see api_client.iter_api_pages)
+    df = fetch_api(url, auth_token, folder_param, **options)
+    logging.info("Extracted %s rows from API.", len(df))
     return df
 
-# ---------- MAIN EXTRACTOR ----------
-def run_extraction(config=None, output_csv_path=None, skip_api=False):
-    if config is None:
-        config = read_yaml_config(CONFIG_PATH)
 
-    sources = config.get("sources", [])
-    all_dataframes = []
+def api_options(source):
+    options = {key: source[key] for key in ("pagination", "rate_limit", "concurrency") if key in source}
+    if "request_timeout" in source:
+        options["timeout"] = source["request_timeout"]
+    return options
 
-    for source in sources:
-        source_type = source.get("type")
 
-        if source_type == "local":
-            path = source.get("path")
-            df_local = extract_from_local(path)
-            if not df_local.empty:
-                all_dataframes.append(df_local)
+# ---------- SIDE OUTPUT (ASYNC CSV / PARQUET / ARROW) ----------
+# A single writer thread keeps output artifacts ordered and off the extract -> load path
+_side_output_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="output-writer")
+_side_output_futures = []  # writes not yet flushed: still running, or failed
+_side_output_lock = threading.Lock()
 
-        elif source_type == "api" and not skip_api:
-            url = source.get("url")
-            auth_token = source.get("auth_token")
-            folder_param = source.get("folder_param")
-            df_api = extract_from_api(url, auth_token, folder_param)
-            if not df_api.empty:
-                all_dataframes.append(df_api)
-        
-        
-        elif source_type == "sftp":
-            df_sftp = extract_from_sftp(
+
+def write_side_output(df, path, output_format="csv", compression=None):
+    tmp_path = f"{path}.tmp"
+    write_output(df, tmp_path, output_format, compression)
+    os.replace(tmp_path, path)  # readers never see a half-written file
+    logging.info("%s side output written to %s", output_format.upper(), path)
+
+
+def run_side_output(fn, *args):
+    # Logged inside the task, so the error is reported before flush_side_outputs sees the future finish
+    try:
+        return fn(*args)
+    except Exception as e:
+        logging.error("Side output failed: %s", e)
+        raise
+
+
+def submit_side_output(fn, *args):
+    # Failures are logged as soon as they happen and kept for flush_side_outputs to raise
+    future = _side_output_executor.submit(run_side_output, fn, *args)
+    with _side_output_lock:
+        _side_output_futures[:] = [f for f in _side_output_futures if not f.done() or f.exception() is not None]
+        _side_output_futures.append(future)
+    return future
+
+
+def write_output_async(df, path, output_format="csv", compression=None):
+    return submit_side_output(write_side_output, df, path, output_format, compression)
+
+
+def flush_side_outputs():
+    """Block until every queued side output has been written; raises the first write that failed."""
+    with _side_output_lock:
+        futures = list(_side_output_futures)
+        _side_output_futures.clear()
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+
+
+# ---------- DATA QUALITY RULES ----------
+def apply_rules(df, rule_set, quarantine_path=DEFAULT_QUARANTINE_PATH, seen=None):
+    """Keep the rows passing every rule; failing rows are appended to the quarantine file.
+
+    The write is synchronous, so a failed write fails the run instead of losing the rejected rows.
+    ``seen`` (a dedup store) keeps a polled source from quarantining the same rows on every tick.
+    """
+    valid, rejected, _ = rule_set.evaluate(df)
+    if not rejected.empty:
+        append_quarantine(rejected, quarantine_path, seen)
+    return valid
+
+
+def quarantine_store(config, quarantine_path):
+    # Rows already written to this quarantine file, tracked apart from the target's loaded rows
+    return get_dedup_store(config, scope=f"quarantine:{quarantine_path}")
+
+
+# ---------- SOURCE DISPATCH ----------
+def extract_source(source, skip_api=False, changed_files=None, read_options=None, manifests=None):
+    """Extract one configured source; returns a DataFrame, or None when the source is skipped.
+
+    Incremental sources stage their updated manifest in ``manifests``.
+    """
+    source_type = source.get("type")
+
+    if source_type == "local":
+        path = source.get("path")
+        only_files = None
+        if changed_files is not None:
+            if path not in changed_files:
+                return None
+            only_files = changed_files[path]
+        manifest_path = None
+        if source.get("incremental"):
+            manifest_path = source.get("manifest_path") or default_manifest_path(path)
+        return extract_from_local(path, source.get("workers", 1), source.get("executor", "process"),
+                                  manifest_path, source.get("checksum", False), only_files, read_options,
+                                  manifests)
+
+    elif source_type == "api" and not skip_api:
+        url = source.get("url")
+        auth_token = source.get("auth_token")
+        folder_param = source.get("folder_param")
+        return extract_from_api(url, auth_token, folder_param, **api_options(source))
+
+    elif source_type == "sftp":
+        manifest_path = None
+        if source.get("incremental"):
+            manifest_path = source.get("manifest_path") or default_sftp_manifest_path(
+                source["host"], source.get("port", 22), source["path"])
+        # Legacy configs name a local file; downloads now go to its directory
+        local_dir = source.get("local_dir") or os.path.dirname(source.get("local_path", "")) or DEFAULT_LOCAL_DIR
+        return extract_from_sftp(
             host=source["host"],
             port=source.get("port", 22),
             username=source["username"],
             password=source["password"],
             remote_path=source["path"],   # <-- your YAML uses "path", not "remote_path"
-            local_path=output_csv_path or "./data/output_files/sftp.csv"
+            pattern=source.get("pattern", "*"),
+            workers=source.get("workers", DEFAULT_SFTP_WORKERS),
+            stream=source.get("stream", False),
+            local_dir=local_dir,
+            manifest_path=manifest_path,
+            read_options=read_options,
+            manifests=manifests,
         )
-        if not df_sftp.empty:
-            all_dataframes.append(df_sftp)
 
+    logging.warning("Unknown or skipped source type: %s", source_type)
+    return None
+
+
+def extract_sources(sources, max_workers=DEFAULT_MAX_CONCURRENT_SOURCES, skip_api=False, changed_files=None,
+                    read_options=None, manifests=None):
+    """Extract sources concurrently; returns their DataFrames (None if failed/skipped) in config order.
+
+    A failing source is logged and isolated from the others. A source with a
+    ``timeout`` (seconds, counted from when it starts running) is abandoned once
+    it exceeds it; its worker thread cannot be killed and is left to finish.
+    Each source stages its manifests in its own dict; only those of sources that
+    finished in time are merged into ``manifests``, so an abandoned source never
+    marks files as read.
+    """
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="source")
+    started = {}
+
+    def run(i, source):
+        started[i] = time.monotonic()
+        start = started[i]
+        staged = {}
+        with log_context(source=source.get('type')):
+            df = extract_source(source, skip_api, changed_files, read_options, staged)
+            elapsed = time.monotonic() - start
+            logging.info("Source %s (%s) extracted in %.2fs", i, source.get('type'), elapsed,
+                         extra={"rows": None if df is None else len(df), "duration": round(elapsed, 3)})
+        return df, staged
+
+    # Each source thread runs in a copy of the caller's log context, so records keep the job id
+    futures = {pool.submit(contextvars.copy_context().run, run, i, source): i for i, source in enumerate(sources)}
+    results = [None] * len(sources)
+    pending = set(futures)
+    while pending:
+        now = time.monotonic()
+        deadlines = [started[futures[f]] + sources[futures[f]]["timeout"] - now
+                     for f in pending if futures[f] in started and sources[futures[f]].get("timeout")]
+        done, pending = wait(pending, timeout=max(min(deadlines), 0) if deadlines else None,
+                             return_when=FIRST_COMPLETED)
+        for future in done:
+            i = futures[future]
+            try:
+                results[i], staged = future.result()
+                if manifests is None:
+                    commit_manifests(staged)
+                else:
+                    manifests.update(staged)
+            except Exception as e:
+                logging.error("Source %s (%s) failed: %s", i, sources[i].get('type'), e)
+        now = time.monotonic()
+        for future in list(pending):
+            i = futures[future]
+            timeout = sources[i].get("timeout")
+            if timeout and i in started and now - started[i] >= timeout:
+                logging.error("Source %s (%s) timed out after %ss", i, sources[i].get('type'), timeout)
+                pending.discard(future)
+    pool.shutdown(wait=False, cancel_futures=True)
+    return results
 
-        else:
-            logging.warning(f"Unknown or skipped source type: {source_type}")
 
+# ---------- MAIN EXTRACTOR ----------
+def run_extraction(config=None, output_csv_path=None, skip_api=False, write_csv=None,
+                   source_types=None, changed_files=None, manifests=None):
+    """Extract every source and return the combined (validated) DataFrame.
+
+    Sources are extracted concurrently (at most ``max_concurrent_sources`` at a
+    time). The output file is only a side output, written asynchronously in the
+    YAML's ``output_format`` (csv, parquet or arrow) unless ``write_csv`` (or
+    ``write_csv`` in the YAML) is false. Returns an empty DataFrame when nothing
+    was extracted and None when schema validation fails. ``source_types`` limits
+    extraction to those source types and ``changed_files`` ({local path:
+    filenames}) to the files that changed. Rows failing the YAML ``rules`` are
+    quarantined instead of returned, and ``transforms`` without ``pushdown`` are
+    applied before returning; ``aggregate`` steps need ``pushdown``. Incremental sources stage their manifests in the
+    caller's ``manifests`` dict, to be passed to ``commit_manifests`` once the
+    rows are loaded; dropping the dict makes the next run read them again.
+    """
+    if config is None:
+        config = read_yaml_config(CONFIG_PATH)
+    if write_csv is None:
+        write_csv = config.get("write_csv", True)
+    # Pushed-down transforms run inside PostgreSQL after the load instead
+    transforms = config.get("transforms") or {}
+    steps = transforms.get("steps") if not transforms.get("pushdown") else None
+    if has_aggregate(steps):
+        # Each tick's aggregate rows would hash differently and be appended to the target again
+        raise ValueError("Aggregate transforms must replace the target: use pushdown: true")
+
+    sources = [source for source in config.get("sources", [])
+               if source_types is None or source.get("type") in source_types]
+    schema = config.get("schema")
+    strict_mode = config.get("strict_mode", False)
+    # Schema dtypes go to the readers so files are parsed straight into compact types
+    results = extract_sources(sources, config.get("max_concurrent_sources", DEFAULT_MAX_CONCURRENT_SOURCES),
+                              skip_api, changed_files, reader_options(schema, strict_mode), manifests)
+    all_dataframes = [df for df in results if df is not None and not df.empty]
+
+    if not all_dataframes:
+        logging.warning("No data extracted from any source.")
+        return pd.DataFrame()
 
     # Combine all data
-    if all_dataframes:
-        final_df = pd.concat(all_dataframes, ignore_index=True)
-        logging.info("Combined data shape: %s", final_df.shape)
-
-        # Check if schema exists in config
-        schema = config.get("schema")
-        strict_mode = config.get("strict_mode", False)
-        if schema:
-            validated_df = validate_and_standardize(final_df, schema,strict_mode)
-            if validated_df is not None:
-                validated_path = output_csv_path or os.path.join(OUTPUT_FOLDER, "extracted_data_std_schema.csv")
-                validated_df.to_csv(validated_path, index=False)
-                logging.info("Validated and standardized CSV written to extracted_data_std_schema.csv")
-            else:
-                logging.error("Schema validation failed. CSV not written.")
-        else:
-            raw_path = output_csv_path or os.path.join(OUTPUT_FOLDER, "extracted_data_std_schema.csv")
-            final_df.to_csv(raw_path, index=False)
-            logging.info(f"CSV written without schema validation to {raw_path}")
-
-
-def extract_from_sftp(host, port, username, password, remote_path, local_path):
-    try:
-        transport = paramiko.Transport((host, port))
-        transport.connect(username=username, password=password)
-        sftp = paramiko.SFTPClient.from_transport(transport)
-
-        # Download file
-        sftp.get(remote_path, local_path)
-        sftp.close()
-        transport.close()
+    final_df = pd.concat(all_dataframes, ignore_index=True)
+    logging.info("Combined data shape: %s", final_df.shape)
 
-        # Read into DataFrame
-        df = pd.read_csv(local_path)
-        return df
+    # Check if schema exists in config
+    if schema:
+        final_df = validate_and_standardize(final_df, schema, strict_mode)
+        if final_df is None:
+            logging.error("Schema validation failed. CSV not written.")
+            return None
 
-    except Exception as e:
-        print(f"SFTP extraction failed: {e}")
-        return pd.DataFrame()
+    if config.get("rules"):
+        quarantine_path = quarantine_path_for(config)
+        final_df = apply_rules(final_df, RuleSet(config["rules"]), quarantine_path,
+                               quarantine_store(config, quarantine_path))
 
+    if steps:
+        final_df = apply_transforms(final_df, steps)
 
+    if write_csv:
+        output_format = config.get("output_format", "csv")
+        output_path = output_csv_path or config.get("output_path") or \
+            os.path.join(OUTPUT_FOLDER, "extracted_data_std_schema.csv")
+        write_output_async(final_df, output_path_for(output_path, output_format), output_format,
+                           config.get("output_compression"))
+    return final_df
 
-# def extract_from_sftp(host, port, username, password, remote_path, local_dir="./data/output_files"):
-#     """
-#     Download all CSV files from an SFTP folder and return as a single DataFrame.
-#     """
-#     try:
-#         os.makedirs(local_dir, exist_ok=True)
 
-#         logging.info(f"Connecting to SFTP server {host}:{port}")
-#         transport = paramiko.Transport((host, port))
-#         transport.connect(username=username, password=password)
-#         sftp = paramiko.SFTPClient.from_transport(transport)
+# ---------- STREAMING (CHUNKED) EXTRACTION ----------
+def slice_frame(df, chunk_size):
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
 
-#         # List all files in remote_path
-#         file_list = sftp.listdir(remote_path)
-#         logging.info(f"Found {len(file_list)} files in {remote_path}")
 
-#         all_dfs = []
-#         for file_name in file_list:
-#             if file_name.endswith(".csv"):
-#                 remote_file = os.path.join(remote_path, file_name)
-#                 local_file = os.path.join(local_dir, file_name)
-#                 logging.info(f"Downloading {remote_file} to {local_file}")
-#                 sftp.get(remote_file, local_file)
-#                 df = pd.read_csv(local_file)
-#                 all_dfs.append(df)
+def iter_local_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE, only_files=None, read_options=None):
+    if not os.path.exists(path):
+        logging.error("Source path does not exist: %s", path)
+        return
 
-#         sftp.close()
-#         transport.close()
+    for filename in sorted(os.listdir(path)):
+        if only_files is not None and filename not in only_files:
+            continue
+        full_path = os.path.join(path, filename)
+        try:
+            if filename.endswith('.csv'):
+                chunks = read_csv_typed(full_path, read_options, chunksize=chunk_size)
+            elif filename.endswith('.txt'):
+                chunks = read_csv_typed(full_path, read_options, delimiter='|', chunksize=chunk_size)
+            elif filename.endswith('.json') or is_json_lines(filename):
+                # JSON arrays are parsed incrementally (ijson) and JSON-lines line by line
+                chunks = iter_json_frames(full_path, chunk_size)
+            else:
+                logging.warning("Unsupported file type skipped: %s", filename)
+                continue
 
-#         if all_dfs:
-#             combined_df = pd.concat(all_dfs, ignore_index=True)
-#             logging.info(f"Combined DataFrame shape: {combined_df.shape}")
-#             return combined_df
-#         else:
-#             logging.warning("No CSV files found in SFTP directory.")
-#             return pd.DataFrame()
+            rows = 0
+            for chunk in chunks:
+                rows += len(chunk)
+                yield chunk
+            logging.info("Streamed %s, rows: %s", filename, rows, extra={"file": filename, "rows": rows})
 
-#     except Exception as e:
-#         logging.error(f"SFTP extraction failed: {e}")
-#         return pd.DataFrame()
+        except Exception as e:
+            logging.error("Failed to read %s: %s", filename, e)
+
+
+def iter_api_chunks(url, auth_token=None, folder_param=None, chunk_size=DEFAULT_CHUNK_SIZE, **options):
+    # Each page flows on as soon as it arrives
+    for page in iter_api_pages(url, auth_token, folder_param, **options):
+        yield from slice_frame(page, chunk_size)
+
+
+def iter_sftp_chunks(host, port, username, password, remote_path, chunk_size=DEFAULT_CHUNK_SIZE, pattern="*",
+                     read_options=None):
+    # Parse remote files as they are read instead of downloading them to disk first
+    for frame in iter_sftp_frames(host, port, username, password, remote_path, chunk_size, pattern, read_options):
+        yield from slice_frame(frame, chunk_size)
+
+
+def iter_extraction(config, skip_api=False, source_types=None, changed_files=None):
+    """Yield validated DataFrame chunks of at most ``chunk_size`` rows from every source.
+
+    Nothing is concatenated or written to disk, so memory stays bounded by the chunk
+    size regardless of how large the sources are. ``source_types`` and
+    ``changed_files`` filter sources as in ``run_extraction``.
+    """
+    chunk_size = config.get("chunk_size", DEFAULT_CHUNK_SIZE)
+    schema = config.get("schema")
+    strict_mode = config.get("strict_mode", False)
+    options = reader_options(schema, strict_mode)
+    # One rule set per run, so uniqueness holds across chunks
+    rule_set = RuleSet(config.get("rules"))
+    quarantine_path = quarantine_path_for(config)
+    seen = quarantine_store(config, quarantine_path) if rule_set else None
+    transforms = config.get("transforms") or {}
+    steps = transforms.get("steps") if not transforms.get("pushdown") else None
+    if has_aggregate(steps):
+        raise ValueError("Aggregate transforms need the whole dataset: use pushdown: true when streaming")
+
+    for source in config.get("sources", []):
+        source_type = source.get("type")
+        if source_types is not None and source_type not in source_types:
+            continue
 
+        if source_type == "local":
+            path = source.get("path")
+            if changed_files is not None and path not in changed_files:
+                continue
+            only_files = changed_files[path] if changed_files is not None else None
+            chunks = iter_local_chunks(path, chunk_size, only_files, options)
+        elif source_type == "api" and not skip_api:
+            chunks = iter_api_chunks(source.get("url"), source.get("auth_token"),
+                                     source.get("folder_param"), chunk_size, **api_options(source))
+        elif source_type == "sftp":
+            chunks = iter_sftp_chunks(source["host"], source.get("port", 22), source["username"],
+                                      source["password"], source["path"], chunk_size,
+                                      source.get("pattern", "*"), options)
+        else:
+            logging.warning("Unknown or skipped source type: %s", source_type)
+            continue
+
+        for chunk in chunks:
+            if schema:
+                chunk = validate_and_standardize(chunk, schema, strict_mode)
+                if chunk is None:
+                    logging.error("Schema validation failed for a %s chunk. Chunk skipped.", source_type)
+                    continue
+            if rule_set:
+                chunk = apply_rules(chunk, rule_set, quarantine_path, seen)
+                if chunk.empty:
+                    continue
+            if steps:
+                chunk = apply_transforms(chunk, steps)
+            yield chunk
+
+
+def extract_from_sftp(host, port, username, password, remote_path, pattern="*",
+                      workers=DEFAULT_SFTP_WORKERS, stream=False, local_dir=DEFAULT_LOCAL_DIR, manifest_path=None,
+                      read_options=None, manifests=None):
+    """Read the remote file, or every file in the remote folder matching pattern, as one DataFrame.
+
+    With a ``manifest_path`` only files whose size or mtime changed are read; the
+    updated manifest is staged in ``manifests`` until ``commit_manifests(manifests)``.
+    """
+    try:
+        manifest = load_manifest(manifest_path) if manifest_path else None
+        df, manifest = extract_sftp_files(host, port, username, password, remote_path, pattern,
+                                          workers, stream, local_dir, manifest, read_options)
+        if manifest_path:
+            stage_manifest(manifest_path, manifest, manifests)
+        return df
 
+    except Exception as e:
+        logging.error("SFTP extraction failed: %s", e)
+        return pd.DataFrame()
 
 
 if __name__ == "__main__":
-    run_extraction()
+    setup_logging()
+    manifests = {}
+    run_extraction(manifests=manifests)
+    commit_manifests(manifests)
+    flush_side_outputs()
@@ -0,0 +1,147 @@
+import os
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+import logging
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
+
+# ---------- CHANGE COLLECTOR ----------
+class ChangeCollector:
+    """Thread-safe set of changed files per watched source path, with debouncing."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.changed = {}
+        self.event = threading.Event()
+        self.last_change = 0.0
+
+    def add(self, source_path, filename):
+        with self.lock:
+            self.changed.setdefault(source_path, set()).add(filename)
+            self.last_change = time.monotonic()
+        self.event.set()
+
+    def wait(self, timeout):
+        return self.event.wait(timeout)
+
+    def drain(self, debounce, stop_flag=None):
+        """Wait until no change arrived for ``debounce`` seconds, then return and reset the changes."""
+        while True:
+            quiet_for = time.monotonic() - self.last_change
+            if quiet_for >= debounce or (stop_flag is not None and stop_flag.is_set()):
+                break
+            time.sleep(debounce - quiet_for)
+        with self.lock:
+            changed, self.changed = self.changed, {}
+            self.event.clear()
+        return changed
+
+
+# ---------- WATCHDOG BACKEND ----------
+if HAS_WATCHDOG:
+    class _WatchdogHandler(FileSystemEventHandler):
+        def __init__(self, source_path, collector):
+            self.source_path = source_path
+            self.collector = collector
+
+        def on_any_event(self, event):
+            if event.is_directory or event.event_type not in ("created", "modified", "moved", "closed"):
+                return
+            path = getattr(event, "dest_path", None) or event.src_path
+            self.collector.add(self.source_path, os.path.basename(path))
+
+
+def _start_watchdog(source_paths, collector):
+    observer = Observer()
+    for source_path in source_paths:
+        observer.schedule(_WatchdogHandler(source_path, collector), source_path, recursive=False)
+    observer.daemon = True
+    observer.start()
+    return observer
+
+
+# ---------- NATIVE INOTIFY BACKEND (LINUX) ----------
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyWatcher(threading.Thread):
+    """Minimal inotify reader via ctypes, used when watchdog is not installed."""
+
+    def __init__(self, source_paths, collector):
+        super().__init__(daemon=True, name="inotify-watcher")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.collector = collector
+        self.watches = {}
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        for source_path in source_paths:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(source_path), mask)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {source_path}")
+            self.watches[wd] = source_path
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 1.0)
+            if not ready:
+                continue
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    continue
+                raise
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+                name = buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+                offset += EVENT_HEADER.size + length
+                if mask & IN_ISDIR or wd not in self.watches:
+                    continue
+                self.collector.add(self.watches[wd], os.fsdecode(name.rstrip(b"\0")))
+        os.close(self.fd)
+
+    def stop(self):
+        self.stopped.set()
+
+
+# ---------- ENTRY POINT ----------
+def start_watch(source_paths, collector):
+    """Watch the given directories, feeding changed filenames into collector.
+
+    Uses watchdog when installed, otherwise native inotify. Returns the running
+    watcher (with a ``stop()`` method) or None if neither is available.
+    """
+    source_paths = [path for path in source_paths if os.path.isdir(path)]
+    if not source_paths:
+        return None
+    if HAS_WATCHDOG:
+        logging.info("Watching %s with watchdog.", source_paths)
+        return _start_watchdog(source_paths, collector)
+    try:
+        watcher = InotifyWatcher(source_paths, collector)
+    except (OSError, AttributeError) as e:
+        logging.warning("File events unavailable (%s); falling back to polling.", e)
+        return None
+    watcher.start()
+    logging.info("Watching %s with inotify.", source_paths)
+    return watcher
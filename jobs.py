@@ -0,0 +1,154 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from logger import log_context
+
+DEFAULT_JOB_WORKERS = 8
+DEFAULT_JOBS_PER_TABLE = 1
+MAX_FINISHED_JOBS = 500
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+# ---------- JOB ----------
+class Job:
+    """One submitted ELT run: its state, timings and the event that asks it to stop."""
+
+    def __init__(self, fn, table, name=None):
+        self.id = uuid.uuid4().hex
+        self.fn = fn
+        self.table = table
+        self.name = name
+        self.state = QUEUED
+        self.error = None
+        self.stop_event = threading.Event()
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        now = time.time()
+        started = self.started_at or (self.finished_at if self.state == CANCELLED else None)
+        return {
+            "id": self.id,
+            "name": self.name,
+            "table": self.table,
+            "state": self.state,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round((started or now) - self.submitted_at, 3),
+            "run_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+        }
+
+
+# ---------- RUNNER ----------
+class JobRunner:
+    """Long-lived executor for ELT jobs inside the API process.
+
+    Jobs run on a shared worker pool, so they reuse the already imported
+    modules, pooled DB engines and cached configs. At most ``max_per_table``
+    jobs load into the same target table at once; further jobs for that table
+    wait in a per-table queue without holding a worker. ``fn(stop_event)``
+    must return once stop_event is set, which is how cancellation works.
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, max_per_table=DEFAULT_JOBS_PER_TABLE):
+        self.max_per_table = max_per_table
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="elt-job")
+        self.lock = threading.Lock()
+        self.jobs = OrderedDict()
+        self.active = {}   # table -> jobs handed to the executor
+        self.waiting = {}  # table -> deque of jobs over the table's limit
+
+    def submit(self, fn, table, name=None):
+        job = Job(fn, table, name)
+        with self.lock:
+            self.jobs[job.id] = job
+            self.trim_finished()
+            if self.active.get(table, 0) < self.max_per_table:
+                self.dispatch(job)
+            else:
+                self.waiting.setdefault(table, deque()).append(job)
+                logging.info("Job %s queued: table '%s' already has %s running",
+                             job.id, table, self.max_per_table)
+        return job
+
+    def dispatch(self, job):
+        # Called with self.lock held
+        self.active[job.table] = self.active.get(job.table, 0) + 1
+        self.executor.submit(self.run, job)
+
+    def run(self, job):
+        with self.lock:
+            if job.state == CANCELLED:
+                self.release(job)
+                return
+            job.state = RUNNING
+            job.started_at = time.time()
+        # Every record the job logs carries its id and target table
+        with log_context(job_id=job.id, table=job.table):
+            logging.info("Job %s started for table '%s'", job.id, job.table)
+            try:
+                job.fn(job.stop_event)
+                state, error = (CANCELLED if job.stop_event.is_set() else SUCCEEDED), None
+            except Exception as e:
+                logging.error("Job %s failed: %s", job.id, e)
+                state, error = FAILED, str(e)
+            with self.lock:
+                job.state, job.error = state, error
+                job.finished_at = time.time()
+                self.release(job)
+            duration = job.finished_at - job.started_at
+            logging.info("Job %s %s after %.1fs", job.id, state, duration, extra={"duration": round(duration, 3)})
+
+    def release(self, job):
+        # Called with self.lock held: free the table slot and start the next job waiting for it
+        self.active[job.table] -= 1
+        waiting = self.waiting.get(job.table)
+        while waiting and self.active[job.table] < self.max_per_table:
+            self.dispatch(waiting.popleft())
+
+    def cancel(self, job_id):
+        """Cancel a queued job or ask a running one to stop; returns the job, or None if unknown."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in FINISHED:
+                return job
+            job.stop_event.set()
+            if job.state == QUEUED:
+                job.state = CANCELLED
+                job.finished_at = time.time()
+                waiting = self.waiting.get(job.table)
+                if waiting and job in waiting:
+                    waiting.remove(job)
+        logging.info("Job %s cancellation requested", job_id)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def list(self):
+        with self.lock:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def trim_finished(self):
+        # Called with self.lock held: keep the history of finished jobs bounded
+        finished = [job_id for job_id, job in self.jobs.items() if job.state in FINISHED]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            if job.state not in FINISHED:
+                self.cancel(job.id)
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,85 @@
+import json
+import itertools
+import pandas as pd
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+# ---------- FORMAT DETECTION ----------
+def is_json_lines(path):
+    return path.lower().endswith(JSON_LINES_EXTENSIONS)
+
+
+def starts_with_array(path):
+    """True if the JSON document is a top-level array (checked from its first non-blank byte)."""
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(4096)
+            if not block:
+                return False
+            stripped = block.lstrip()
+            if stripped:
+                return stripped.startswith(b'[')
+
+
+# ---------- RECORD STREAMS ----------
+def iter_json_records(path):
+    """Yield the records of a JSON array, JSON-lines or single-object JSON file one at a time.
+
+    JSON arrays are parsed incrementally with ijson when it is installed; without
+    it the file is loaded whole. JSON-lines files are always read line by line.
+    """
+    if is_json_lines(path):
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    if HAS_IJSON and starts_with_array(path):
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'item', use_float=True)
+        return
+
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def iter_json_frames(path, chunk_size):
+    """Yield DataFrames of at most chunk_size records from a JSON or JSON-lines file."""
+    if is_json_lines(path):
+        yield from pd.read_json(path, lines=True, chunksize=chunk_size)
+        return
+
+    if not starts_with_array(path):
+        # A top-level object keeps pandas' column-oriented reading
+        df = pd.read_json(path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+
+    records = iter_json_records(path)
+    while True:
+        batch = list(itertools.islice(records, chunk_size))
+        if not batch:
+            return
+        yield pd.DataFrame(batch)
+
+
+# ---------- JSON ARRAY ENCODER ----------
+def iter_json_array(records):
+    """Encode records as a JSON array piece by piece, for streamed HTTP responses."""
+    yield '['
+    for i, record in enumerate(records):
+        yield (',' if i else '') + json.dumps(record)
+    yield ']'
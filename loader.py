@@ -1,75 +1,456 @@
 import os
+import io
 import pandas as pd
-import yaml
 import logging
-from sqlalchemy import create_engine, Table, MetaData, Column, Integer, String, Float, Text
+from contextlib import nullcontext
+import json
+from sqlalchemy import (inspect, Engine, Table, MetaData, Column, Integer, SmallInteger, BigInteger,
+                        Numeric, Boolean, Text, Date, Time, Interval, LargeBinary, PrimaryKeyConstraint,
+                        UniqueConstraint, text)
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, REAL, TIMESTAMP, JSONB
+from sqlalchemy.types import UserDefinedType
 from sqlalchemy.exc import ProgrammingError
+import psycopg2
+from psycopg2.extras import execute_values
+from output_format import read_output, format_of, output_path_for
+from config_service import read_config_file
+from logger import setup_logging
+from db import get_engine
+from partitions import (partition_clause, add_ingestion_day, create_default_partition, ensure_partitions,
+                        route_partitions)
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 # ---------- CONFIG ----------
 CONFIG_PATH = "uploaded_configs/config.yaml"
 CSV_PATH = "data/output_files/extracted_data.csv"
-
-# ---------- LOGGING ----------
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+DEFAULT_CHUNK_ROWS = 100000
 
 # ---------- YAML CONFIG LOADER ----------
 def read_yaml_config(path):
     try:
-        with open(path, 'r') as f:
-            config = yaml.safe_load(f)
+        config = read_config_file(path)  # parsed once per distinct YAML, then served from cache
         logging.info("YAML config loaded successfully.")
         return config
     except Exception as e:
-        logging.error(f"Error reading YAML config: {e}")
+        logging.error("Error reading YAML config: %s", e)
         return {}
 
 # ---------- Infer SQLAlchemy Column Types ----------
-def infer_sqlalchemy_type(dtype):
-    if pd.api.types.is_integer_dtype(dtype):
-        return Integer
-    elif pd.api.types.is_float_dtype(dtype):
-        return Float
-    elif pd.api.types.is_string_dtype(dtype):
+TYPE_SAMPLE_SIZE = 100
+
+
+class RawType(UserDefinedType):
+    """A column type given verbatim in the target config, e.g. ``NUMERIC(12, 2)``."""
+    cache_ok = True
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def get_col_spec(self, **kw):
+        return self.spec
+
+
+def infer_object_type(values):
+    """Pick a type for an object column from a sample of its non-null values."""
+    sample = values.dropna().iloc[:TYPE_SAMPLE_SIZE]
+    if sample.empty:
         return Text
+    if sample.map(lambda v: isinstance(v, (dict, list))).all():
+        return JSONB
+    return {
+        "boolean": Boolean,
+        "integer": BigInteger,
+        "floating": DOUBLE_PRECISION,
+        "decimal": Numeric,
+        "date": Date,
+        "time": Time,
+        "datetime": TIMESTAMP(timezone=True),
+        "bytes": LargeBinary,
+    }.get(pd.api.types.infer_dtype(sample, skipna=True), Text)
+
+
+def infer_sqlalchemy_type(dtype, values=None):
+    """Map a pandas dtype (and, for object columns, its values) to the closest PostgreSQL type."""
+    if pd.api.types.is_bool_dtype(dtype):
+        return Boolean
+    elif pd.api.types.is_integer_dtype(dtype):
+        if dtype.kind == "u":
+            # Unsigned values need the next wider signed type; uint64 overflows BIGINT
+            return {1: SmallInteger, 2: Integer, 4: BigInteger}.get(dtype.itemsize, Numeric(20, 0))
+        return {1: SmallInteger, 2: SmallInteger, 4: Integer}.get(dtype.itemsize, BigInteger)
+    elif pd.api.types.is_float_dtype(dtype):
+        return REAL if dtype.itemsize == 4 else DOUBLE_PRECISION
+    elif pd.api.types.is_datetime64_any_dtype(dtype):
+        return TIMESTAMP(timezone=getattr(dtype, "tz", None) is not None)
+    elif pd.api.types.is_timedelta64_dtype(dtype):
+        return Interval
+    elif isinstance(dtype, pd.CategoricalDtype):
+        return infer_sqlalchemy_type(dtype.categories.dtype)
+    elif dtype == object and values is not None:
+        return infer_object_type(values)
     else:
-        return String
+        return Text
+
+
+def json_columns(df):
+    return [col for col in df.columns
+            if df[col].dtype == object and infer_object_type(df[col]) is JSONB]
+
+
+def serialize_json(df):
+    """dict/list values are written as JSON text (COPY and execute_values can't take Python dicts)."""
+    columns = json_columns(df)
+    if not columns:
+        return df
+    return df.assign(**{col: df[col].map(json.dumps, na_action="ignore") for col in columns})
+
 
 # ---------- Table Creation ----------
-def create_table_from_df(engine, df, table_name):
+def key_with_partition(columns, partition):
+    # Primary/unique keys of a partitioned table must include the partition column
+    if partition and partition["column"] not in columns:
+        return list(columns) + [partition["column"]]
+    return list(columns)
+
+
+def create_table_from_df(engine, df, table_name, db_config=None):  # engine may also be an open connection
+    """Create the table if missing, with precise column types and the configured keys.
+
+    ``column_types`` in the target config overrides inferred types per column,
+    ``primary_key`` and ``unique_keys`` are declared in the DDL, and ``partition``
+    creates a partitioned table. Secondary ``indexes`` are built after the load
+    by ``create_indexes``.
+    """
+    db_config = db_config or {}
+    partition = db_config.get("partition")
+    column_types = db_config.get("column_types") or {}
     metadata = MetaData()
     columns = []
 
     for col in df.columns:
-        col_type = infer_sqlalchemy_type(df[col].dtype)
+        if col in column_types:
+            col_type = RawType(column_types[col])
+        else:
+            col_type = infer_sqlalchemy_type(df[col].dtype, df[col])
         columns.append(Column(col, col_type))
 
-    table = Table(table_name, metadata, *columns)
-    metadata.create_all(engine, checkfirst=True)
-    logging.info(f"Table '{table_name}' created or already exists.")
+    if partition and partition.get("ingestion") and partition["column"] not in df.columns:
+        # Rows loaded without the column (e.g. a raw CSV COPY) still land in today's partition
+        columns.append(Column(partition["column"], Date, server_default=text("CURRENT_DATE")))
+
+    constraints = []
+    if db_config.get("primary_key"):
+        constraints.append(PrimaryKeyConstraint(*key_with_partition(db_config["primary_key"], partition)))
+    for unique_key in db_config.get("unique_keys") or []:
+        unique_key = [unique_key] if isinstance(unique_key, str) else unique_key
+        constraints.append(UniqueConstraint(*key_with_partition(unique_key, partition)))
+
+    if partition is None:
+        table = Table(table_name, metadata, *columns, *constraints)
+        metadata.create_all(engine, checkfirst=True)
+        logging.info("Table '%s' created or already exists.", table_name)
+        return
+
+    table = Table(table_name, metadata, *columns, *constraints,
+                  postgresql_partition_by=partition_clause(partition))
+    with engine.begin() if isinstance(engine, Engine) else nullcontext(engine) as conn:
+        if not inspect(conn).has_table(table_name):
+            metadata.create_all(conn)
+            create_default_partition(conn, table_name, partition)
+    logging.info("Partitioned table '%s' (%s) created or already exists.", table_name, partition_clause(partition))
+
+
+# ---------- Secondary Indexes ----------
+def index_name(table_name, columns):
+    return f"ix_{table_name}_{'_'.join(columns)}"[:63]
+
+
+def create_indexes(conn, table_name, db_config):
+    """Build the configured secondary indexes that don't exist yet.
+
+    Called after rows are loaded, so a bulk load never maintains them row by row.
+    Each entry is a column list or ``{columns, method, name, unique}``.
+    """
+    indexes = db_config.get("indexes") or []
+    if not indexes:
+        return
+    quote = conn.dialect.identifier_preparer.quote
+    existing = set(conn.exec_driver_sql(
+        "SELECT indexname FROM pg_indexes WHERE tablename = %(t)s", {"t": table_name}).scalars().all())
+    for index in indexes:
+        if not isinstance(index, dict):
+            index = {"columns": [index] if isinstance(index, str) else index}
+        name = index.get("name") or index_name(table_name, index["columns"])
+        if name in existing:
+            continue
+        column_list = ", ".join(quote(col) for col in index["columns"])
+        conn.execute(text(
+            f"CREATE {'UNIQUE ' if index.get('unique') else ''}INDEX IF NOT EXISTS {quote(name)} "
+            f"ON {quote(table_name)} USING {index.get('method', 'btree')} ({column_list})"
+        ))
+        logging.info("Created index '%s' on '%s'.", name, table_name)
+
+
+# ---------- BULK INSERT (COPY / EXECUTE_VALUES) ----------
+def copy_dataframe(conn, df, table_name):
+    """Stream df into table_name with COPY FROM STDIN through an in-memory CSV buffer."""
+    quote = conn.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(col) for col in df.columns)
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {quote(table_name)} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def insert_values(conn, df, table_name, page_size=1000):
+    """Multi-row INSERT ... VALUES batches, for targets that do not allow COPY."""
+    quote = conn.dialect.identifier_preparer.quote
+    columns = ", ".join(quote(col) for col in df.columns)
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    with conn.connection.cursor() as cursor:
+        execute_values(cursor, f"INSERT INTO {quote(table_name)} ({columns}) VALUES %s", rows, page_size=page_size)
+
+
+def copy_csv_file(conn, csv_path, columns, table_name):
+    """Stream a CSV file (with header) straight into COPY FROM STDIN without parsing it in Python."""
+    quote = conn.dialect.identifier_preparer.quote
+    column_list = ", ".join(quote(col) for col in columns)
+    with open(csv_path, "r", newline="") as f, conn.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(table_name)} ({column_list}) FROM STDIN WITH (FORMAT csv, HEADER true)", f
+        )
+        return cursor.rowcount
+
+
+# COPY is rejected by some targets (e.g. poolers or restricted roles); those fall back to execute_values
+COPY_REJECTED_ERRORS = (psycopg2.errors.FeatureNotSupported, psycopg2.errors.InsufficientPrivilege)
+
+
+def bulk_insert(conn, df, table_name, db_config):
+    """COPY df into the table, falling back to execute_values if the target rejects COPY."""
+    if db_config.get("load_mode") == "values":
+        insert_values(conn, df, table_name)
+        return
+    try:
+        with conn.begin_nested():  # savepoint, so a rejected COPY doesn't abort the transaction
+            copy_dataframe(conn, df, table_name)
+    except COPY_REJECTED_ERRORS as e:
+        logging.warning("COPY not allowed on '%s', falling back to execute_values: %s", table_name, e)
+        insert_values(conn, df, table_name)
+
+
+# ---------- MERGE (STAGING TABLE + ON CONFLICT) ----------
+ROW_HASH_COLUMN = "row_hash"
+
+
+def merge_into_table(conn, df, table_name, db_config):
+    """Bulk-load df into a temp staging table, then merge it into the target in one statement.
+
+    Conflicts are detected on ``merge_keys`` from the target config, or on a
+    ``row_hash`` column (md5 of the whole row, computed by PostgreSQL) when no
+    keys are configured. ``on_conflict`` is ``nothing`` (default) or ``update``.
+    Returns the number of rows inserted or updated.
+    """
+    quote = conn.dialect.identifier_preparer.quote
+    key_columns = db_config.get("merge_keys") or []
+    on_conflict = db_config.get("on_conflict", "nothing")
+    target = quote(table_name)
+    staging = quote(f"{table_name}_staging")
+    data_columns = ", ".join(quote(col) for col in df.columns)
+
+    if not key_columns:
+        conn.execute(text(f"ALTER TABLE {target} ADD COLUMN IF NOT EXISTS {ROW_HASH_COLUMN} TEXT"))
+        key_columns = [ROW_HASH_COLUMN]
+        on_conflict = "nothing"  # identical rows have nothing to update
+
+    key_columns = key_with_partition(key_columns, db_config.get("partition"))
+
+    key_list = ", ".join(quote(col) for col in key_columns)
+    conn.execute(text(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {quote('ux_' + table_name + '_' + '_'.join(key_columns))} "
+        f"ON {target} ({key_list})"
+    ))
+
+    conn.execute(text(f"CREATE TEMP TABLE {staging} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP"))
+    bulk_insert(conn, df, f"{table_name}_staging", db_config)
+
+    if key_columns[0] == ROW_HASH_COLUMN:
+        insert_columns = f"{data_columns}, {ROW_HASH_COLUMN}"
+        select_list = f"{data_columns}, md5(ROW({data_columns})::text)"
+    else:
+        insert_columns = data_columns
+        # DISTINCT ON keeps one row per key so DO UPDATE never touches a row twice
+        select_list = f"DISTINCT ON ({key_list}) {data_columns}"
+
+    if on_conflict == "update":
+        updates = ", ".join(
+            f"{quote(col)} = EXCLUDED.{quote(col)}" for col in df.columns if col not in key_columns
+        )
+        conflict_action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    else:
+        conflict_action = "DO NOTHING"
+
+    result = conn.execute(text(
+        f"INSERT INTO {target} ({insert_columns}) "
+        f"SELECT {select_list} FROM {staging} "
+        f"ON CONFLICT ({key_list}) {conflict_action}"
+    ))
+    return result.rowcount
+
 
 # ---------- LOAD FUNCTION ----------
+def build_engine_url(db_config):
+    return (
+        f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
+        f"@{db_config['host']}:{db_config['port']}/{db_config['database']}"
+    )
+
+
+def engine_for(db_config):
+    """Shared pooled engine for the target database; ``pool`` settings apply when it is first created."""
+    return get_engine(build_engine_url(db_config), **db_config.get("pool", {}))
+
+
+def write_dataframe(conn, df, table_name, db_config):
+    """Write df into an existing table using the configured load_mode; returns rows written.
+
+    With a ``partition`` in the target config, rows are written straight into their
+    partitions (created as needed); merges go through the parent table.
+    """
+    load_mode = db_config.get("load_mode", "append")
+    partition = db_config.get("partition")
+    df = serialize_json(df)
+    if partition:
+        df = add_ingestion_day(df, partition)
+    if load_mode == "merge":
+        if partition:
+            ensure_partitions(conn, df, table_name, partition)
+        return merge_into_table(conn, df, table_name, db_config)
+    if partition:
+        return sum(insert_rows(conn, rows, target, db_config)
+                   for target, rows in route_partitions(conn, df, table_name, partition))
+    return insert_rows(conn, df, table_name, db_config)
+
+
+def insert_rows(conn, df, table_name, db_config):
+    load_mode = db_config.get("load_mode", "append")
+    if load_mode in ("copy", "values"):
+        bulk_insert(conn, df, table_name, db_config)
+    else:
+        df.to_sql(table_name, conn, if_exists='append', index=False)
+    return len(df)
+
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=2, max=10))
 def load_csv_to_postgres(csv_path, db_config, table_name):
+    engine = engine_for(db_config)
+    load_mode = db_config.get("load_mode", "append")
+    partition = db_config.get("partition")
+
+    if load_mode in ("copy", "values"):
+        # One transaction for the whole file, so a retry never leaves a partial load behind
+        chunk_rows = db_config.get("chunk_rows", DEFAULT_CHUNK_ROWS)
+        with engine.begin() as conn:
+            sample = pd.read_csv(csv_path, nrows=chunk_rows)  # column types come from the first chunk
+            create_table_from_df(conn, sample, table_name, db_config)
+            if partition:
+                # Chunks are routed to their partitions instead of one COPY through the parent
+                total_rows = sum(write_dataframe(conn, chunk, table_name, db_config)
+                                 for chunk in pd.read_csv(csv_path, chunksize=chunk_rows))
+                create_indexes(conn, table_name, db_config)
+                logging.info("Loaded %s rows into partitions of '%s'.", total_rows, table_name,
+                             extra={"table": table_name, "rows": total_rows})
+                return
+            if load_mode == "copy":
+                try:
+                    with conn.begin_nested():
+                        total_rows = copy_csv_file(conn, csv_path, list(sample.columns), table_name)
+                    create_indexes(conn, table_name, db_config)
+                    logging.info("Copied %s rows into table '%s'.", total_rows, table_name,
+                                 extra={"table": table_name, "rows": total_rows})
+                    return
+                except COPY_REJECTED_ERRORS as e:
+                    logging.warning("COPY not allowed on '%s', falling back to execute_values: %s", table_name, e)
+            total_rows = 0
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                insert_values(conn, chunk, table_name)
+                total_rows += len(chunk)
+            create_indexes(conn, table_name, db_config)
+        logging.info("Inserted %s rows into table '%s' with execute_values.", total_rows, table_name,
+                     extra={"table": table_name, "rows": total_rows})
+        return
+
     df = pd.read_csv(csv_path)
-    logging.info(f"CSV loaded with {len(df)} rows and columns: {list(df.columns)}")
+    logging.info("CSV loaded with %s rows and columns: %s", len(df), list(df.columns))
 
-    engine_url = (
-        f"postgresql+psycopg2://{db_config['user']}:{db_config['password']}"
-        f"@{db_config['host']}:{db_config['port']}/{db_config['database']}"
-    )
-    engine = create_engine(engine_url)
+    create_table_from_df(engine, df, table_name, db_config)
+    with engine.begin() as conn:
+        written = write_dataframe(conn, df, table_name, db_config)
+        create_indexes(conn, table_name, db_config)
+    logging.info("Loaded %s of %s rows into table '%s' (%s).", written, len(df), table_name, load_mode,
+                 extra={"table": table_name, "rows": written})
+
+
+# ---------- IN-PROCESS (DATAFRAME) LOAD ----------
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=2, min=2, max=10))
+def load_chunk(engine, chunk, table_name, db_config):
+    with engine.begin() as conn:
+        create_table_from_df(conn, chunk, table_name, db_config)
+        return write_dataframe(conn, chunk, table_name, db_config)
+
+
+def build_indexes(engine, table_name, db_config):
+    if db_config.get("indexes"):
+        with engine.begin() as conn:
+            create_indexes(conn, table_name, db_config)
+
+
+def load_dataframe_to_postgres(df, db_config, table_name):
+    """Load an in-memory DataFrame straight into the table, with no CSV hand-off."""
+    engine = engine_for(db_config)
+    written = load_chunk(engine, df, table_name, db_config)
+    build_indexes(engine, table_name, db_config)
+    logging.info("Loaded %s of %s rows into table '%s'.", written, len(df), table_name,
+                 extra={"table": table_name, "rows": written})
+    return written
+
+
+def load_file_to_postgres(path, db_config, table_name):
+    """Load an extracted CSV, Parquet or Arrow file; columnar files are memory-mapped with dtypes kept."""
+    if format_of(path) == "csv":
+        return load_csv_to_postgres(path, db_config, table_name)
+    return load_dataframe_to_postgres(read_output(path), db_config, table_name)
+
+
+def load_chunks_to_postgres(chunks, db_config, table_name):
+    """Load an iterable of DataFrames one bounded chunk at a time, committing after each chunk.
 
-    create_table_from_df(engine, df, table_name)
-    df.to_sql(table_name, engine, if_exists='append', index=False)
-    logging.info(f"Data successfully loaded into table '{table_name}'.")
+    The next chunk is only pulled from the iterator once the previous one is committed,
+    so producers can treat resumption as "this chunk is safely loaded".
+    """
+    engine = engine_for(db_config)
+    total_rows = 0
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        total_rows += load_chunk(engine, chunk, table_name, db_config)
+        logging.info("Loaded chunk of %s rows into table '%s'.", len(chunk), table_name,
+                     extra={"table": table_name, "rows": len(chunk)})
+    # Indexes are built once after the whole stream instead of being maintained per chunk
+    build_indexes(engine, table_name, db_config)
+    logging.info("Streaming load finished: %s rows into table '%s'.", total_rows, table_name,
+                 extra={"table": table_name, "rows": total_rows})
+    return total_rows
 
 # ---------- ENTRY POINT ----------
 if __name__ == "__main__":
+    setup_logging()
     config = read_yaml_config(CONFIG_PATH)
     target_config = config.get("target", {})
 
     if target_config.get("type") == "postgres":
-        load_csv_to_postgres(CSV_PATH, target_config, target_config.get("table", "load_data"))
+        output_path = output_path_for(config.get("output_path", CSV_PATH), config.get("output_format", "csv"))
+        load_file_to_postgres(output_path, target_config, target_config.get("table", "load_data"))
     else:
         logging.error("Invalid or missing PostgreSQL target configuration.")
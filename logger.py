@@ -1,15 +1,145 @@
 # logger.py
+import os
+import copy
+import json
+import queue
+import atexit
 import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 
 LOG_FILE = "elt.log"
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, mode='a'),
-        logging.StreamHandler()
-    ]
-)
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+MAX_LOG_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+# Structured fields copied into JSON records when passed via extra= or log_context()
+CONTEXT_FIELDS = ("job_id", "source", "file", "table", "rows", "duration")
+SCALARS = (str, int, float, bool, type(None))
 
 logger = logging.getLogger(__name__)
+
+_context = contextvars.ContextVar("elt_log_context", default={})
+_listener = None
+_setup_lock = threading.Lock()
+
+
+# ---------- CONTEXT ----------
+@contextmanager
+def log_context(**fields):
+    """Attach fields (job_id, source, ...) to every record logged by this thread inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    def filter(self, record):
+        for key, value in _context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+# ---------- FORMATTERS ----------
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any structured fields."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# ---------- ASYNC HANDLER ----------
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves %-formatting to the listener thread.
+
+    The stock handler merges msg and args in the logging thread. Here records
+    with only immutable scalar args are queued as they are, so the caller only
+    pays for creating the record. Other args (lists, dicts, objects) are
+    formatted right away, because they could change before the listener runs.
+    """
+
+    def prepare(self, record):
+        # Other handlers of the same record must still see the original msg, args and exc_info
+        record = copy.copy(record)
+        if record.args and not (isinstance(record.args, tuple)
+                                and all(isinstance(arg, SCALARS) for arg in record.args)):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def file_handler(log_file, rotate_when=None, max_bytes=MAX_LOG_BYTES, backups=LOG_BACKUPS):
+    directory = os.path.dirname(log_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if rotate_when:
+        return TimedRotatingFileHandler(log_file, when=rotate_when, backupCount=backups)
+    return RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups)
+
+
+def setup_logging(log_file=LOG_FILE, level=logging.INFO, json_file=True, console=True,
+                  rotate_when=None, max_bytes=MAX_LOG_BYTES, backups=LOG_BACKUPS):
+    """Route all logging through a queue to a background thread that formats and writes it.
+
+    The file handler rotates by size (``max_bytes``) or, with ``rotate_when``
+    (e.g. "midnight"), by time, and writes JSON lines unless ``json_file`` is
+    False. Safe to call more than once; only the first call configures logging.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+        handlers = []
+        if log_file:
+            handler = file_handler(log_file, rotate_when, max_bytes, backups)
+            handler.setFormatter(JsonFormatter() if json_file else logging.Formatter(LOG_FORMAT))
+            handlers.append(handler)
+        if console:
+            stream = logging.StreamHandler()
+            stream.setFormatter(logging.Formatter(LOG_FORMAT))
+            handlers.append(stream)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        _listener.queue_handler = queue_handler
+        atexit.register(stop_logging)
+        return _listener
+
+
+def stop_logging():
+    """Flush queued records and detach the queue handler."""
+    global _listener
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        logging.getLogger().removeHandler(_listener.queue_handler)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
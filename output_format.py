@@ -0,0 +1,85 @@
+import os
+import logging
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# ---------- OUTPUT FORMATS ----------
+# csv: plain text; parquet: compressed columnar; arrow: Arrow IPC file, memory-mappable
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_COMPRESSION = {"parquet": "snappy", "arrow": "uncompressed"}
+
+
+def output_path_for(path, output_format):
+    """Swap the extension of path to match the output format."""
+    if output_format not in EXTENSIONS:
+        raise ValueError(f"Unknown output_format: {output_format}")
+    return os.path.splitext(path)[0] + EXTENSIONS[output_format]
+
+
+def format_of(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        return "parquet"
+    if extension in (".arrow", ".feather"):
+        return "arrow"
+    return "csv"
+
+
+def require_pyarrow(output_format):
+    if pa is None:
+        raise ImportError(f"pyarrow is required for output_format '{output_format}'")
+
+
+# ---------- WRITER ----------
+def write_output(df, path, output_format="csv", compression=None):
+    """Write df in the given format, keeping pandas dtypes for the columnar formats."""
+    if output_format == "csv":
+        df.to_csv(path, index=False)
+        return
+    require_pyarrow(output_format)
+    compression = compression or DEFAULT_COMPRESSION[output_format]
+    if output_format == "parquet":
+        df.to_parquet(path, index=False, compression=compression)
+    else:
+        # Uncompressed Arrow IPC buffers can be memory-mapped and read without copying
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        options = pa.ipc.IpcWriteOptions(compression=None if compression == "uncompressed" else compression)
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+
+
+# ---------- READER ----------
+def read_output(path, limit=None):
+    """Read an extracted file back into a DataFrame, memory-mapping the columnar formats.
+
+    With ``limit`` only the first rows are materialized (used for previews).
+    """
+    output_format = format_of(path)
+    if output_format == "csv":
+        return pd.read_csv(path, nrows=limit)
+    require_pyarrow(output_format)
+
+    if output_format == "parquet":
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        if limit is None:
+            table = parquet_file.read()
+        else:
+            batches = parquet_file.iter_batches(batch_size=limit)
+            first = next(batches, None)
+            table = pa.Table.from_batches([first]) if first is not None else parquet_file.schema_arrow.empty_table()
+    else:
+        with pa.memory_map(path, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+            if limit is not None:
+                table = table.slice(0, limit)
+            df = table.to_pandas()
+        logging.info("Read %s rows from %s (%s).", len(df), path, output_format)
+        return df
+    logging.info("Read %s rows from %s (%s).", table.num_rows, path, output_format)
+    return table.to_pandas()
@@ -0,0 +1,140 @@
+import re
+import hashlib
+import logging
+import pandas as pd
+
+# ---------- PARTITION SPEC ----------
+# target.partition: {column, strategy: range|list, interval: day|week|month|year|<number>,
+#                    ingestion: true (column filled with the load day), default: true}
+FREQUENCIES = {"day": "D", "week": "W-SUN", "month": "M", "year": "Y"}
+NAME_FORMATS = {"day": "%Y%m%d", "week": "%Y%m%d", "month": "%Y%m", "year": "%Y"}
+DEFAULT_INTERVAL = "month"
+
+
+def partition_clause(spec):
+    """PARTITION BY clause for the parent table."""
+    strategy = spec.get("strategy", "range").upper()
+    if strategy not in ("RANGE", "LIST"):
+        raise ValueError(f"Unknown partition strategy: {spec.get('strategy')}")
+    return f"{strategy} ({spec['column']})"
+
+
+def add_ingestion_day(df, spec):
+    """With ``ingestion: true`` fill the partition column with today's date."""
+    if spec.get("ingestion"):
+        df = df.assign(**{spec["column"]: pd.Timestamp.now().normalize()})
+    return df
+
+
+def sql_literal(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def list_suffix(value):
+    slug = re.sub(r"[^a-z0-9]+", "_", str(value).lower()).strip("_")
+    if slug != str(value):
+        # Keep names unique when different values share a slug
+        slug = f"{slug}_{hashlib.md5(str(value).encode()).hexdigest()[:6]}".lstrip("_")
+    return slug
+
+
+def partition_keys(series, spec):
+    """Return (partition suffix per row, {suffix: FOR VALUES clause}), computed vectorized.
+
+    Rows whose key is null get a null suffix and are left to the DEFAULT partition.
+    """
+    strategy = spec.get("strategy", "range")
+    if strategy == "list":
+        suffixes = {value: list_suffix(value) for value in series.dropna().unique()}
+        bounds = {suffixes[value]: f"FOR VALUES IN ({sql_literal(value)})" for value in suffixes}
+        return series.map(suffixes), bounds
+
+    interval = spec.get("interval", "day" if spec.get("ingestion") else DEFAULT_INTERVAL)
+    if isinstance(interval, (int, float)):
+        starts = pd.to_numeric(series, errors="coerce") // interval * interval
+        keys = starts.map(lambda start: None if pd.isna(start) else f"{int(start)}".replace("-", "m"))
+        bounds = {f"{int(start)}".replace("-", "m"): f"FOR VALUES FROM ({int(start)}) TO ({int(start + interval)})"
+                  for start in starts.dropna().unique()}
+        return keys, bounds
+
+    if interval not in FREQUENCIES:
+        raise ValueError(f"Unknown partition interval: {interval}")
+    periods = pd.to_datetime(series, errors="coerce").dt.tz_localize(None).dt.to_period(FREQUENCIES[interval])
+    keys = periods.dt.start_time.dt.strftime(NAME_FORMATS[interval])
+    bounds = {}
+    for period in periods.dropna().unique():
+        start, end = period.start_time.date(), (period + 1).start_time.date()
+        bounds[start.strftime(NAME_FORMATS[interval])] = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    return keys, bounds
+
+
+# ---------- PARTITION MANAGEMENT ----------
+def existing_partitions(conn, table_name):
+    """Return (is the table partitioned, set of its partition names) from the catalog."""
+    quote = conn.dialect.identifier_preparer.quote
+    regclass = quote(table_name)
+    partitioned = conn.exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%(t)s)", {"t": regclass}).first()
+    names = conn.exec_driver_sql(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%(t)s)", {"t": regclass}).scalars().all()
+    return partitioned is not None, set(names)
+
+
+def create_partition(conn, table_name, name, bound):
+    """Create one partition; returns False if PostgreSQL refuses (e.g. DEFAULT already holds its rows)."""
+    quote = conn.dialect.identifier_preparer.quote
+    sql = f"CREATE TABLE IF NOT EXISTS {quote(name)} PARTITION OF {quote(table_name)} {bound}"
+    try:
+        with conn.begin_nested():
+            conn.exec_driver_sql(sql.replace("%", "%%"))
+    except Exception as e:
+        logging.warning("Could not create partition '%s', rows go through '%s': %s", name, table_name, e)
+        return False
+    logging.info("Created partition '%s' of '%s'.", name, table_name)
+    return True
+
+
+def create_default_partition(conn, table_name, spec):
+    if spec.get("default", True):
+        create_partition(conn, table_name, f"{table_name}_default", "DEFAULT")
+
+
+def ensure_partitions(conn, df, table_name, spec):
+    """Create the partitions df needs; returns (partition suffix per row, names available) or None if unpartitioned."""
+    partitioned, names = existing_partitions(conn, table_name)
+    if not partitioned:
+        logging.warning("Table '%s' exists but is not partitioned; loading it unpartitioned.", table_name)
+        return None
+    keys, bounds = partition_keys(df[spec["column"]], spec)
+    for suffix, bound in bounds.items():
+        name = f"{table_name}_{suffix}"
+        if name not in names and create_partition(conn, table_name, name, bound):
+            names.add(name)
+    return keys, names
+
+
+def route_partitions(conn, df, table_name, spec):
+    """Split df by partition, creating missing partitions; yields (table to write into, rows).
+
+    Rows go straight into their partition, so each write touches only that
+    partition. Rows without a partition (null key, refused partition, or a
+    target that is not partitioned) are written through the parent table.
+    """
+    ensured = ensure_partitions(conn, df, table_name, spec)
+    if ensured is None:
+        yield table_name, df
+        return
+
+    keys, names = ensured
+    unrouted = keys.isna().to_numpy()
+    for suffix, positions in df.groupby(keys.to_numpy(), sort=True).indices.items():
+        name = f"{table_name}_{suffix}"
+        if name not in names:
+            unrouted[positions] = True
+            continue
+        yield name, df.iloc[positions]
+    if unrouted.any():
+        yield table_name, df[unrouted]
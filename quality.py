@@ -0,0 +1,159 @@
+import os
+import re
+import time
+import logging
+import numpy as np
+import pandas as pd
+from dedup import hash_rows, filter_new_rows
+from output_format import read_output
+
+REASON_COLUMN = "_rejected_reasons"
+QUARANTINE_FOLDER = "./data/quarantine"
+DEFAULT_QUARANTINE_PATH = os.path.join(QUARANTINE_FOLDER, "rejected.csv")
+CHECKS = ("not_null", "range", "regex", "enum", "unique", "lookup")
+
+
+# ---------- RULES ----------
+class Rule:
+    """One declarative check from the YAML ``rules`` list, compiled once and applied per chunk.
+
+    ``mask(df)`` returns a NumPy bool array marking the rows that fail. Nulls only
+    fail ``not_null``; every other check lets them through.
+    """
+
+    def __init__(self, spec):
+        self.check = spec.get("check")
+        if self.check not in CHECKS:
+            raise ValueError(f"Unknown rule check: {self.check}")
+        self.columns = spec.get("columns") or [spec["column"]]
+        self.column = self.columns[0]
+        self.name = spec.get("name") or f"{self.check}({', '.join(self.columns)})"
+        self.spec = spec
+
+        if self.check == "regex":
+            self.pattern = re.compile(spec["pattern"])
+        elif self.check == "enum":
+            self.values = pd.Index(spec["values"])
+        elif self.check == "lookup":
+            if "values" in spec:
+                self.values = pd.Index(spec["values"])
+            else:
+                key = spec.get("key", self.column)
+                self.values = pd.Index(read_output(spec["file"])[key].dropna().unique())
+        elif self.check == "unique":
+            # Fingerprints already seen in earlier chunks of the same run
+            self.seen = set()
+
+    def mask(self, df):
+        if self.check == "not_null":
+            return df[self.columns].isna().any(axis=1).to_numpy()
+
+        series = df[self.column]
+        present = series.notna().to_numpy()
+
+        if self.check == "range":
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                values, convert = series, pd.Timestamp
+            else:
+                values, convert = pd.to_numeric(series, errors="coerce"), float
+            failed = np.zeros(len(series), dtype=bool)
+            if self.spec.get("min") is not None:
+                failed |= (values < convert(self.spec["min"])).fillna(False).to_numpy(dtype=bool)
+            if self.spec.get("max") is not None:
+                failed |= (values > convert(self.spec["max"])).fillna(False).to_numpy(dtype=bool)
+            # Values that are not numbers at all fail a numeric range too
+            return failed | (present & values.isna().to_numpy())
+
+        if self.check == "regex":
+            matched = series.astype("string").str.fullmatch(self.pattern).fillna(True)
+            return ~matched.to_numpy(dtype=bool)
+
+        if self.check in ("enum", "lookup"):
+            return present & ~series.isin(self.values).to_numpy()
+
+        # unique: duplicates within the chunk and of rows seen in earlier chunks
+        hashes = hash_rows(df[self.columns])
+        failed = pd.Series(hashes).duplicated().to_numpy() | ~filter_new_rows(hashes, self.seen)
+        self.seen.update(hashes[~failed].tolist())
+        return failed
+
+
+class RuleSet:
+    """Evaluates all rules over a chunk and splits it into passing and quarantined rows."""
+
+    def __init__(self, specs):
+        self.rules = [Rule(spec) for spec in specs or []]
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def evaluate(self, df):
+        """Return (valid rows, rejected rows with a reasons column, stats).
+
+        ``stats`` has the failure count per rule and the evaluation time in seconds.
+        """
+        start = time.perf_counter()
+        masks = [rule.mask(df) for rule in self.rules]
+        failed = np.logical_or.reduce(masks) if masks else np.zeros(len(df), dtype=bool)
+
+        rejected = df[failed].copy()
+        if failed.any():
+            # Reasons are only built for the (usually few) failing rows
+            reasons = pd.Series("", index=rejected.index, dtype=object)
+            for rule, mask in zip(self.rules, masks):
+                hit = mask[failed]
+                if hit.any():
+                    reasons[hit] = reasons[hit] + rule.name + "; "
+            rejected[REASON_COLUMN] = reasons.str[:-2]
+
+        stats = {
+            "rows": len(df),
+            "rejected": int(failed.sum()),
+            "rules": {rule.name: int(mask.sum()) for rule, mask in zip(self.rules, masks)},
+            "seconds": time.perf_counter() - start,
+        }
+        logging.info("Rules checked %s rows in %.3fs, %s quarantined: %s",
+                     stats['rows'], stats['seconds'], stats['rejected'], stats['rules'],
+                     extra={"rows": stats['rows'], "duration": round(stats['seconds'], 3)})
+        return df[~failed], rejected, stats
+
+
+# ---------- QUARANTINE ----------
+def quarantine_path_for(config):
+    """The YAML's ``quarantine_path``, else one quarantine file per target table."""
+    if config.get("quarantine_path"):
+        return config["quarantine_path"]
+    table_name = config.get("target", {}).get("table", "raw_data")
+    return os.path.join(QUARANTINE_FOLDER, f"{table_name}_rejected.csv")
+
+
+def append_quarantine(rejected, path=DEFAULT_QUARANTINE_PATH, seen=None):
+    """Append rejected rows (with their reasons) to the quarantine CSV.
+
+    Rows are written under the file's existing header; when they bring new
+    columns the file is rewritten once with the union of both column sets. With
+    a ``seen`` dedup store, rows already quarantined by an earlier run are skipped.
+    """
+    if seen is not None:
+        hashes = hash_rows(rejected)
+        is_new = seen.filter_new(hashes)
+        rejected, hashes = rejected[is_new], hashes[is_new]
+        if rejected.empty:
+            return
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    header = pd.read_csv(path, nrows=0).columns.tolist() if os.path.exists(path) else None
+    if header is None:
+        rejected.to_csv(path, index=False)
+    elif set(rejected.columns) <= set(header):
+        rejected.reindex(columns=header).to_csv(path, mode="a", index=False, header=False)
+    else:
+        columns = [col for col in dict.fromkeys(header + list(rejected.columns)) if col != REASON_COLUMN]
+        existing = pd.read_csv(path, dtype=str, keep_default_na=False)
+        combined = pd.concat([existing, rejected], ignore_index=True).reindex(columns=columns + [REASON_COLUMN])
+        tmp_path = f"{path}.tmp"
+        combined.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    if seen is not None:
+        seen.add(hashes)
+    logging.info("%s rejected rows appended to %s", len(rejected), path)
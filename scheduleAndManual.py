@@ -1,94 +1,178 @@
-import logger
-import os
 import threading
+import contextvars
 import time
-import hashlib
-import pandas as pd
 from datetime import datetime
 import sys
 
-from extract import run_extraction, read_yaml_config
-from loader import load_csv_to_postgres
-from config_manager import upload_if_new_config
-from logger import logger
+from extract import run_extraction, iter_extraction, read_yaml_config, commit_manifests
+from loader import load_dataframe_to_postgres, load_chunks_to_postgres
+from dedup import hash_rows, get_dedup_store
+from transform import run_sql_transforms
+from file_watch import ChangeCollector, start_watch
+from config_manager import init_db, upload_if_new_config
+from logger import logger, setup_logging
 
 # Set config and output file paths
 CONFIG_PATH = sys.argv[1] if len(sys.argv) > 1 else "./uploaded_configs/SFTP.yaml"
 CSV_PATH = "./data/output_files/sftp_final1.csv"
 
-# Store inserted row hashes to avoid duplication
-inserted_hashes = set()
-
 # Flag to signal stopping of background job
 stop_flag = threading.Event()
 
 
-# Generate a unique hash for each row (used for deduplication)
-def hash_row(row):
-    return hashlib.sha256(str(row.values).encode()).hexdigest()
+# Run `transforms` with `pushdown: true` inside PostgreSQL over the freshly loaded table
+def push_down_transforms(config, target_config, table_name):
+    transforms = config.get("transforms") or {}
+    if transforms.get("pushdown") and transforms.get("steps"):
+        run_sql_transforms(target_config, transforms, table_name)
+
+
+# Stream chunks from extraction through dedup straight into the loader (streaming: true)
+def stream_extract_and_load(config, source_types=None, changed_files=None):
+    target_config = config.get("target", {})
+    table_name = target_config.get("table", "raw_data")
+    if target_config.get("type") != "postgres":
+        logger.error("Invalid DB config.")
+        return
+
+    dedup_store = get_dedup_store(config)
+
+    def new_chunks():
+        for chunk in iter_extraction(config, skip_api=True, source_types=source_types,
+                                     changed_files=changed_files):
+            hashes = hash_rows(chunk)
+            is_new = dedup_store.filter_new(hashes)
+            if is_new.any():
+                yield chunk[is_new]
+                # The loader only asks for the next chunk once this one is committed
+                dedup_store.add(hashes[is_new])
+
+    loaded = load_chunks_to_postgres(new_chunks(), target_config, table_name)
+    if loaded:
+        logger.info("Loaded %s new rows to DB.", loaded, extra={"table": table_name, "rows": loaded})
+        push_down_transforms(config, target_config, table_name)
+    else:
+        logger.info("No new rows to load.")
 
 
 # Extract data, filter new rows, and load to DB
-def extract_and_load(config):
-    run_extraction(config=config, output_csv_path=CSV_PATH, skip_api=True)
-    df = pd.read_csv(CSV_PATH)
+def extract_and_load(config, source_types=None, changed_files=None):
+    if config.get("streaming"):
+        return stream_extract_and_load(config, source_types, changed_files)
+
+    # Manifests staged by this run only; if the load below raises they are dropped with it
+    manifests = {}
+    df = run_extraction(config=config, output_csv_path=config.get("output_path", CSV_PATH), skip_api=True,
+                        source_types=source_types, changed_files=changed_files, manifests=manifests)
+    if df is None:
+        return
+    if df.empty:
+        commit_manifests(manifests)
+        logger.info("No new rows to load.")
+        return
 
-    # Filter only new rows not already inserted
-    new_rows = df[~df.apply(lambda row: hash_row(row) in inserted_hashes, axis=1)]
+    # Filter only new rows not already inserted for this target table
+    dedup_store = get_dedup_store(config)
+    hashes = hash_rows(df)
+    is_new = dedup_store.filter_new(hashes)
+    new_rows = df[is_new]
 
     if not new_rows.empty:
-        for _, row in new_rows.iterrows():
-            inserted_hashes.add(hash_row(row))  # Add new hashes to memory
-
         target_config = config.get("target", {})
         table_name = target_config.get("table", "raw_data")
 
         # Load new data into the database
         if target_config.get("type") == "postgres":
-            temp_csv_path = "./data/output_files/temp_upload.csv"
-            new_rows.to_csv(temp_csv_path, index=False)
-            load_csv_to_postgres(temp_csv_path, target_config, table_name)
-            os.remove(temp_csv_path)
-            logger.info(f"Loaded {len(new_rows)} new rows to DB.")
+            load_dataframe_to_postgres(new_rows, target_config, table_name)
+            dedup_store.add(hashes[is_new])  # Remember hashes only once the load succeeded
+            commit_manifests(manifests)  # Incremental sources move past these rows only after the load
+            logger.info("Loaded %s new rows to DB.", len(new_rows),
+                        extra={"table": table_name, "rows": len(new_rows)})
+            push_down_transforms(config, target_config, table_name)
         else:
             logger.error("Invalid DB config.")
     else:
+        commit_manifests(manifests)
         logger.info("No new rows to load.")
 
 
-# Background thread function that checks for new data every 60 seconds
-def background_watcher(config):
-    logger.info("Started background watcher. Checking for updates every 60 seconds.")
-    while not stop_flag.is_set():
-        try:
-            extract_and_load(config)
-        except Exception as e:
-            logger.error(f"Watcher failed: {e}")
-        time.sleep(60)
+# Run one extract-and-load pass without letting a failure kill the watcher
+def safe_extract_and_load(config, source_types=None, changed_files=None):
+    try:
+        extract_and_load(config, source_types, changed_files)
+    except Exception as e:
+        logger.error("Watcher failed: %s", e)
+
+
+# One extract-and-load pass for a scheduled run (see scheduler.py); no watcher is started
+def run_once(config_path, stop_event=stop_flag):
+    config = read_yaml_config(config_path)
+    if not stop_event.is_set():
+        extract_and_load(config)
+
+
+# Event-driven loop: local file changes trigger extraction of just those files,
+# remote (sftp/api) sources keep being polled every `interval` seconds
+def event_watcher(config, collector, interval, debounce, stop_event=stop_flag):
+    remote_types = {s.get("type") for s in config.get("sources", []) if s.get("type") != "local"}
+    next_poll = time.monotonic() + interval
+    logger.info("Started event-driven watcher (debounce %ss, remote poll every %ss).", debounce, interval)
+    while not stop_event.is_set():
+        timeout = min(max(next_poll - time.monotonic(), 0), 1.0)
+        if collector.wait(timeout):
+            changed = collector.drain(debounce, stop_event)
+            logger.info("File changes detected: %s", changed)
+            safe_extract_and_load(config, source_types={"local"}, changed_files=changed)
+        if time.monotonic() >= next_poll:
+            if remote_types:
+                safe_extract_and_load(config, source_types=remote_types)
+            next_poll = time.monotonic() + interval
+
+
+# Background thread function that checks for new data (polling every `interval` seconds or on file events)
+def background_watcher(config, stop_event=stop_flag):
+    watch_config = config.get("watch", {}) or {}
+    interval = watch_config.get("interval", 60)
+
+    if watch_config.get("mode") == "events":
+        local_paths = [s.get("path") for s in config.get("sources", []) if s.get("type") == "local"]
+        collector = ChangeCollector()
+        watcher = start_watch(local_paths, collector)
+        if watcher is not None:
+            try:
+                event_watcher(config, collector, interval, watch_config.get("debounce", 2), stop_event)
+            finally:
+                watcher.stop()
+            return
+
+    logger.info("Started background watcher. Checking for updates every %s seconds.", interval)
+    while not stop_event.is_set():
+        safe_extract_and_load(config)
+        stop_event.wait(interval)
 
 
 #Thread for manual stop by entering 'g'
-def wait_for_manual_stop():
+def wait_for_manual_stop(stop_event=stop_flag):
     logger.info("Press 'g' then Enter to gracefully stop the job.")
-    while not stop_flag.is_set():
+    while not stop_event.is_set():
         user_input = input().strip().lower()
         if user_input == 'g':
             logger.info("Graceful shutdown signal received.")
-            stop_flag.set()
+            stop_event.set()
             return True
 
 
-# Main function
-def main():
-    logger.info("Reading config from: %s", CONFIG_PATH)
-    config = read_yaml_config(CONFIG_PATH)
+# Main function; runs until end_time or until stop_event is set (by 'g', or by the API's job runner)
+def main(config_path=CONFIG_PATH, stop_event=stop_flag, interactive=False):
+    logger.info("Reading config from: %s", config_path)
+    config = read_yaml_config(config_path)
 
     # Store config in DB if it's new
     try:
-        upload_status = upload_if_new_config(CONFIG_PATH)
+        upload_status = upload_if_new_config(config_path)
         logger.info(upload_status)
     except Exception as e:
-        logger.warning(f"Could not upload YAML config: {e}")
+        logger.warning("Could not upload YAML config: %s", e)
 
     # Handle start time (delay start until configured time)
     start_time_str = config.get("start_time")
@@ -97,28 +181,33 @@ def main():
     if start_time_str:
         start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M")
         while datetime.now() < start_time:
-            logger.info(f"Waiting for start time: {start_time}")
-            time.sleep(10)
+            logger.info("Waiting for start time: %s", start_time)
+            if stop_event.wait(10):
+                logger.info("ELT job cancelled before its start time.")
+                return
 
     logger.info("Starting ELT job...")
     extract_and_load(config)
 
-    # Start background thread for continuous checking
-    watcher_thread = threading.Thread(target=background_watcher, args=(config,))
+    # Start background thread for continuous checking; it runs in a copy of this thread's
+    # log context, so its records keep the job id and table set by the job runner
+    watcher_thread = threading.Thread(target=contextvars.copy_context().run,
+                                      args=(background_watcher, config, stop_event))
     watcher_thread.start()
 
     # Optional thread for manual 'g' input
-    if sys.stdin.isatty():
-        input_thread = threading.Thread(target=wait_for_manual_stop)
+    if interactive and sys.stdin.isatty():
+        input_thread = threading.Thread(target=contextvars.copy_context().run,
+                                        args=(wait_for_manual_stop, stop_event), daemon=True)
         input_thread.start()
 
     # If end_time specified, auto-stop job
     if end_time_str:
         end_time = datetime.strptime(end_time_str, "%Y-%m-%d %H:%M")
-        while datetime.now() < end_time and not stop_flag.is_set():
-            time.sleep(5)
-        logger.info(f"End time {end_time} reached. Stopping job...")
-        stop_flag.set()
+        while datetime.now() < end_time and not stop_event.is_set():
+            stop_event.wait(5)
+        logger.info("End time %s reached. Stopping job...", end_time)
+        stop_event.set()
 
     watcher_thread.join()
     logger.info("ELT job completed and stopped.")
@@ -126,4 +215,6 @@ def main():
 
 # Entry point
 if __name__ == "__main__":
-    main()
+    setup_logging()
+    init_db()
+    main(interactive=True)
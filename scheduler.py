@@ -0,0 +1,366 @@
+import os
+import socket
+import logging
+import calendar
+import functools
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy import (Table, Column, Integer, String, Boolean, DateTime, MetaData, Index, select, update, or_)
+from db import DEFAULT_DB_URL, get_engine
+from jobs import JobRunner, FINISHED
+from config_service import load_config, read_config_file
+from scheduleAndManual import run_once
+from logger import setup_logging
+
+DEFAULT_POLL_SECONDS = 10
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MISFIRE_GRACE_SECONDS = 60
+MAX_CATCH_UP_RUNS = 100
+MISFIRE_POLICIES = ("run_once", "run_all", "skip")
+
+
+# ---------- CRON EXPRESSIONS ----------
+# Standard 5 fields: minute hour day-of-month month day-of-week, each a list of
+# values, ranges and steps (*/15, 1-5, MON-FRI, 0,30). Day of week 0 and 7 are Sunday.
+ALIASES = {"@yearly": "0 0 1 1 *", "@annually": "0 0 1 1 *", "@monthly": "0 0 1 * *",
+           "@weekly": "0 0 * * 0", "@daily": "0 0 * * *", "@midnight": "0 0 * * *", "@hourly": "0 * * * *"}
+MONTH_NAMES = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {name.lower(): (i + 1) % 7 for i, name in enumerate(calendar.day_abbr)}
+FIELDS = ((0, 59, {}), (0, 23, {}), (1, 31, {}), (1, 12, MONTH_NAMES), (0, 7, DAY_NAMES))
+
+
+def parse_field(text, low, high, names):
+    values = set()
+    for part in text.lower().split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        else:
+            start, _, end = part.partition("-")
+            start = int(names.get(start, start))
+            end = int(names.get(end, end)) if end else (high if step else start)
+        step = int(step) if step else 1
+        if not (low <= start <= high and low <= end <= high) or step < 1 or start > end:
+            raise ValueError(f"Invalid cron field: {text}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """Parsed cron expression; ``next_after(dt)`` returns the first matching minute after dt."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = ALIASES.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            parse_field(text, low, high, names) for text, (low, high, names) in zip(fields, FIELDS))
+        self.weekdays = {day % 7 for day in weekdays}
+        # As in cron: when both day fields are restricted, a day matching either one runs
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches_day(self, day):
+        in_month = day.day in self.days
+        in_week = (day.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next_after(self, after):
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self.matches_day(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                later = min((m for m in self.minutes if m > t.minute), default=None)
+                t = t.replace(minute=later) if later is not None else t.replace(minute=0) + timedelta(hours=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+
+def next_run(schedule, after):
+    """First run time of schedule strictly after ``after``."""
+    if schedule.cron:
+        return CronExpression(schedule.cron).next_after(after)
+    interval = timedelta(seconds=schedule.interval_seconds)
+    anchor = schedule.next_run_at or schedule.start_at or after
+    if anchor > after:
+        return anchor
+    return anchor + interval * ((after - anchor) // interval + 1)
+
+
+def missed_runs(schedule, now):
+    """Run times from the due next_run_at up to now, oldest first; only the latest MAX_CATCH_UP_RUNS are kept."""
+    if not schedule.cron:
+        interval = timedelta(seconds=schedule.interval_seconds)
+        count = (now - schedule.next_run_at) // interval + 1
+        first = max(0, count - MAX_CATCH_UP_RUNS)
+        return [schedule.next_run_at + interval * i for i in range(first, count)]
+    cron = CronExpression(schedule.cron)
+    runs = deque([schedule.next_run_at], maxlen=MAX_CATCH_UP_RUNS)
+    while True:
+        following = cron.next_after(runs[-1])
+        if following > now:
+            return list(runs)
+        runs.append(following)
+
+
+# ---------- SCHEDULE STORE ----------
+metadata = MetaData()
+
+schedules = Table('elt_schedules', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), unique=True, nullable=False),
+    Column('config_id', Integer),          # config_history id
+    Column('config_path', String(500)),    # or a YAML file path
+    Column('cron', String(100)),
+    Column('interval_seconds', Integer),
+    Column('misfire_policy', String(20), nullable=False, default='run_once'),
+    Column('misfire_grace_seconds', Integer, nullable=False, default=DEFAULT_MISFIRE_GRACE_SECONDS),
+    Column('enabled', Boolean, nullable=False, default=True),
+    Column('start_at', DateTime),
+    Column('end_at', DateTime),
+    Column('next_run_at', DateTime),
+    Column('last_run_at', DateTime),
+    Column('last_job_id', String(32)),
+    Column('lease_owner', String(200)),
+    Column('lease_until', DateTime),
+    Index('ix_elt_schedules_due', 'enabled', 'next_run_at'),
+)
+
+
+class ScheduleStore:
+    """Schedules persisted in PostgreSQL or SQLite (any SQLAlchemy URL), so they survive restarts."""
+
+    def __init__(self, url=DEFAULT_DB_URL):
+        if str(url).startswith("sqlite:///"):
+            directory = os.path.dirname(str(url)[len("sqlite:///"):])
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.engine = get_engine(url)
+        metadata.create_all(self.engine)
+
+    def add(self, name, config_id=None, config_path=None, cron=None, interval_seconds=None,
+            misfire_policy="run_once", misfire_grace_seconds=DEFAULT_MISFIRE_GRACE_SECONDS,
+            start_at=None, end_at=None, now=None):
+        if bool(cron) == bool(interval_seconds):
+            raise ValueError("A schedule needs exactly one of 'cron' or 'interval_seconds'")
+        if bool(config_id) == bool(config_path):
+            raise ValueError("A schedule needs exactly one of 'config_id' or 'config_path'")
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy: {misfire_policy}")
+        if cron:
+            CronExpression(cron)  # validate before storing
+        values = dict(name=name, config_id=config_id, config_path=config_path, cron=cron,
+                      interval_seconds=interval_seconds, misfire_policy=misfire_policy,
+                      misfire_grace_seconds=misfire_grace_seconds, start_at=start_at, end_at=end_at, enabled=True)
+        now = now or datetime.now()
+        if interval_seconds:
+            values["next_run_at"] = max(start_at, now) if start_at else now
+        else:
+            # A start_at that itself matches the expression is the first run
+            after = start_at - timedelta(minutes=1) if start_at and start_at > now else now
+            values["next_run_at"] = CronExpression(cron).next_after(after)
+        with self.engine.begin() as conn:
+            return conn.execute(schedules.insert().values(**values)).inserted_primary_key[0]
+
+    def get(self, schedule_id):
+        with self.engine.connect() as conn:
+            row = conn.execute(schedules.select().where(schedules.c.id == schedule_id)).fetchone()
+        return ScheduleRow.from_row(row) if row else None
+
+    def list(self):
+        with self.engine.connect() as conn:
+            return [ScheduleRow.from_row(row) for row in conn.execute(schedules.select().order_by(schedules.c.id))]
+
+    def remove(self, schedule_id):
+        with self.engine.begin() as conn:
+            return conn.execute(schedules.delete().where(schedules.c.id == schedule_id)).rowcount > 0
+
+    def due(self, now):
+        with self.engine.connect() as conn:
+            rows = conn.execute(schedules.select().where(
+                schedules.c.enabled.is_(True), schedules.c.next_run_at <= now,
+                or_(schedules.c.lease_until.is_(None), schedules.c.lease_until < now),
+            ).order_by(schedules.c.next_run_at))
+            return [ScheduleRow.from_row(row) for row in rows]
+
+    def next_due_at(self, now=None):
+        """Earliest next_run_at of an enabled schedule that no scheduler holds a live lease on."""
+        now = now or datetime.now()
+        with self.engine.connect() as conn:
+            return conn.execute(select(schedules.c.next_run_at).where(
+                schedules.c.enabled.is_(True),
+                or_(schedules.c.lease_until.is_(None), schedules.c.lease_until < now),
+            ).order_by(schedules.c.next_run_at).limit(1)).scalar()
+
+    def claim(self, schedule, now, next_run_at, owner, lease_until):
+        """Advance schedule past ``now`` if no other scheduler got there first; True if this one won.
+
+        The update only matches while next_run_at still holds the value read and
+        no live lease exists, so of several schedulers polling the same store
+        exactly one claims each due run. ``lease_until`` (None when nothing is
+        run) keeps the schedule owned by this scheduler while its jobs run.
+        """
+        enabled = schedule.end_at is None or next_run_at <= schedule.end_at
+        with self.engine.begin() as conn:
+            result = conn.execute(update(schedules).where(
+                schedules.c.id == schedule.id,
+                schedules.c.next_run_at == schedule.next_run_at,
+                or_(schedules.c.lease_until.is_(None), schedules.c.lease_until < now),
+            ).values(next_run_at=next_run_at, enabled=enabled, last_run_at=now if lease_until else schedule.last_run_at,
+                     lease_owner=owner if lease_until else None, lease_until=lease_until))
+        return result.rowcount == 1
+
+    def record_job(self, schedule_id, job_id):
+        with self.engine.begin() as conn:
+            conn.execute(update(schedules).where(schedules.c.id == schedule_id).values(last_job_id=job_id))
+
+    def renew(self, schedule_id, owner, lease_until):
+        with self.engine.begin() as conn:
+            conn.execute(update(schedules).where(schedules.c.id == schedule_id, schedules.c.lease_owner == owner)
+                         .values(lease_until=lease_until))
+
+    def release(self, schedule_id, owner):
+        with self.engine.begin() as conn:
+            conn.execute(update(schedules).where(schedules.c.id == schedule_id, schedules.c.lease_owner == owner)
+                         .values(lease_owner=None, lease_until=None))
+
+
+class ScheduleRow:
+    """Plain snapshot of one schedules row."""
+
+    FIELDS = tuple(column.name for column in schedules.columns)
+
+    def __init__(self, **values):
+        for field in self.FIELDS:
+            setattr(self, field, values.get(field))
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(**row._mapping)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+# ---------- DISPATCH ----------
+def elt_job(schedule):
+    """(job function, target table) running one extract-and-load pass of the schedule's config."""
+    if schedule.config_id:
+        config, path = load_config(schedule.config_id)
+    else:
+        path = schedule.config_path
+        config = read_config_file(path)
+    table = (config.get("target") or {}).get("table", "raw_data")
+    return functools.partial(run_once, path), table
+
+
+class Scheduler:
+    """One loop that dispatches every due schedule to a JobRunner, without a thread per schedule.
+
+    Runs missed while no scheduler was up are handled by the schedule's
+    misfire policy once it is late by more than ``misfire_grace_seconds``:
+    ``run_once`` runs a single catch-up, ``run_all`` runs every missed time
+    (up to MAX_CATCH_UP_RUNS) and ``skip`` waits for the next time.
+    """
+
+    def __init__(self, store, runner=None, owner=None, poll_seconds=DEFAULT_POLL_SECONDS,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, make_job=elt_job):
+        self.store = store
+        self.runner = runner or JobRunner()
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.make_job = make_job
+        self.running = {}  # schedule id -> job ids still running under this scheduler's lease
+
+    def runs_for(self, schedule, now):
+        late = (now - schedule.next_run_at).total_seconds()
+        if late <= schedule.misfire_grace_seconds:
+            return [schedule.next_run_at]
+        missed = missed_runs(schedule, now)
+        logging.warning("Schedule '%s' missed %s run(s) since %s; policy %s",
+                        schedule.name, len(missed), schedule.next_run_at, schedule.misfire_policy)
+        if schedule.misfire_policy == "skip":
+            return []
+        if schedule.misfire_policy == "run_all":
+            return missed
+        return missed[-1:]
+
+    def tick(self, now=None):
+        """Renew or release leases of finished jobs, then dispatch due schedules; returns new job ids."""
+        now = now or datetime.now()
+        lease_until = now + timedelta(seconds=self.lease_seconds)
+        for schedule_id, job_ids in list(self.running.items()):
+            job_ids[:] = [job_id for job_id in job_ids
+                          if (self.runner.get(job_id) or {}).get("state") not in FINISHED]
+            if job_ids:
+                self.store.renew(schedule_id, self.owner, lease_until)
+            else:
+                self.store.release(schedule_id, self.owner)
+                del self.running[schedule_id]
+
+        dispatched = []
+        for schedule in self.store.due(now):
+            runs = self.runs_for(schedule, now)
+            following = next_run(schedule, now)
+            if not self.store.claim(schedule, now, following, self.owner, lease_until if runs else None):
+                continue  # another scheduler claimed it
+            if not runs:
+                continue
+            try:
+                fn, table = self.make_job(schedule)
+            except Exception as e:
+                logging.error("Schedule '%s' could not start: %s", schedule.name, e)
+                self.store.release(schedule.id, self.owner)
+                continue
+            jobs = [self.runner.submit(fn, table, name=f"{schedule.name}@{run:%Y-%m-%d %H:%M}") for run in runs]
+            self.running[schedule.id] = [job.id for job in jobs]
+            self.store.record_job(schedule.id, jobs[-1].id)
+            dispatched.extend(job.id for job in jobs)
+            logging.info("Schedule '%s' dispatched %s job(s); next run %s", schedule.name, len(jobs), following)
+        return dispatched
+
+    def run(self, stop_event):
+        logging.info("Scheduler %s started (poll every %ss).", self.owner, self.poll_seconds)
+        while not stop_event.is_set():
+            try:
+                self.tick()
+                # Leased schedules are left out: while their job runs they are not claimable,
+                # and a finished job is noticed at the next poll
+                next_due = self.store.next_due_at()
+            except Exception as e:
+                logging.error("Scheduler tick failed: %s", e)
+                next_due = None
+            wait = self.poll_seconds
+            if next_due is not None:
+                wait = min(wait, max((next_due - datetime.now()).total_seconds(), 0.1))
+            stop_event.wait(wait)
+        for schedule_id in list(self.running):
+            self.store.release(schedule_id, self.owner)
+        logging.info("Scheduler %s stopped.", self.owner)
+
+    def start(self, stop_event):
+        thread = threading.Thread(target=self.run, args=(stop_event,), name="elt-scheduler", daemon=True)
+        thread.start()
+        return thread
+
+
+# ---------- ENTRY POINT ----------
+if __name__ == "__main__":
+    setup_logging()
+    stop = threading.Event()
+    try:
+        Scheduler(ScheduleStore()).run(stop)
+    except KeyboardInterrupt:
+        stop.set()
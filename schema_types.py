@@ -0,0 +1,163 @@
+import logging
+import pandas as pd
+
+# ---------- DTYPE SPECS ----------
+# A schema column is either a dtype name ("int64", "category", ...) or a dict
+# such as {"type": "datetime", "format": "%Y-%m-%d", "utc": true}
+INTEGER_TYPES = {"int", "integer", "int8", "int16", "int32", "int64", "Int8", "Int16", "Int32", "Int64"}
+FLOAT_TYPES = {"float", "double", "float32", "float64"}
+STRING_TYPES = {"str", "object", "text", "string"}
+BOOLEAN_TYPES = {"bool", "boolean"}
+DATETIME_TYPES = {"date", "datetime", "datetime64", "datetime64[ns]", "timestamp"}
+BOOLEAN_VALUES = {"true": True, "t": True, "yes": True, "y": True, "1": True,
+                  "false": False, "f": False, "no": False, "n": False, "0": False}
+MAX_ERROR_EXAMPLES = 3
+
+
+def parse_spec(spec):
+    """Return (kind, target dtype name, options) for a schema column spec."""
+    options = dict(spec) if isinstance(spec, dict) else {}
+    name = str(options.pop("type", spec if not isinstance(spec, dict) else "object"))
+    if name in INTEGER_TYPES:
+        if name in ("int", "integer"):
+            name = "int64"
+        return "integer", name, options
+    if name in FLOAT_TYPES:
+        return "float", {"float": "float64", "double": "float64"}.get(name, name), options
+    if name in STRING_TYPES:
+        return "string", "string" if name == "string" else "object", options
+    if name == "category":
+        return "category", "category", options
+    if name in BOOLEAN_TYPES:
+        return "boolean", "boolean", options
+    if name in DATETIME_TYPES:
+        return "datetime", "date" if name == "date" else "datetime64[ns]", options
+    raise ValueError(f"Unknown schema dtype: {name}")
+
+
+def schema_columns(schema):
+    columns = schema.get("columns", schema) if schema else None
+    return columns if isinstance(columns, dict) else None
+
+
+# ---------- READER OPTIONS ----------
+def reader_options(schema, strict_mode=False):
+    """Build the dtype/usecols hints the CSV readers use to parse straight into schema types.
+
+    ``dtype`` holds the compact target types (nullable ints, floats, category,
+    string); ``safe_dtype`` only the types no value can fail to parse into, used
+    for the re-read after a typed parse hits a bad value. Dates are left to
+    ``coerce_columns``. Plain dicts, so they can be sent to process pool workers.
+    """
+    columns = schema_columns(schema)
+    if not columns:
+        return None
+    dtype, safe_dtype = {}, {}
+    for col, spec in columns.items():
+        kind, target, _ = parse_spec(spec)
+        if kind == "integer":
+            # Nullable while parsing; empty cells become <NA> instead of failing the file
+            dtype[col] = target[0].upper() + target[1:]
+        elif kind == "float":
+            dtype[col] = target
+        elif kind in ("string", "category"):
+            dtype[col] = safe_dtype[col] = target if target != "object" else str
+    return {"dtype": dtype, "safe_dtype": safe_dtype, "columns": [col.lower() for col in columns],
+            "strict": strict_mode}
+
+
+def rewind(source):
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def read_csv_typed(source, options=None, **kwargs):
+    """pd.read_csv with schema reader options, matched to the file's header case-insensitively.
+
+    A typed parse that hits an unparseable value is retried with ``safe_dtype``
+    so ``coerce_columns`` can null and report the bad cells. Chunked reads use
+    the safe types directly since a chunk cannot be re-read.
+    """
+    if not options:
+        return pd.read_csv(source, **kwargs)
+    header = kwargs.get("names")
+    if header is None:
+        header = list(pd.read_csv(source, nrows=0, delimiter=kwargs.get("delimiter", ",")).columns)
+        rewind(source)
+    lookup = {str(col).lower(): col for col in header}
+    usecols = [col for col in header if str(col).lower() in options["columns"]] if options["strict"] else None
+
+    def dtypes(key):
+        return {lookup[col.lower()]: dtype for col, dtype in options[key].items() if col.lower() in lookup}
+
+    if kwargs.get("chunksize"):
+        return pd.read_csv(source, usecols=usecols, dtype=dtypes("safe_dtype"), **kwargs)
+    try:
+        return pd.read_csv(source, usecols=usecols, dtype=dtypes("dtype"), **kwargs)
+    except (ValueError, TypeError) as e:
+        logging.info("Typed parse failed (%s); re-reading for per-value coercion", e)
+        rewind(source)
+        return pd.read_csv(source, usecols=usecols, dtype=dtypes("safe_dtype"), **kwargs)
+
+
+# ---------- VECTORIZED COERCION ----------
+def coerce_series(series, spec):
+    """Convert series to the spec's dtype; returns (converted series, mask of values that failed)."""
+    kind, target, options = parse_spec(spec)
+    present = series.notna()
+
+    if kind in ("integer", "float"):
+        numbers = series if pd.api.types.is_numeric_dtype(series.dtype) else pd.to_numeric(series, errors="coerce")
+        if pd.api.types.is_bool_dtype(numbers.dtype):
+            numbers = numbers.astype("Int64")
+        failed = present & numbers.isna()
+        if kind == "integer":
+            fractional = numbers.notna() & (numbers % 1 != 0)
+            failed |= fractional.fillna(False).astype(bool)
+            numbers = numbers.mask(failed)
+            nullable = target[0].upper() + target[1:]
+            return numbers.astype(nullable if target[0] == "I" or numbers.isna().any() else target), failed
+        return numbers.astype(target), failed
+
+    no_errors = pd.Series(False, index=series.index)
+    if kind == "string":
+        if target == "string":
+            return series.astype("string"), no_errors
+        if pd.api.types.is_string_dtype(series.dtype):
+            return series, no_errors
+        return series.astype(str).where(present), no_errors
+
+    if kind == "category":
+        return series.astype("category"), no_errors
+
+    if kind == "boolean":
+        if pd.api.types.is_bool_dtype(series.dtype):
+            return series.astype("boolean"), no_errors
+        flags = series.astype("string").str.strip().str.lower().map(BOOLEAN_VALUES)
+        failed = present & flags.isna()
+        return flags.astype("boolean"), failed
+
+    dates = pd.to_datetime(series, errors="coerce", format=options.get("format"), utc=options.get("utc", False))
+    if target == "date":
+        dates = dates.dt.normalize()
+    return dates, present & dates.isna()
+
+
+def coerce_columns(df, columns):
+    """Convert every schema column of df to its dtype; returns (df, error report).
+
+    The report maps each column with unconvertible values to its target dtype,
+    the number of values nulled and a few examples.
+    """
+    report = {}
+    for col, spec in columns.items():
+        if col not in df.columns:
+            continue
+        original = df[col]
+        converted, failed = coerce_series(original, spec)
+        df[col] = converted
+        errors = int(failed.sum())
+        if errors:
+            examples = original[failed].astype(str).unique()[:MAX_ERROR_EXAMPLES].tolist()
+            report[col] = {"dtype": parse_spec(spec)[1], "errors": errors, "examples": examples}
+    return df, report
@@ -0,0 +1,210 @@
+import os
+import json
+import stat
+import queue
+import fnmatch
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import paramiko
+from json_stream import is_json_lines
+from schema_types import read_csv_typed
+
+DEFAULT_SFTP_WORKERS = 4
+DOWNLOAD_BLOCK = 1 << 20
+DEFAULT_LOCAL_DIR = "./data/output_files/sftp"
+
+# ---------- TRANSPORT POOL ----------
+# One authenticated SSH transport per (host, port, username), reused across runs;
+# each worker opens its own SFTP channel on top of it
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def get_transport(host, port, username, password):
+    key = (host, port, username)
+    with _transports_lock:
+        transport = _transports.get(key)
+        if transport is None or not transport.is_active():
+            logging.info("Connecting to SFTP server %s:%s", host, port)
+            transport = paramiko.Transport((host, port))
+            transport.connect(username=username, password=password)
+            _transports[key] = transport
+        return transport
+
+
+def close_transports():
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+
+
+# ---------- LISTING ----------
+def list_remote_files(sftp, remote_path, pattern="*"):
+    """Return sorted (remote file, SFTPAttributes) pairs for files in remote_path matching pattern.
+
+    A remote_path naming a single file is returned as is.
+    """
+    attrs = sftp.stat(remote_path)
+    if not stat.S_ISDIR(attrs.st_mode):
+        return [(remote_path, attrs)]
+    files = [
+        (posixpath.join(remote_path, attr.filename), attr)
+        for attr in sftp.listdir_attr(remote_path)
+        if stat.S_ISREG(attr.st_mode) and fnmatch.fnmatch(attr.filename, pattern)
+    ]
+    return sorted(files, key=lambda item: item[0])
+
+
+def is_unchanged(entry, attrs):
+    return entry is not None and entry.get("size") == attrs.st_size and entry.get("mtime") == attrs.st_mtime
+
+
+# ---------- PARSING ----------
+def parse_file(f, filename, chunk_size=None, read_options=None):
+    """Parse an open (local or remote) file by extension; with chunk_size returns an iterator of frames."""
+    if filename.endswith('.json') or is_json_lines(filename):
+        lines = is_json_lines(filename)
+        if chunk_size and lines:
+            return pd.read_json(f, lines=True, chunksize=chunk_size)
+        df = pd.read_json(f, lines=lines)
+        return iter([df]) if chunk_size else df
+    delimiter = '|' if filename.endswith('.txt') else ','
+    return read_csv_typed(f, read_options, delimiter=delimiter, chunksize=chunk_size)
+
+
+def open_remote(sftp, remote_file, size, offset=0):
+    remote = sftp.open(remote_file, 'rb')
+    remote.seek(offset)
+    # Pipeline the reads instead of one round trip per block
+    remote.prefetch(size)
+    return remote
+
+
+# ---------- RESUMABLE DOWNLOAD ----------
+def download(sftp, remote_file, attrs, local_dir):
+    """Download remote_file into local_dir, resuming a partial download of the same remote version.
+
+    Bytes land in ``<name>.part`` next to a ``.part.json`` recording the remote
+    size and mtime; the part file is renamed into place once complete.
+    """
+    local_path = os.path.join(local_dir, posixpath.basename(remote_file))
+    part_path = f"{local_path}.part"
+    meta_path = f"{part_path}.json"
+    signature = {"size": attrs.st_size, "mtime": attrs.st_mtime}
+
+    offset = 0
+    try:
+        with open(meta_path, 'r') as f:
+            if json.load(f) == signature:
+                offset = os.path.getsize(part_path)
+    except (FileNotFoundError, ValueError):
+        pass
+    if offset > attrs.st_size:
+        offset = 0
+    if offset:
+        logging.info("Resuming %s at byte %s", remote_file, offset)
+    else:
+        with open(meta_path, 'w') as f:
+            json.dump(signature, f)
+
+    with open_remote(sftp, remote_file, attrs.st_size, offset) as remote, \
+            open(part_path, 'ab' if offset else 'wb') as local:
+        while True:
+            block = remote.read(DOWNLOAD_BLOCK)
+            if not block:
+                break
+            local.write(block)
+
+    os.replace(part_path, local_path)
+    os.remove(meta_path)
+    return local_path
+
+
+# ---------- EXTRACTION ----------
+def read_remote_file(sftp, remote_file, attrs, stream, local_dir, read_options=None):
+    if stream:
+        # Parse straight off the wire, no local copy
+        with open_remote(sftp, remote_file, attrs.st_size) as remote:
+            return parse_file(remote, remote_file, read_options=read_options)
+    local_path = download(sftp, remote_file, attrs, local_dir)
+    with open(local_path, 'rb') as f:
+        return parse_file(f, local_path, read_options=read_options)
+
+
+def extract_sftp_files(host, port, username, password, remote_path, pattern="*",
+                       workers=DEFAULT_SFTP_WORKERS, stream=False, local_dir=DEFAULT_LOCAL_DIR, manifest=None,
+                       read_options=None):
+    """Read every file under remote_path matching pattern; returns (DataFrame, updated manifest).
+
+    Files are fetched over ``workers`` SFTP channels sharing one pooled transport.
+    With ``stream`` files are parsed as they are read; otherwise they are downloaded
+    (resumably) into ``local_dir`` first. With a ``manifest`` (remote file ->
+    size/mtime) files whose size and mtime are unchanged are skipped. A file that
+    fails is logged and left out of both the result and the updated manifest.
+    """
+    transport = get_transport(host, port, username, password)
+    manifest = dict(manifest or {})
+
+    sftp = paramiko.SFTPClient.from_transport(transport)
+    try:
+        files = list_remote_files(sftp, remote_path, pattern)
+    finally:
+        sftp.close()
+    logging.info("Found %s files in %s", len(files), remote_path)
+
+    files = [(remote_file, attrs) for remote_file, attrs in files
+             if not is_unchanged(manifest.get(remote_file), attrs)]
+    if not files:
+        return pd.DataFrame(), manifest
+    if not stream:
+        os.makedirs(local_dir, exist_ok=True)
+
+    workers = max(1, min(workers, len(files)))
+    channels = queue.Queue()
+    for _ in range(workers):
+        channels.put(paramiko.SFTPClient.from_transport(transport))
+
+    def fetch(item):
+        remote_file, attrs = item
+        channel = channels.get()
+        try:
+            return read_remote_file(channel, remote_file, attrs, stream, local_dir, read_options), None
+        except Exception as e:
+            return None, e
+        finally:
+            channels.put(channel)
+
+    data_frames = []
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sftp") as pool:
+            for (remote_file, attrs), (df, error) in zip(files, pool.map(fetch, files)):
+                if error is not None:
+                    logging.error("Failed to read %s: %s", remote_file, error)
+                    continue
+                logging.info("Loaded %s with %s records.", remote_file, len(df),
+                             extra={"file": remote_file, "rows": len(df)})
+                data_frames.append(df)
+                manifest[remote_file] = {"size": attrs.st_size, "mtime": attrs.st_mtime, "rows": len(df)}
+    finally:
+        while not channels.empty():
+            channels.get().close()
+
+    if not data_frames:
+        return pd.DataFrame(), manifest
+    return pd.concat(data_frames, ignore_index=True), manifest
+
+
+def iter_sftp_frames(host, port, username, password, remote_path, chunk_size, pattern="*", read_options=None):
+    """Yield frames of at most chunk_size rows from every matching remote file, parsed as read."""
+    transport = get_transport(host, port, username, password)
+    sftp = paramiko.SFTPClient.from_transport(transport)
+    try:
+        for remote_file, attrs in list_remote_files(sftp, remote_path, pattern):
+            with open_remote(sftp, remote_file, attrs.st_size) as remote:
+                yield from parse_file(remote, remote_file, chunk_size, read_options)
+    finally:
+        sftp.close()
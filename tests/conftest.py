@@ -3,6 +3,7 @@ import sys
 import os
 import pytest
 from app import app
+from config_manager import init_db
 
 # Add project root to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -17,6 +18,19 @@ def auth_headers():
 
 
 
+# Content-addressed YAML files go to a per-test folder instead of ./uploaded_configs
+@pytest.fixture(autouse=True)
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("config_service.CONFIG_DIR", str(tmp_path / "uploaded_configs"))
+    return tmp_path / "uploaded_configs"
+
+
+# The config_history table is created and migrated once per session, as the apps do at startup
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    init_db()
+
+
 @pytest.fixture
 def client():
     app.config['TESTING'] = True
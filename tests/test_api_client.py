@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import patch
+from werkzeug.serving import make_server
+from app import app
+from api_client import iter_api_pages, fetch_api, get_session, RateLimiter
+
+
+# Serve the real Flask app on a free local port
+@pytest.fixture
+def api_server():
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api/data"
+    server.shutdown()
+
+
+@pytest.fixture
+def api_folder(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps([{"id": i} for i in range(15)]))
+    (tmp_path / "b.json").write_text(json.dumps([{"id": i} for i in range(15, 25)]))
+    return str(tmp_path)
+
+
+# Page-number pagination fetches every page concurrently, in order
+def test_page_pagination(api_server, api_folder):
+    df = fetch_api(api_server, folder_param=api_folder,
+                   pagination={"type": "page", "page_size": 10}, concurrency=3)
+    assert df["id"].tolist() == list(range(25))
+
+
+# Offset/limit pagination gives the same rows, one DataFrame per page
+def test_offset_pagination(api_server, api_folder):
+    pages = list(iter_api_pages(api_server, folder_param=api_folder,
+                                pagination={"type": "offset", "page_size": 10}))
+    assert [len(page) for page in pages] == [10, 10, 5]
+
+
+# Unchanged responses are skipped via ETag / If-None-Match
+def test_etag_skips_unchanged(api_server, api_folder):
+    assert len(fetch_api(api_server, folder_param=api_folder)) == 25
+    assert fetch_api(api_server, folder_param=api_folder).empty      # 304 Not Modified
+
+    with open(f"{api_folder}/c.json", "w") as f:
+        json.dump([{"id": 99}], f)
+    assert len(fetch_api(api_server, folder_param=api_folder)) == 26  # Changed, fetched again
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, etag=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+
+# A fetch that fails on a later page keeps the old validators, so its retry gets page 1 again
+def test_failed_fetch_does_not_keep_validators():
+    failures = [True]
+
+    def get(url, headers=None, params=None, timeout=None):
+        if params["page"] == 1:
+            if headers.get("If-None-Match") == "p1":
+                return FakeResponse(304)
+            return FakeResponse(200, {"data": [{"id": 1}, {"id": 2}]}, etag="p1")
+        if failures:
+            failures.pop()
+            return FakeResponse(500)
+        return FakeResponse(200, {"data": [{"id": 3}]}, etag="p2")
+
+    pagination = {"type": "page", "page_size": 2}
+    with patch("api_client.get_session") as session:
+        session.return_value.get.side_effect = get
+        with pytest.raises(requests.HTTPError):
+            fetch_api("http://api.test/failing", pagination=pagination, concurrency=1)
+        assert fetch_api("http://api.test/failing", pagination=pagination, concurrency=1)["id"].tolist() == [1, 2, 3]
+        # Completed: now page 1 is answered with 304
+        assert fetch_api("http://api.test/failing", pagination=pagination, concurrency=1)["id"].tolist() == [3]
+
+
+# API sources on different hosts get their own session (and cookie jar)
+def test_sessions_per_base_url():
+    assert get_session("http://a.test/x") is get_session("http://a.test/y")
+    assert get_session("http://a.test/x") is not get_session("http://b.test/x")
+
+
+# Rate limiter spaces requests out
+def test_rate_limiter():
+    limiter = RateLimiter(rate=20)
+    start = time.monotonic()
+    for _ in range(5):
+        limiter.wait()
+    assert time.monotonic() - start >= 0.19
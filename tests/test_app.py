@@ -1,4 +1,8 @@
-from app import allowed_file
+import io
+import time
+import uuid
+from unittest.mock import patch
+from app import allowed_file, job_runner
 
 # Test that the health check route works
 def test_health_check(client):
@@ -54,3 +58,146 @@ def test_allowed_file_extensions():
     assert allowed_file("test.yml") is True
     assert allowed_file("test.csv") is False  # .csv not allowed
 
+
+# API data is streamed across JSON and JSON-lines files with pagination
+def test_get_api_data_streams_pages(client, tmp_path):
+    (tmp_path / "a.json").write_text('[{"id":1},{"id":2}]')
+    (tmp_path / "b.jsonl").write_text('{"id":3}\n{"id":4}\n')
+
+    res = client.get("/api/data", query_string={"path": str(tmp_path), "page": 2, "page_size": 3})
+    assert res.status_code == 200
+    assert res.json == [{"id": 4}]
+
+# An unreadable file fails the request instead of being silently left out
+def test_get_api_data_unreadable_file(client, tmp_path):
+    (tmp_path / "a.json").write_text('[{"id":1}]')
+    (tmp_path / "b.json").write_text('[{"id":2},')
+
+    res = client.get("/api/data", query_string={"path": str(tmp_path)})
+    assert res.status_code == 500
+    assert "b.json" in res.json["error"]
+
+# Only the files a page reaches are checked, and each file version is counted once
+def test_get_api_data_checks_only_needed_files(client, tmp_path):
+    from json_stream import iter_json_records
+    (tmp_path / "a.json").write_text('[{"id":1},{"id":2}]')
+    (tmp_path / "b.json").write_text('[{"id":3},')
+    query = {"path": str(tmp_path), "page": 1, "page_size": 2}
+
+    with patch("app.iter_json_records", wraps=iter_json_records) as parse:
+        res = client.get("/api/data", query_string=query)
+        assert res.status_code == 200
+        assert res.json == [{"id": 1}, {"id": 2}]
+        assert parse.call_count == 2  # counted, then streamed
+        assert client.get("/api/data", query_string={**query, "page_size": 1}).json == [{"id": 1}]
+        assert parse.call_count == 3  # count cached: streamed only
+
+    res = client.get("/api/data", query_string={**query, "page": 2})
+    assert res.status_code == 500
+
+# Pool metrics of the shared engines are exposed for monitoring
+def test_db_metrics(client):
+    token = get_token(client)
+    res = client.get('/db-metrics', headers={"Authorization": f"Bearer {token}"})
+    assert res.status_code == 200
+    assert isinstance(res.get_json()["pools"], dict)
+
+# Stored configs can be referenced by id instead of being re-uploaded
+def test_trigger_and_view_by_config_id(client, monkeypatch):
+    from config_service import register_config
+    stored = register_config(f"output_path: ./data/missing_{uuid.uuid4().hex}.csv\n")
+    started = []
+    monkeypatch.setattr("app.main_elt_job", lambda path, stop_event: started.append(path))
+
+    headers = {"Authorization": f"Bearer {get_token(client)}"}
+    res = client.post('/trigger-job', data={"config_id": stored["id"]})
+    assert res.status_code == 200
+    job_id = res.get_json()["job_id"]
+    job_runner.executor.submit(lambda: None).result()  # let the worker pick the job up
+    for _ in range(100):
+        if client.get(f'/jobs/{job_id}', headers=headers).get_json()["state"] == "succeeded":
+            break
+        time.sleep(0.01)
+    assert started == [stored["path"]]
+
+    res = client.post('/data-view', data={"config_id": stored["id"]}, headers=headers)
+    assert res.status_code == 400
+    assert "'database' or 'table'" in res.get_json()["error"]
+
+    res = client.post('/data-view', data={"config_id": 0}, headers=headers)
+    assert res.status_code == 404
+
+# Output previews need a token and only read files inside the output folder
+def test_data_view_output_confined(client, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.OUTPUT_FOLDER", str(tmp_path / "out"))
+    (tmp_path / "out").mkdir()
+    (tmp_path / "out" / "orders.csv").write_text("id\n1\n")
+    (tmp_path / "secret.csv").write_text("password\nhunter2\n")
+    headers = {"Authorization": f"Bearer {get_token(client)}"}
+
+    def view(output_path, **kwargs):
+        upload = io.BytesIO(f"output_path: {output_path}\n".encode())
+        return client.post('/data-view?source=output', data={"file": (upload, "view.yaml")}, **kwargs)
+
+    assert view(tmp_path / "out" / "orders").status_code == 401  # No auth token
+    res = view(tmp_path / "out" / "orders", headers=headers)
+    assert res.status_code == 200
+    assert res.get_json()["rows"] == [{"id": 1}]
+    for path in (tmp_path / "secret", tmp_path / "out" / ".." / "secret"):
+        assert view(path, headers=headers).status_code == 400
+
+
+# Running jobs can be inspected and cancelled through the API
+def test_job_status_and_cancel(client):
+    headers = {"Authorization": f"Bearer {get_token(client)}"}
+    job = job_runner.submit(lambda stop_event: stop_event.wait(5), "api_cancel_table", name="wait")
+    assert client.post(f'/jobs/{job.id}/cancel').status_code == 401  # No auth token
+    assert client.get('/jobs').status_code == 401
+    for _ in range(100):
+        if client.get(f'/jobs/{job.id}', headers=headers).get_json()["state"] == "running":
+            break
+        time.sleep(0.01)
+
+    res = client.post(f'/jobs/{job.id}/cancel', headers=headers)
+    assert res.status_code == 200
+    for _ in range(100):
+        status = client.get(f'/jobs/{job.id}', headers=headers).get_json()
+        if status["state"] == "cancelled":
+            break
+        time.sleep(0.01)
+    assert status["state"] == "cancelled"
+    assert status["run_seconds"] < 5
+    assert client.get('/jobs/missing', headers=headers).status_code == 404
+
+# Schedules are created, listed and deleted through the API
+def test_schedules_crud(client):
+    headers = {"Authorization": f"Bearer {get_token(client)}"}
+    name = f"nightly_{uuid.uuid4().hex}"
+    body = {"name": name, "config_id": 1, "cron": "0 2 * * *", "misfire_policy": "skip"}
+    assert client.post('/schedules', json=body).status_code == 401  # No auth token
+    res = client.post('/schedules', json=body, headers=headers)
+    assert res.status_code == 201
+    schedule = res.get_json()
+    assert schedule["next_run_at"].endswith("02:00:00")
+
+    assert client.post('/schedules', json=body, headers=headers).status_code == 409
+    assert client.post('/schedules', json={**body, "name": "x", "cron": "bad"}, headers=headers).status_code == 400
+    assert name in [s["name"] for s in client.get('/schedules', headers=headers).get_json()["schedules"]]
+    assert client.delete(f'/schedules/{schedule["id"]}').status_code == 401
+    assert client.delete(f'/schedules/{schedule["id"]}', headers=headers).status_code == 200
+    assert client.delete(f'/schedules/{schedule["id"]}', headers=headers).status_code == 404
+
+# Scheduled YAML files must be uploads; other files on the server are refused
+def test_schedule_config_path_confined(client, tmp_path, monkeypatch):
+    monkeypatch.setattr("app.UPLOAD_FOLDER", str(tmp_path))
+    (tmp_path / "nightly.yaml").write_text("sources: []\n")
+    headers = {"Authorization": f"Bearer {get_token(client)}"}
+    body = {"name": f"path_{uuid.uuid4().hex}", "interval_seconds": 3600}
+
+    for path in ("../outside.yaml", "/etc/passwd", str(tmp_path / "missing.yaml")):
+        res = client.post('/schedules', json={**body, "config_path": path}, headers=headers)
+        assert res.status_code == 400
+    res = client.post('/schedules', json={**body, "config_path": "nightly.yaml"}, headers=headers)
+    assert res.status_code == 201
+    assert res.get_json()["config_path"] == str(tmp_path / "nightly.yaml")
+    client.delete(f'/schedules/{res.get_json()["id"]}', headers=headers)
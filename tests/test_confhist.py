@@ -5,7 +5,10 @@ import pytest
 import yaml
 import shutil
 
-from config_manager import app, upload_if_new_config
+import uuid
+
+from config_manager import (app, upload_if_new_config, engine, config_history, config_text, content_hash,
+                            migrate_config_history)
 
 # ---------- FIXTURE: Flask client ----------
 @pytest.fixture
@@ -56,3 +59,40 @@ def test_upload_if_new_config(tmp_path):
 
     result = upload_if_new_config(str(yaml_file))
     assert "New config stored as version" in result or "Config already exists" in result
+
+
+# ---------- TEST: same YAML is stored once ----------
+def test_duplicate_upload_reuses_version(client):
+    yaml_content = f"source:\n  local:\n    path: '{uuid.uuid4().hex}.csv'\n".encode()
+    first = client.post('/upload-config', data={'file': (io.BytesIO(yaml_content), 'a.yaml')},
+                        content_type='multipart/form-data').get_json()
+    again = client.post('/upload-config', data={'file': (io.BytesIO(yaml_content + b"\n"), 'b.yaml')},
+                        content_type='multipart/form-data').get_json()
+    assert first['new'] is True
+    assert again['new'] is False
+    assert again['version'] == first['version']
+
+    with engine.connect() as conn:
+        row = conn.execute(config_history.select()
+                           .where(config_history.c.content_hash == content_hash(yaml_content.decode()))).one()
+    assert row.yaml_content is None
+    assert config_text(row) == yaml_content.decode()
+
+
+# ---------- TEST: migration hashes and compresses legacy rows ----------
+def test_migration_compresses_legacy_rows():
+    content = f"legacy: {uuid.uuid4().hex}\n"
+    with engine.begin() as conn:
+        row_id = conn.execute(config_history.insert().values(yaml_content=content)
+                              .returning(config_history.c.id)).scalar()
+    try:
+        migrate_config_history(engine)
+        with engine.connect() as conn:
+            row = conn.execute(config_history.select().where(config_history.c.id == row_id)).one()
+        assert row.content_hash == content_hash(content)
+        assert row.yaml_content is None
+        assert config_text(row) == content
+        assert row.version is not None
+    finally:
+        with engine.begin() as conn:
+            conn.execute(config_history.delete().where(config_history.c.id == row_id))
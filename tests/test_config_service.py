@@ -0,0 +1,50 @@
+import uuid
+import config_service
+from config_service import LRUCache, parse_config, config_file, register_config, load_config, content_hash
+
+
+# The same YAML is parsed once; callers get independent copies
+def test_parse_config_is_cached(monkeypatch):
+    calls = []
+    real_load = config_service.yaml.safe_load
+    monkeypatch.setattr(config_service.yaml, "safe_load", lambda text: calls.append(text) or real_load(text))
+    content = f"target:\n  table: t_{uuid.uuid4().hex}\n"
+
+    first = parse_config(content)
+    first["target"]["table"] = "changed"
+    second = parse_config(content + "\n")  # surrounding whitespace does not change the hash
+    assert len(calls) == 1
+    assert second["target"]["table"].startswith("t_")
+
+
+# The least recently used entry is evicted first
+def test_lru_cache_evicts_oldest():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 1}
+
+
+# Each distinct YAML is written once, named by its hash
+def test_config_file_written_once(tmp_path):
+    path = config_file("a: 1\n", str(tmp_path))
+    assert path == str(tmp_path / f"{content_hash('a: 1')}.yaml")
+    assert config_file("a: 1", str(tmp_path)) == path
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+# A registered config can be loaded back by id, from the cache after the first time
+def test_register_and_load_by_id():
+    content = f"target:\n  table: t_{uuid.uuid4().hex}\n"
+    stored = register_config(content)
+    assert register_config(content)["id"] == stored["id"]
+
+    config, path = load_config(stored["id"])
+    assert config == parse_config(content)
+    assert path == stored["path"]
+    config["target"] = None
+    assert load_config(stored["id"])[0] == parse_config(content)
@@ -0,0 +1,54 @@
+import threading
+from sqlalchemy import text
+from db import DEFAULT_DB_URL, get_engine, get_table, pool_metrics
+from loader import engine_for
+
+DB_CONFIG = {
+    "type": "postgres", "host": "localhost", "port": 5432,
+    "database": "elt_db", "user": "elt_user", "password": "elt_password",
+}
+
+
+# The same URL always gets the same pooled engine
+def test_engine_is_shared_per_url():
+    assert get_engine(DEFAULT_DB_URL) is get_engine(DEFAULT_DB_URL)
+    assert engine_for(DB_CONFIG) is engine_for(dict(DB_CONFIG))
+    assert engine_for(DB_CONFIG) is not get_engine(DEFAULT_DB_URL)  # psycopg2 driver URL differs
+    assert get_engine(DEFAULT_DB_URL).pool._pre_ping
+
+
+# Connections are reused and checkouts/waits are counted
+def test_pool_metrics_count_checkouts():
+    engine = get_engine(DEFAULT_DB_URL)
+    before = pool_metrics(DEFAULT_DB_URL)
+    [stats_before] = before.values()
+
+    def query():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+    threads = [threading.Thread(target=query) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    [stats] = pool_metrics(DEFAULT_DB_URL).values()
+    assert 'elt_password' not in next(iter(before))
+    assert stats["checkouts"] - stats_before["checkouts"] == 8
+    assert stats["checkins"] - stats_before["checkins"] == 8
+    assert stats["connects"] <= stats["size"] + 10
+    assert stats["checked_out"] == 0
+    assert stats["wait_seconds"] >= stats_before["wait_seconds"]
+
+
+# Reflected tables are cached instead of re-reflected per request
+def test_reflected_table_is_cached():
+    with get_engine().begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS db_cache_probe (id INT)"))
+    try:
+        assert get_table('db_cache_probe') is get_table('db_cache_probe')
+        assert list(get_table('db_cache_probe').c.keys()) == ['id']
+    finally:
+        with get_engine().begin() as conn:
+            conn.execute(text("DROP TABLE db_cache_probe"))
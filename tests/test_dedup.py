@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from dedup import hash_rows, MemoryDedupStore, SQLiteDedupStore, get_dedup_store
+
+
+def sample_hashes(n):
+    return hash_rows(pd.DataFrame({"id": range(n), "name": [f"row{i}" for i in range(n)]}))
+
+
+# Memory store remembers added hashes
+def test_memory_store_filters_known():
+    store = MemoryDedupStore()
+    hashes = sample_hashes(3)
+    store.add(hashes[:2])
+    assert store.filter_new(hashes).tolist() == [False, False, True]
+
+
+# SQLite store state survives reopening the same file
+def test_sqlite_store_persists(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    hashes = sample_hashes(4)
+
+    store = SQLiteDedupStore(path, "table_a")
+    store.add(hashes[:3])
+    store.close()
+
+    reopened = SQLiteDedupStore(path, "table_a")
+    assert reopened.filter_new(hashes).tolist() == [False, False, False, True]
+
+
+# Hashes are keyed per target table
+def test_sqlite_store_is_per_table(tmp_path):
+    path = str(tmp_path / "dedup.db")
+    hashes = sample_hashes(2)
+    SQLiteDedupStore(path, "table_a").add(hashes)
+    assert SQLiteDedupStore(path, "table_b").filter_new(hashes).all()
+
+
+# Size-based eviction keeps at most max_entries hashes
+def test_sqlite_store_max_entries(tmp_path):
+    store = SQLiteDedupStore(str(tmp_path / "dedup.db"), "t", max_entries=5)
+    store.add(sample_hashes(8))
+    count = store.conn.execute("SELECT COUNT(*) FROM row_hashes").fetchone()[0]
+    assert count == 5
+
+
+# Time-based eviction drops expired hashes
+def test_sqlite_store_ttl(tmp_path):
+    store = SQLiteDedupStore(str(tmp_path / "dedup.db"), "t", ttl_seconds=60)
+    hashes = sample_hashes(2)
+    store.add(hashes)
+    store.conn.execute("UPDATE row_hashes SET inserted_at = inserted_at - 3600")
+    store.add(np.array([], dtype=np.uint64))  # Adding triggers eviction
+    assert store.filter_new(hashes).all()
+
+
+# Factory caches one store per backend/path/table
+def test_get_dedup_store_is_cached(tmp_path):
+    config = {"target": {"table": "t"}, "dedup": {"store": "sqlite", "path": str(tmp_path / "d.db")}}
+    assert get_dedup_store(config) is get_dedup_store(config)
+    assert isinstance(get_dedup_store({"dedup": {"store": "memory"}}), MemoryDedupStore)
@@ -1,4 +1,5 @@
 import os
+import time
 import pytest
 import pandas as pd
 from unittest.mock import patch, MagicMock
@@ -7,7 +8,11 @@ from extract import (
     extract_from_api,
     validate_and_standardize,
     run_extraction,
-    read_yaml_config
+    read_yaml_config,
+    iter_extraction,
+    flush_side_outputs,
+    commit_manifests,
+    extract_sources
 )
 
 # Define test data directory and ensure it exists
@@ -33,7 +38,7 @@ def test_extract_from_local_invalid_path():
 
 
 # Mock API response and test API-based extraction
-@patch('extract.requests.get')
+@patch('api_client.requests.Session.get')
 def test_extract_from_api_mock(mock_get):
     mock_response = MagicMock()
     mock_response.status_code = 200
@@ -62,6 +67,15 @@ def test_validate_and_standardize_missing_column():
     assert result is None
 
 
+# Validation converts columns to the schema dtypes and records the values it could not convert
+def test_validate_and_standardize_coerces_dtypes():
+    df = pd.DataFrame({'ID': ['1', '2', 'n/a'], 'name': ['Alice', 'Bob', 'Cy']})
+    result = validate_and_standardize(df, {'columns': {'id': 'int64', 'name': 'category'}})
+    assert str(result['id'].dtype) == 'Int64'
+    assert isinstance(result['name'].dtype, pd.CategoricalDtype)
+    assert result.attrs['coercion_errors']['id']['examples'] == ['n/a']
+
+
 # Smoke test for running full extraction from local to CSV
 def test_run_extraction_smoke(tmp_path):
     config = {
@@ -75,13 +89,256 @@ def test_run_extraction_smoke(tmp_path):
     }
 
     output_path = tmp_path / "output.csv"
-    run_extraction(config=config, output_csv_path=str(output_path))
+    df = run_extraction(config=config, output_csv_path=str(output_path))
+    assert list(df.columns) == ['id', 'name']   # DataFrame returned in-process
+    flush_side_outputs()
     assert output_path.exists()      # Output file should be created
 
 
+# CSV side output can be switched off entirely
+def test_run_extraction_without_csv(tmp_path):
+    config = {'sources': [{'type': 'local', 'path': TEST_LOCAL_DIR}], 'write_csv': False}
+    output_path = tmp_path / "output.csv"
+    df = run_extraction(config=config, output_csv_path=str(output_path))
+    flush_side_outputs()
+    assert not df.empty
+    assert not output_path.exists()
+
+
 # Test reading a valid YAML file
 def test_read_yaml_valid(tmp_path):
     file = tmp_path / "test.yaml"
     file.write_text("source:\n  local:\n    path: 'data.csv'")
     result = read_yaml_config(file)
     assert "source" in result         
+
+
+# Streaming extraction yields bounded, validated chunks
+def test_iter_extraction_chunks(tmp_path):
+    pd.DataFrame({'ID': range(5), 'Name': list('abcde'), 'extra': range(5)}).to_csv(tmp_path / 'a.csv', index=False)
+    config = {
+        'sources': [{'type': 'local', 'path': str(tmp_path)}],
+        'schema': {'columns': {'id': 'int', 'name': 'str'}},
+        'strict_mode': True,
+        'chunk_size': 2,
+    }
+
+    chunks = list(iter_extraction(config))
+    assert [len(c) for c in chunks] == [2, 2, 1]            # No chunk exceeds chunk_size
+    assert all(list(c.columns) == ['id', 'name'] for c in chunks)
+
+
+# Parallel local reading keeps deterministic (sorted filename) ordering
+@pytest.mark.parametrize("executor", ["process", "thread"])
+def test_extract_from_local_parallel(tmp_path, executor):
+    for i in range(4):
+        pd.DataFrame({'id': [i * 10, i * 10 + 1]}).to_csv(tmp_path / f'part{i}.csv', index=False)
+    (tmp_path / 'part9.txt').write_text("id\n90\n91\n")
+
+    serial = extract_from_local(str(tmp_path))
+    parallel = extract_from_local(str(tmp_path), workers=3, executor=executor)
+    assert parallel['id'].tolist() == serial['id'].tolist() == [0, 1, 10, 11, 20, 21, 30, 31, 90, 91]
+
+
+# Records logged inside process-pool workers reach the parent's handlers
+def test_extract_from_local_process_pool_logs(tmp_path, caplog):
+    src = tmp_path / "src"
+    src.mkdir()
+    manifest_path = str(tmp_path / "manifest.json")
+    (src / "a.csv").write_text("id\n1\n")
+    (src / "b.csv").write_text("id\n2\n")
+    extract_from_local(str(src), workers=2, manifest_path=manifest_path)
+
+    (src / "a.csv").write_text("id\n7\n8\n")
+    (src / "b.csv").write_text("id\n9\n10\n")
+    caplog.set_level("INFO")
+    df = extract_from_local(str(src), workers=2, manifest_path=manifest_path)
+    assert df['id'].tolist() == [7, 8, 9, 10]
+    assert "a.csv was rewritten, reading it in full" in caplog.text
+
+
+# Incremental extraction reads only new files and appended rows
+def test_extract_from_local_incremental(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    manifest_path = str(tmp_path / "manifest.json")
+    (src / "a.csv").write_text("id,name\n1,Alice\n2,Bob\n")
+
+    manifests = {}
+    first = extract_from_local(str(src), manifest_path=manifest_path, manifests=manifests)
+    commit_manifests(manifests)
+    assert first['id'].tolist() == [1, 2]
+
+    # Nothing changed: nothing is read
+    assert extract_from_local(str(src), manifest_path=manifest_path, manifests=manifests).empty
+    commit_manifests(manifests)
+
+    # Appended rows and a new file: only the tail and the new file are read
+    with open(src / "a.csv", "a") as f:
+        f.write("3,Carol\n")
+    (src / "b.txt").write_text("id|name\n4|Dave\n")
+    second = extract_from_local(str(src), manifest_path=manifest_path, manifests=manifests)
+    commit_manifests(manifests)
+    assert second['id'].tolist() == [3, 4]
+    assert second['name'].tolist() == ['Carol', 'Dave']
+
+
+# A rewritten file (or an uncommitted manifest) is read again in full
+def test_extract_from_local_incremental_rewrite(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    manifest_path = str(tmp_path / "manifest.json")
+    (src / "a.csv").write_text("id,name\n1,Alice\n")
+    extract_from_local(str(src), manifest_path=manifest_path, checksum=True)  # no collector: saved at once
+
+    (src / "a.csv").write_text("id,name\n9,Zed\n10,Yan\n")
+    df = extract_from_local(str(src), manifest_path=manifest_path, checksum=True, manifests={})
+    assert df['id'].tolist() == [9, 10]
+
+    # Load failed: the staged manifest was dropped, so the next run reads the file again
+    df = extract_from_local(str(src), manifest_path=manifest_path, checksum=True, manifests={})
+    assert df['id'].tolist() == [9, 10]
+
+
+# Extraction can be limited to changed files of selected source types
+def test_run_extraction_changed_files(tmp_path):
+    (tmp_path / "a.csv").write_text("id\n1\n")
+    (tmp_path / "b.csv").write_text("id\n2\n")
+    config = {'sources': [{'type': 'local', 'path': str(tmp_path)}], 'write_csv': False}
+
+    df = run_extraction(config=config, changed_files={str(tmp_path): {"b.csv"}})
+    assert df['id'].tolist() == [2]
+    assert run_extraction(config=config, source_types={"sftp"}).empty
+
+
+# Rows failing the YAML rules are quarantined instead of returned
+def test_run_extraction_quarantines_rule_failures(tmp_path):
+    (tmp_path / "a.csv").write_text("id,age\n1,30\n2,-5\n")
+    quarantine_path = str(tmp_path / "rejected.csv")
+    config = {'sources': [{'type': 'local', 'path': str(tmp_path)}], 'write_csv': False,
+              'dedup': {'store': 'sqlite', 'path': str(tmp_path / 'state' / 'dedup.db')},
+              'rules': [{'column': 'age', 'check': 'range', 'min': 0}], 'quarantine_path': quarantine_path}
+    df = run_extraction(config=config)
+    assert df['id'].tolist() == [1]
+    assert pd.read_csv(quarantine_path)['_rejected_reasons'].tolist() == ['range(age)']
+
+
+# A quarantine write that fails fails the run instead of dropping the rejected rows
+def test_run_extraction_quarantine_failure_raises(tmp_path):
+    (tmp_path / "a.csv").write_text("id,age\n1,30\n2,-5\n")
+    config = {'sources': [{'type': 'local', 'path': str(tmp_path)}], 'write_csv': False,
+              'dedup': {'store': 'sqlite', 'path': str(tmp_path / 'state' / 'dedup.db')},
+              'rules': [{'column': 'age', 'check': 'range', 'min': 0}],
+              'quarantine_path': str(tmp_path)}  # a directory cannot be appended to
+    with pytest.raises(OSError):
+        run_extraction(config=config)
+
+
+# A polled source returning the same bad rows quarantines them only once
+def test_run_extraction_quarantines_rows_once(tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.csv").write_text("id,age\n1,30\n2,-5\n")
+    quarantine_path = str(tmp_path / "rejected.csv")
+    config = {'sources': [{'type': 'local', 'path': str(src)}], 'write_csv': False,
+              'dedup': {'store': 'sqlite', 'path': str(tmp_path / 'dedup.db')},
+              'rules': [{'column': 'age', 'check': 'range', 'min': 0}], 'quarantine_path': quarantine_path}
+    run_extraction(config=config)
+    run_extraction(config=config)
+    (src / "b.csv").write_text("id,age\n3,-1\n")
+    run_extraction(config=config)
+    assert pd.read_csv(quarantine_path)['id'].tolist() == [2, 3]
+
+
+# Transforms run in pandas before the data is returned for loading
+def test_run_extraction_applies_transforms(tmp_path):
+    (tmp_path / "a.csv").write_text("id,amount\n1,5\n2,50\n")
+    config = {'sources': [{'type': 'local', 'path': str(tmp_path)}], 'write_csv': False,
+              'transforms': {'steps': [{'derive': {'double': 'amount * 2'}}, {'filter': 'double > 20'}]}}
+    df = run_extraction(config=config)
+    assert df.to_dict('records') == [{'id': 2, 'amount': 50, 'double': 100}]
+
+
+# Aggregates would be appended again on every tick, so they must be pushed down
+def test_run_extraction_rejects_aggregate_without_pushdown(tmp_path):
+    (tmp_path / "a.csv").write_text("id,amount\n1,5\n")
+    config = {'sources': [{'type': 'local', 'path': str(tmp_path)}], 'write_csv': False,
+              'transforms': {'steps': [{'aggregate': {'group_by': ['id'], 'metrics': {'total': 'sum(amount)'}}}]}}
+    with pytest.raises(ValueError):
+        run_extraction(config=config)
+
+
+# A failed side output write is logged and raised by flush_side_outputs
+def test_side_output_failure_is_reported(tmp_path, caplog):
+    config = {'sources': [{'type': 'local', 'path': TEST_LOCAL_DIR}]}
+    run_extraction(config=config, output_csv_path=str(tmp_path / "missing_dir" / "out.csv"))
+    with pytest.raises(OSError):
+        flush_side_outputs()
+    assert "Side output failed" in caplog.text
+    flush_side_outputs()  # reported once
+
+
+# Extraction can write a Parquet side output instead of CSV
+def test_run_extraction_parquet_output(tmp_path):
+    config = {'sources': [{'type': 'local', 'path': TEST_LOCAL_DIR}], 'output_format': 'parquet'}
+    run_extraction(config=config, output_csv_path=str(tmp_path / "output.csv"))
+    flush_side_outputs()
+    assert (tmp_path / "output.parquet").exists()
+    assert not (tmp_path / "output.csv").exists()
+
+
+# Sources run concurrently: total time is the slowest source, not the sum
+@patch('extract.extract_from_api')
+def test_extract_sources_concurrent(mock_api):
+    def slow_api(url, auth_token=None, folder_param=None, **options):
+        time.sleep(0.5)
+        return pd.DataFrame({'id': [int(url)]})
+
+    mock_api.side_effect = slow_api
+    sources = [{'type': 'api', 'url': str(i)} for i in range(3)]
+
+    start = time.monotonic()
+    results = extract_sources(sources, max_workers=3)
+    assert time.monotonic() - start < 1.2
+    assert [df['id'].tolist() for df in results] == [[0], [1], [2]]   # Config order kept
+
+
+# A failing or timed-out source does not affect the others
+@patch('extract.extract_from_api')
+def test_extract_sources_isolation(mock_api):
+    def flaky_api(url, auth_token=None, folder_param=None, **options):
+        if url == 'fail':
+            raise RuntimeError('boom')
+        if url == 'hang':
+            time.sleep(2)
+        return pd.DataFrame({'id': [1]})
+
+    mock_api.side_effect = flaky_api
+    sources = [{'type': 'api', 'url': 'fail'}, {'type': 'api', 'url': 'hang', 'timeout': 0.3},
+               {'type': 'api', 'url': 'ok'}]
+
+    start = time.monotonic()
+    results = extract_sources(sources)
+    assert time.monotonic() - start < 1.5
+    assert results[0] is None and results[1] is None
+    assert results[2]['id'].tolist() == [1]
+
+
+# A source abandoned at its timeout never stages its manifest into the run's manifests
+def test_extract_sources_timeout_drops_manifest(tmp_path):
+    (tmp_path / "a.csv").write_text("id\n1\n")
+    manifest_path = str(tmp_path / "manifest.json")
+    real_extract = extract_from_local
+
+    def slow_extract(*args, **kwargs):
+        time.sleep(0.5)
+        return real_extract(*args, **kwargs)
+
+    sources = [{'type': 'local', 'path': str(tmp_path), 'incremental': True, 'manifest_path': manifest_path,
+                'timeout': 0.1}]
+    manifests = {}
+    with patch('extract.extract_from_local', side_effect=slow_extract):
+        assert extract_sources(sources, manifests=manifests) == [None]
+        time.sleep(0.8)  # the abandoned thread has finished by now
+    assert manifests == {}
+    assert not os.path.exists(manifest_path)
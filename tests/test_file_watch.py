@@ -0,0 +1,35 @@
+import time
+from file_watch import ChangeCollector, InotifyWatcher, start_watch
+
+
+# Collector groups changes per source path and waits for a quiet period
+def test_collector_debounces():
+    collector = ChangeCollector()
+    collector.add("./src", "a.csv")
+    collector.add("./src", "a.csv")
+    collector.add("./src", "b.csv")
+
+    start = time.monotonic()
+    changed = collector.drain(0.2)
+    assert time.monotonic() - start >= 0.15       # Waited for the debounce window
+    assert changed == {"./src": {"a.csv", "b.csv"}}
+    assert not collector.wait(0)                  # Reset after draining
+
+
+# Native inotify backend reports written files
+def test_inotify_reports_writes(tmp_path):
+    collector = ChangeCollector()
+    watcher = InotifyWatcher([str(tmp_path)], collector)
+    watcher.start()
+    try:
+        (tmp_path / "new.csv").write_text("id\n1\n")
+        assert collector.wait(5)
+        assert collector.drain(0.1) == {str(tmp_path): {"new.csv"}}
+    finally:
+        watcher.stop()
+        watcher.join()
+
+
+# Missing directories are ignored
+def test_start_watch_without_directories():
+    assert start_watch(["./does/not/exist"], ChangeCollector()) is None
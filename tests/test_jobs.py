@@ -0,0 +1,62 @@
+import threading
+import time
+from jobs import JobRunner, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED
+
+
+def wait_for(runner, job_id, state, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if runner.get(job_id)["state"] == state:
+            return runner.get(job_id)
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {runner.get(job_id)['state']}, expected {state}")
+
+
+# Jobs for the same table run one at a time; other tables are not held up
+def test_max_jobs_per_table():
+    runner = JobRunner(max_workers=4, max_per_table=1)
+    release = threading.Event()
+    first = runner.submit(lambda stop: release.wait(2), "orders")
+    second = runner.submit(lambda stop: None, "orders")
+    other = runner.submit(lambda stop: None, "customers")
+
+    wait_for(runner, first.id, RUNNING)
+    wait_for(runner, other.id, SUCCEEDED)
+    time.sleep(0.05)
+    assert runner.get(second.id)["state"] == QUEUED
+
+    release.set()
+    wait_for(runner, second.id, SUCCEEDED)
+    assert runner.get(second.id)["queued_seconds"] >= 0.05
+    runner.shutdown()
+
+
+# Cancelling a queued job drops it; cancelling a running job sets its stop event
+def test_cancel_queued_and_running():
+    runner = JobRunner(max_workers=2, max_per_table=1)
+    running = runner.submit(lambda stop: stop.wait(5), "orders")
+    queued = runner.submit(lambda stop: None, "orders")
+    wait_for(runner, running.id, RUNNING)
+
+    runner.cancel(queued.id)
+    assert runner.get(queued.id)["state"] == CANCELLED
+    runner.cancel(running.id)
+    status = wait_for(runner, running.id, CANCELLED)
+    assert status["run_seconds"] < 5
+    assert runner.get(queued.id)["started_at"] is None
+    assert runner.cancel("unknown") is None
+    runner.shutdown()
+
+
+# A failing job records its error and frees the table for the next job
+def test_failed_job_releases_table():
+    runner = JobRunner(max_workers=1)
+
+    def boom(stop):
+        raise RuntimeError("boom")
+
+    failed = runner.submit(boom, "orders")
+    after = runner.submit(lambda stop: None, "orders")
+    assert wait_for(runner, failed.id, FAILED)["error"] == "boom"
+    wait_for(runner, after.id, SUCCEEDED)
+    runner.shutdown()
@@ -0,0 +1,39 @@
+import json
+import pytest
+import json_stream
+from json_stream import iter_json_records, iter_json_frames, iter_json_array
+
+
+@pytest.fixture
+def json_files(tmp_path):
+    array_path = tmp_path / "array.json"
+    array_path.write_text(json.dumps([{"id": i, "score": i / 2} for i in range(7)]))
+    lines_path = tmp_path / "rows.jsonl"
+    lines_path.write_text("\n".join(json.dumps({"id": i}) for i in range(7)) + "\n")
+    object_path = tmp_path / "object.json"
+    object_path.write_text(json.dumps({"id": 1, "name": "single"}))
+    return array_path, lines_path, object_path
+
+
+# Records stream from arrays, JSON-lines and single objects, with and without ijson
+@pytest.mark.parametrize("has_ijson", [True, False])
+def test_iter_json_records(json_files, monkeypatch, has_ijson):
+    monkeypatch.setattr(json_stream, "HAS_IJSON", has_ijson)
+    array_path, lines_path, object_path = json_files
+    assert [r["id"] for r in iter_json_records(str(array_path))] == list(range(7))
+    assert isinstance(next(iter_json_records(str(array_path)))["score"], float)
+    assert [r["id"] for r in iter_json_records(str(lines_path))] == list(range(7))
+    assert list(iter_json_records(str(object_path))) == [{"id": 1, "name": "single"}]
+
+
+# Frames never exceed the chunk size
+def test_iter_json_frames(json_files):
+    array_path, lines_path, _ = json_files
+    assert [len(df) for df in iter_json_frames(str(array_path), 3)] == [3, 3, 1]
+    assert [len(df) for df in iter_json_frames(str(lines_path), 3)] == [3, 3, 1]
+
+
+# Streamed encoder produces a valid JSON array
+def test_iter_json_array():
+    assert json.loads("".join(iter_json_array(iter([{"a": 1}, {"a": 2}])))) == [{"a": 1}, {"a": 2}]
+    assert json.loads("".join(iter_json_array(iter([])))) == []
@@ -1,8 +1,13 @@
 import os
 import pytest
 import pandas as pd
+import psycopg2
+from unittest.mock import patch
 from sqlalchemy import create_engine, inspect, text
-from loader import read_yaml_config, load_csv_to_postgres
+from loader import (
+    read_yaml_config, load_csv_to_postgres, load_chunks_to_postgres, load_dataframe_to_postgres,
+    load_file_to_postgres, build_engine_url
+)
 
 # Paths
 CONFIG_PATH = "uploaded_configs/config.yaml"
@@ -44,3 +49,178 @@ def test_load_csv_to_postgres(db_engine):
         row_count = result.scalar()
         assert row_count > 0
 
+
+# Local database used by the merge-mode tests
+MERGE_DB_CONFIG = {
+    "type": "postgres", "host": "localhost", "port": 5432,
+    "database": "elt_db", "user": "elt_user", "password": "elt_password",
+}
+
+
+def reset_table(table_name):
+    engine = create_engine(build_engine_url(MERGE_DB_CONFIG))
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table_name} CASCADE"))
+    return engine
+
+
+# Loading the same CSV twice in merge mode (row-hash keyed) inserts rows only once
+def test_merge_mode_skips_duplicate_rows(tmp_path):
+    engine = reset_table("merge_test_hash")
+    csv_path = tmp_path / "rows.csv"
+    pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}).to_csv(csv_path, index=False)
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": "merge"}
+
+    load_csv_to_postgres(str(csv_path), db_cfg, "merge_test_hash")
+    load_csv_to_postgres(str(csv_path), db_cfg, "merge_test_hash")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM merge_test_hash")).scalar() == 2
+
+
+# Merge keyed on configured columns updates existing rows on conflict
+def test_merge_mode_updates_on_key(tmp_path):
+    engine = reset_table("merge_test_key")
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": "merge", "merge_keys": ["id"], "on_conflict": "update"}
+
+    first = tmp_path / "first.csv"
+    pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}).to_csv(first, index=False)
+    load_csv_to_postgres(str(first), db_cfg, "merge_test_key")
+
+    second = tmp_path / "second.csv"
+    pd.DataFrame({"id": [2, 3], "name": ["Bobby", "Carol"]}).to_csv(second, index=False)
+    load_csv_to_postgres(str(second), db_cfg, "merge_test_key")
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, name FROM merge_test_key ORDER BY id")).fetchall()
+    assert [tuple(r) for r in rows] == [(1, "Alice"), (2, "Bobby"), (3, "Carol")]
+
+
+def table_rows(engine, table_name):
+    with engine.connect() as conn:
+        return [tuple(r) for r in conn.execute(text(f"SELECT id, name FROM {table_name} ORDER BY id"))]
+
+
+# COPY and execute_values modes load every row, including NULLs
+@pytest.mark.parametrize("load_mode", ["copy", "values"])
+def test_bulk_load_modes(tmp_path, load_mode):
+    engine = reset_table(f"bulk_test_{load_mode}")
+    csv_path = tmp_path / "rows.csv"
+    pd.DataFrame({"id": [1, 2, 3], "name": ["Alice", None, "Carol"]}).to_csv(csv_path, index=False)
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": load_mode, "chunk_rows": 2}
+
+    load_csv_to_postgres(str(csv_path), db_cfg, f"bulk_test_{load_mode}")
+
+    assert table_rows(engine, f"bulk_test_{load_mode}") == [(1, "Alice"), (2, None), (3, "Carol")]
+
+
+# A target that rejects COPY falls back to execute_values
+def test_copy_falls_back_to_values(tmp_path):
+    engine = reset_table("bulk_test_fallback")
+    csv_path = tmp_path / "rows.csv"
+    pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}).to_csv(csv_path, index=False)
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": "copy"}
+
+    with patch("loader.copy_csv_file", side_effect=psycopg2.errors.FeatureNotSupported("no COPY")):
+        load_csv_to_postgres(str(csv_path), db_cfg, "bulk_test_fallback")
+
+    assert table_rows(engine, "bulk_test_fallback") == [(1, "Alice"), (2, "Bob")]
+
+
+# Chunks are loaded one by one; the table is created from the first chunk
+def test_load_chunks_to_postgres():
+    engine = reset_table("stream_test")
+    chunks = iter([
+        pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}),
+        pd.DataFrame({"id": [3], "name": ["Carol"]}),
+    ])
+
+    loaded = load_chunks_to_postgres(chunks, {**MERGE_DB_CONFIG, "load_mode": "copy"}, "stream_test")
+
+    assert loaded == 3
+    assert table_rows(engine, "stream_test") == [(1, "Alice"), (2, "Bob"), (3, "Carol")]
+
+
+# DataFrames can be loaded in-process without a CSV hand-off
+def test_load_dataframe_to_postgres():
+    engine = reset_table("df_load_test")
+    df = pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]})
+    assert load_dataframe_to_postgres(df, MERGE_DB_CONFIG, "df_load_test") == 2
+    assert table_rows(engine, "df_load_test") == [(1, "Alice"), (2, "Bob")]
+
+
+# Parquet outputs are loaded straight from the columnar file
+def test_load_file_to_postgres_parquet(tmp_path):
+    engine = reset_table("parquet_load_test")
+    path = str(tmp_path / "out.parquet")
+    pd.DataFrame({"id": [1, 2], "name": ["Alice", "Bob"]}).to_parquet(path, index=False)
+    load_file_to_postgres(path, MERGE_DB_CONFIG, "parquet_load_test")
+    assert table_rows(engine, "parquet_load_test") == [(1, "Alice"), (2, "Bob")]
+
+
+# Range partitions by month are created on demand and rows go straight into them
+def test_range_partitioned_load():
+    engine = reset_table("part_test")
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": "copy",
+              "partition": {"column": "ordered_at", "strategy": "range", "interval": "month"}}
+    df = pd.DataFrame({"id": [1, 2, 3, 4],
+                       "ordered_at": pd.to_datetime(["2024-01-05", "2024-01-20", "2024-02-01", None])})
+    assert load_dataframe_to_postgres(df, db_cfg, "part_test") == 4
+    assert load_dataframe_to_postgres(df.iloc[:1], db_cfg, "part_test") == 1   # existing partition reused
+
+    with engine.connect() as conn:
+        counts = dict(conn.execute(text(
+            "SELECT tableoid::regclass::text, count(*) FROM part_test GROUP BY 1")).all())
+    assert counts == {"part_test_202401": 3, "part_test_202402": 1, "part_test_default": 1}
+
+
+# List partitions per value, and ingestion-day partitions filled with the load date
+def test_list_and_ingestion_partitions():
+    engine = reset_table("part_list_test")
+    db_cfg = {**MERGE_DB_CONFIG, "partition": {"column": "region", "strategy": "list"}}
+    load_dataframe_to_postgres(pd.DataFrame({"id": [1, 2, 3], "region": ["eu", "us", "eu"]}), db_cfg, "part_list_test")
+    with engine.connect() as conn:
+        counts = dict(conn.execute(text(
+            "SELECT tableoid::regclass::text, count(*) FROM part_list_test GROUP BY 1")).all())
+    assert counts == {"part_list_test_eu": 2, "part_list_test_us": 1}
+
+    engine = reset_table("part_day_test")
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": "merge", "merge_keys": ["id"],
+              "partition": {"column": "ingested_on", "ingestion": True}}
+    for _ in range(2):   # Merge keys are widened with the partition column
+        load_dataframe_to_postgres(pd.DataFrame({"id": [1, 2]}), db_cfg, "part_day_test")
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT tableoid::regclass::text, ingested_on = CURRENT_DATE FROM part_day_test")).all()
+    assert len(rows) == 2 and all(today for _, today in rows)
+    assert rows[0][0] == "part_day_test_" + pd.Timestamp.now().strftime("%Y%m%d")
+
+
+# Precise column types, declared keys and indexes built after the load
+def test_typed_ddl_keys_and_indexes():
+    engine = reset_table("typed_test")
+    db_cfg = {**MERGE_DB_CONFIG, "load_mode": "copy", "primary_key": ["id"], "unique_keys": [["email"]],
+              "indexes": [["created_at"], {"columns": ["payload"], "method": "gin"}],
+              "column_types": {"price": "NUMERIC(12, 2)"}}
+    df = pd.DataFrame({
+        "id": pd.Series([1, 2], dtype="int64"),
+        "email": ["a@x.io", "b@x.io"],
+        "price": [9.99, 12.5],
+        "active": [True, False],
+        "created_at": pd.to_datetime(["2024-01-01 10:00", "2024-01-02 11:00"], utc=True),
+        "payload": [{"tags": ["a"]}, {"tags": []}],
+    })
+    assert load_dataframe_to_postgres(df, db_cfg, "typed_test") == 2
+
+    inspector = inspect(engine)
+    types = {c["name"]: str(c["type"]) for c in inspector.get_columns("typed_test")}
+    assert types == {"id": "BIGINT", "email": "TEXT", "price": "NUMERIC(12, 2)", "active": "BOOLEAN",
+                     "created_at": "TIMESTAMP", "payload": "JSONB"}
+    assert inspector.get_pk_constraint("typed_test")["constrained_columns"] == ["id"]
+    assert [u["column_names"] for u in inspector.get_unique_constraints("typed_test")] == [["email"]]
+    assert {i["name"] for i in inspector.get_indexes("typed_test")} >= {
+        "ix_typed_test_created_at", "ix_typed_test_payload"}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT payload->'tags'->>0 FROM typed_test WHERE id = 1")).scalar() == "a"
+        tz = conn.execute(text("SELECT data_type FROM information_schema.columns "
+                               "WHERE table_name = 'typed_test' AND column_name = 'created_at'")).scalar()
+    assert tz == "timestamp with time zone"
@@ -1,5 +1,6 @@
 import logging
 import os
+import sys
 
 def test_logger_writes_to_file(tmp_path):
     # Create a temporary log file
@@ -30,3 +31,84 @@ def test_logger_writes_to_file(tmp_path):
         content = f.read()
         assert "Test log entry" in content
         assert "INFO" in content
+
+
+# Records go through the queue listener as JSON lines with their structured fields
+def test_setup_logging_writes_json(tmp_path):
+    import json
+    from logger import setup_logging, stop_logging, log_context
+
+    log_path = tmp_path / "elt.log"
+    setup_logging(str(log_path), console=False)
+    try:
+        with log_context(job_id="job-1", source="local"):
+            logging.getLogger("elt").info("Loaded %s rows into %s", 5, "orders", extra={"rows": 5})
+        logging.getLogger("elt").info("Columns: %s", ["a", "b"])
+    finally:
+        stop_logging()
+
+    first, second = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert first["message"] == "Loaded 5 rows into orders"
+    assert (first["job_id"], first["source"], first["rows"], first["level"]) == ("job-1", "local", 5, "INFO")
+    assert second["message"] == "Columns: ['a', 'b']"
+    assert "job_id" not in second
+
+
+# Mutable arguments are formatted when logged, scalar ones on the listener thread
+def test_deferred_formatting_snapshots_mutable_args():
+    import queue
+    from logger import DeferredQueueHandler
+
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    test_logger = logging.getLogger("deferred_test")
+    test_logger.addHandler(handler)
+    test_logger.propagate = False
+    try:
+        files = ["a.csv"]
+        test_logger.warning("Files: %s", files)
+        files.append("b.csv")
+        test_logger.warning("Rows: %d", 10)
+    finally:
+        test_logger.removeHandler(handler)
+
+    mutable, scalar = records.get(), records.get()
+    assert (mutable.msg, mutable.args) == ("Files: ['a.csv']", None)
+    assert (scalar.msg, scalar.args) == ("Rows: %d", (10,))
+    assert scalar.getMessage() == "Rows: 10"
+
+
+# The queued record is a copy: other handlers still get the original record
+def test_deferred_handler_leaves_record_unchanged():
+    import queue
+    from logger import DeferredQueueHandler
+
+    records = queue.SimpleQueue()
+    handler = DeferredQueueHandler(records)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logging.getLogger("deferred_test").makeRecord(
+            "deferred_test", logging.ERROR, __file__, 0, "Files: %s", (["a.csv"],), sys.exc_info())
+    handler.handle(record)
+
+    queued = records.get()
+    assert queued is not record
+    assert (queued.msg, queued.args, queued.exc_info) == ("Files: ['a.csv']", None, None)
+    assert (record.msg, record.args) == ("Files: %s", (["a.csv"],))
+    assert record.exc_info[0] is ValueError
+
+
+# The log file rotates once it reaches max_bytes
+def test_setup_logging_rotates(tmp_path):
+    from logger import setup_logging, stop_logging
+
+    log_path = tmp_path / "elt.log"
+    setup_logging(str(log_path), console=False, max_bytes=500, backups=2)
+    try:
+        for i in range(50):
+            logging.getLogger("elt").info("line %d", i)
+    finally:
+        stop_logging()
+    assert (tmp_path / "elt.log.1").exists()
+    assert log_path.stat().st_size <= 500
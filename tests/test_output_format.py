@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+from output_format import write_output, read_output, output_path_for, format_of
+
+
+@pytest.fixture
+def typed_df():
+    return pd.DataFrame({
+        "id": pd.array([1, None, 3], dtype="Int64"),            # Nullable int must not turn into float
+        "name": ["Alice", "Bob", None],
+        "joined": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]),
+    })
+
+
+# Columnar formats round-trip with dtypes preserved
+@pytest.mark.parametrize("output_format", ["parquet", "arrow"])
+def test_columnar_round_trip(tmp_path, typed_df, output_format):
+    path = output_path_for(str(tmp_path / "out.csv"), output_format)
+    write_output(typed_df, path, output_format)
+
+    result = read_output(path)
+    assert format_of(path) == output_format
+    assert str(result["id"].dtype) == "Int64"
+    assert str(result["joined"].dtype).startswith("datetime64")
+    assert result["id"].tolist()[::2] == [1, 3]
+
+
+# Previews only materialize the first rows
+@pytest.mark.parametrize("output_format", ["csv", "parquet", "arrow"])
+def test_read_output_limit(tmp_path, output_format):
+    path = output_path_for(str(tmp_path / "out.csv"), output_format)
+    write_output(pd.DataFrame({"id": range(500)}), path, output_format)
+    assert read_output(path, limit=100)["id"].tolist() == list(range(100))
+
+
+# Unknown formats are rejected
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        output_path_for("out.csv", "xml")
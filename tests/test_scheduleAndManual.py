@@ -1,12 +1,15 @@
 import pytest
 import pandas as pd
 from unittest.mock import patch
-from scheduleAndManual import hash_row, extract_and_load, inserted_hashes
+from scheduleAndManual import hash_rows, extract_and_load
+from dedup import filter_new_rows
 from scheduleAndManual import wait_for_manual_stop, background_watcher
 import threading
 import time
-from scheduleAndManual import stop_flag
+import logging
+from scheduleAndManual import stop_flag, main
 from extract import read_yaml_config
+from logger import log_context, ContextFilter
 
 # Test background watcher exits immediately when stop_flag is already set
 def test_background_watcher_runs(tmp_path):
@@ -22,6 +25,24 @@ def test_background_watcher_runs(tmp_path):
     assert not t.is_alive()  
 
 
+# The watcher thread started by main() logs with the job's id and table
+def test_main_watcher_keeps_log_context(monkeypatch):
+    seen = []
+
+    def watcher(config, stop_event):
+        record = logging.LogRecord("elt", logging.INFO, __file__, 0, "tick", None, None)
+        ContextFilter().filter(record)
+        seen.append((record.job_id, record.table))
+
+    monkeypatch.setattr("scheduleAndManual.read_yaml_config", lambda path: {})
+    monkeypatch.setattr("scheduleAndManual.upload_if_new_config", lambda path: "unchanged")
+    monkeypatch.setattr("scheduleAndManual.extract_and_load", lambda config: None)
+    monkeypatch.setattr("scheduleAndManual.background_watcher", watcher)
+    with log_context(job_id="job-1", table="orders"):
+        main("unused.yaml", threading.Event())
+    assert seen == [("job-1", "orders")]
+
+
 # Sample config used for extraction tests
 SAMPLE_CONFIG = {
     "target": {
@@ -35,6 +56,12 @@ SAMPLE_CONFIG = {
     }
 }
 
+# Config pointing the dedup store at a fresh per-test SQLite file
+@pytest.fixture
+def sample_config(tmp_path):
+    return {**SAMPLE_CONFIG, "dedup": {"store": "sqlite", "path": str(tmp_path / "dedup.db")}}
+
+
 # Fixture to provide dummy DataFrame
 @pytest.fixture
 def dummy_df():
@@ -43,25 +70,30 @@ def dummy_df():
         "name": ["Alice", "Bob"]
     })
 
-# Test hashing function for consistency and SHA-256 output
-def test_hash_row_is_consistent(dummy_df):
-    row = dummy_df.iloc[0]
-    assert isinstance(hash_row(row), str)        # Should return a string
-    assert len(hash_row(row)) == 64              # SHA-256 is 64 hex characters
-    assert hash_row(row) == hash_row(row)        # Hashing same row gives same result
+# Test vectorized hashing gives one consistent 64-bit fingerprint per row
+def test_hash_rows_is_consistent(dummy_df):
+    hashes = hash_rows(dummy_df)
+    assert hashes.dtype == "uint64"                          # 64-bit fingerprints
+    assert len(hashes) == len(dummy_df)                      # One hash per row
+    assert (hashes == hash_rows(dummy_df.copy())).all()      # Same rows give same result
+    assert hashes[0] != hashes[1]                            # Different rows differ
+
+
+# Test membership filter keeps only rows whose hash is unknown
+def test_filter_new_rows(dummy_df):
+    hashes = hash_rows(dummy_df)
+    assert filter_new_rows(hashes, set()).all()
+    assert filter_new_rows(hashes, {int(hashes[0])}).tolist() == [False, True]
 
 
 # Test that extract_and_load works and calls loader when data is new
+@patch("scheduleAndManual.load_dataframe_to_postgres")
 @patch("scheduleAndManual.run_extraction")
-@patch("scheduleAndManual.load_csv_to_postgres")
-@patch("scheduleAndManual.pd.read_csv")
-def test_extract_and_load_new_data(mock_read_csv, mock_loader, mock_extractor):
+def test_extract_and_load_new_data(mock_extractor, mock_loader, sample_config):
     df = pd.DataFrame({"id": [100], "name": ["Test"]})
-    mock_read_csv.return_value = df
-
-    inserted_hashes.clear()  # Ensure it's empty for clean insert
+    mock_extractor.return_value = df  # DataFrame handed over in-process, no CSV read
 
-    extract_and_load(SAMPLE_CONFIG)
+    extract_and_load(sample_config)  # Fresh dedup store, so the row is new
 
     # Loader should be called with expected table name
     mock_loader.assert_called_once()
@@ -70,19 +102,104 @@ def test_extract_and_load_new_data(mock_read_csv, mock_loader, mock_extractor):
 
 
 # Test that extract_and_load skips duplicates already hashed
+@patch("scheduleAndManual.load_dataframe_to_postgres")
 @patch("scheduleAndManual.run_extraction")
-@patch("scheduleAndManual.load_csv_to_postgres")
-@patch("scheduleAndManual.pd.read_csv")
-def test_extract_and_load_duplicates_skipped(mock_read_csv, mock_loader, mock_extractor):
+def test_extract_and_load_duplicates_skipped(mock_extractor, mock_loader, sample_config):
     df = pd.DataFrame({"id": [999], "name": ["Duplicate"]})
-    mock_read_csv.return_value = df
-
-    inserted_hashes.clear()
+    mock_extractor.return_value = df
 
     # First insert should be processed
-    extract_and_load(SAMPLE_CONFIG)
+    extract_and_load(sample_config)
 
     # Second time with same data should be skipped
-    extract_and_load(SAMPLE_CONFIG)
+    extract_and_load(sample_config)
 
     assert mock_loader.call_count == 1  # Loader should be called only once
+
+
+# A failed load leaves the incremental manifest uncommitted, so the next tick loads the rows
+@patch("scheduleAndManual.load_dataframe_to_postgres")
+def test_extract_and_load_retries_rows_after_failed_load(mock_loader, sample_config, tmp_path):
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "a.csv").write_text("id,name\n1,Alice\n")
+    config = {**sample_config, "write_csv": False, "sources": [
+        {"type": "local", "path": str(src), "incremental": True,
+         "manifest_path": str(tmp_path / "manifest.json")}]}
+
+    mock_loader.side_effect = RuntimeError("connection lost")
+    with pytest.raises(RuntimeError):
+        extract_and_load(config)
+    assert not (tmp_path / "manifest.json").exists()
+
+    mock_loader.side_effect = None
+    extract_and_load(config)
+    assert mock_loader.call_count == 2
+    assert mock_loader.call_args[0][0]["id"].tolist() == [1]
+    assert (tmp_path / "manifest.json").exists()
+
+
+# Pushed-down transforms run in the database only after new rows were loaded
+@patch("scheduleAndManual.run_sql_transforms")
+@patch("scheduleAndManual.load_dataframe_to_postgres")
+@patch("scheduleAndManual.run_extraction")
+def test_extract_and_load_pushes_down_transforms(mock_extractor, mock_loader, mock_transforms, sample_config):
+    mock_extractor.return_value = pd.DataFrame({"id": [7], "name": ["Pushdown"]})
+    sample_config["transforms"] = {"pushdown": True, "steps": [{"filter": "id > 0"}]}
+
+    extract_and_load(sample_config)
+    extract_and_load(sample_config)  # Nothing new: no refresh
+
+    mock_transforms.assert_called_once()
+    assert mock_transforms.call_args[0][2] == "sample_table"
+
+
+# Streaming mode dedups chunk by chunk and skips chunks already loaded
+@patch("scheduleAndManual.iter_extraction")
+@patch("scheduleAndManual.load_chunks_to_postgres")
+def test_stream_extract_and_load_dedups(mock_loader, mock_iter, sample_config):
+    loaded = []
+
+    def consume(chunks, db_config, table_name):
+        for chunk in chunks:
+            loaded.append(chunk)
+        return sum(len(c) for c in loaded)
+
+    mock_loader.side_effect = consume
+    config = {**sample_config, "streaming": True}
+    mock_iter.side_effect = lambda *a, **k: iter([
+        pd.DataFrame({"id": [1, 2], "name": ["A", "B"]}),
+        pd.DataFrame({"id": [2, 3], "name": ["B", "C"]}),
+    ])
+
+    extract_and_load(config)
+    assert [c["id"].tolist() for c in loaded] == [[1, 2], [3]]   # Row 2 deduped across chunks
+
+    loaded.clear()
+    extract_and_load(config)
+    assert loaded == []                                           # Second run finds nothing new
+
+
+# Event mode extracts only the files that changed
+@patch("scheduleAndManual.extract_and_load")
+def test_background_watcher_event_mode(mock_extract_and_load, tmp_path):
+    config = {
+        "sources": [{"type": "local", "path": str(tmp_path)}],
+        "watch": {"mode": "events", "debounce": 0.1, "interval": 60},
+    }
+    stop_flag.clear()
+    t = threading.Thread(target=background_watcher, args=(config,))
+    t.start()
+    try:
+        time.sleep(0.3)  # Let the watcher register its inotify watch
+        (tmp_path / "fresh.csv").write_text("id\n1\n")
+        deadline = time.time() + 5
+        while not mock_extract_and_load.called and time.time() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_flag.set()
+        t.join()
+
+    args, _ = mock_extract_and_load.call_args
+    assert args[1] == {"local"}
+    assert args[2] == {str(tmp_path): {"fresh.csv"}}
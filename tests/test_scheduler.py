@@ -0,0 +1,123 @@
+import threading
+import time
+from datetime import datetime, timedelta
+import pytest
+from jobs import JobRunner, SUCCEEDED
+from scheduler import CronExpression, ScheduleStore, Scheduler, missed_runs
+
+NOW = datetime(2026, 10, 19, 9, 0)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ScheduleStore(f"sqlite:///{tmp_path / 'schedules.db'}")
+
+
+def recorder(calls):
+    def make_job(schedule):
+        return (lambda stop_event: calls.append(schedule.name)), "orders"
+    return make_job
+
+
+def wait_finished(runner, job_ids):
+    for _ in range(200):
+        if all(runner.get(job_id)["state"] == SUCCEEDED for job_id in job_ids):
+            return
+        time.sleep(0.01)
+    raise AssertionError("jobs did not finish")
+
+
+# Cron fields, ranges, steps and names
+def test_cron_next_after():
+    cron = CronExpression("*/15 9-17 * * MON-FRI")
+    assert cron.next_after(datetime(2026, 10, 16, 17, 50)) == datetime(2026, 10, 19, 9, 0)  # Fri -> Mon
+    assert cron.next_after(datetime(2026, 10, 19, 9, 0)) == datetime(2026, 10, 19, 9, 15)
+    assert CronExpression("@daily").next_after(NOW) == datetime(2026, 10, 20, 0, 0)
+    assert CronExpression("0 0 29 2 *").next_after(NOW) == datetime(2028, 2, 29, 0, 0)
+    with pytest.raises(ValueError):
+        CronExpression("61 * * * *")
+
+
+# A due schedule is dispatched once and advanced to its next time
+def test_due_schedule_dispatched(store):
+    calls, runner = [], JobRunner()
+    store.add("hourly", config_path="a.yaml", cron="0 * * * *", now=NOW - timedelta(minutes=30))
+    scheduler = Scheduler(store, runner, make_job=recorder(calls))
+
+    assert scheduler.tick(NOW - timedelta(minutes=1)) == []
+    jobs = scheduler.tick(NOW)
+    wait_finished(runner, jobs)
+    assert calls == ["hourly"]
+    [schedule] = store.list()
+    assert schedule.next_run_at == NOW + timedelta(hours=1)
+    assert schedule.lease_owner == scheduler.owner
+
+    scheduler.tick(NOW + timedelta(seconds=1))  # job finished: lease released
+    assert store.list()[0].lease_owner is None
+
+
+# Runs missed while no scheduler was up follow the misfire policy
+@pytest.mark.parametrize("policy,expected", [("run_once", 1), ("run_all", 4), ("skip", 0)])
+def test_misfire_policies(store, policy, expected):
+    calls, runner = [], JobRunner()
+    store.add(policy, config_path="a.yaml", interval_seconds=3600, misfire_policy=policy, start_at=NOW, now=NOW)
+    later = NOW + timedelta(hours=3, minutes=30)
+    assert len(missed_runs(store.list()[0], later)) == 4
+
+    wait_finished(runner, Scheduler(store, runner, make_job=recorder(calls)).tick(later))
+    assert len(calls) == expected
+    assert store.list()[0].next_run_at == NOW + timedelta(hours=4)
+
+
+# Two schedulers polling the same store never run the same time twice
+def test_schedulers_do_not_double_run(store):
+    calls, runner = [], JobRunner()
+    store.add("shared", config_path="a.yaml", interval_seconds=60, now=NOW)
+    schedulers = [Scheduler(store, runner, make_job=recorder(calls)) for _ in range(4)]
+    barrier = threading.Barrier(len(schedulers))
+    dispatched = []
+
+    def tick(scheduler):
+        barrier.wait()
+        dispatched.extend(scheduler.tick(NOW))
+
+    threads = [threading.Thread(target=tick, args=(scheduler,)) for scheduler in schedulers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wait_finished(runner, dispatched)
+    assert calls == ["shared"]
+
+    # Until the winner releases its lease, the next due run is not claimed by the others
+    other = next(scheduler for scheduler in schedulers if not scheduler.running)
+    assert other.tick(NOW + timedelta(minutes=1)) == []
+
+
+# A schedule whose job outlasts its interval does not make the loop poll the store continuously
+def test_leased_schedule_does_not_busy_poll(store):
+    runner = JobRunner()
+    store.add("slow", config_path="a.yaml", interval_seconds=1)
+    scheduler = Scheduler(store, runner, poll_seconds=10,
+                          make_job=lambda schedule: ((lambda stop_event: stop_event.wait(5)), "orders"))
+    due_calls = []
+    due = store.due
+    store.due = lambda now: due_calls.append(now) or due(now)
+
+    stop = threading.Event()
+    thread = scheduler.start(stop)
+    time.sleep(1.5)  # next_run_at passes while the first job still holds the lease
+    stop.set()
+    thread.join()
+    runner.shutdown()
+    assert len(due_calls) == 1
+
+
+# Schedules outlive the scheduler: a new store on the same database sees them
+def test_schedules_persist(tmp_path):
+    url = f"sqlite:///{tmp_path / 'persist.db'}"
+    ScheduleStore(url).add("nightly", config_id=1, cron="0 2 * * *", end_at=NOW + timedelta(days=1), now=NOW)
+    [schedule] = ScheduleStore(url).list()
+    assert (schedule.name, schedule.next_run_at, schedule.enabled) == ("nightly", datetime(2026, 10, 20, 2, 0), True)
+    with pytest.raises(ValueError):
+        ScheduleStore(url).add("bad", config_id=1)
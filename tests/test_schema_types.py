@@ -0,0 +1,39 @@
+import io
+import pandas as pd
+from schema_types import reader_options, read_csv_typed, coerce_columns
+
+
+# Schema dtypes are applied while parsing; strict mode only parses schema columns
+def test_read_csv_typed_compact_columns():
+    options = reader_options({'columns': {'id': 'int64', 'role': 'category'}}, strict_mode=True)
+    df = read_csv_typed(io.BytesIO(b"ID,Role,notes\n1,admin,x\n2,user,y\n3,admin,\n"), options)
+    assert list(df.columns) == ['ID', 'Role']           # header matched case-insensitively
+    assert str(df['ID'].dtype) == 'Int64'
+    assert isinstance(df['Role'].dtype, pd.CategoricalDtype)
+
+
+# A bad value falls back to a safe parse instead of failing the whole file
+def test_read_csv_typed_falls_back():
+    options = reader_options({'columns': {'id': 'int64'}})
+    df = read_csv_typed(io.BytesIO(b"id,name\n1,a\noops,b\n"), options)
+    assert df['id'].tolist() == ['1', 'oops']
+
+
+# Coercion nulls unconvertible values and reports them per column
+def test_coerce_columns_report():
+    df = pd.DataFrame({
+        'id': ['1', '2', 'x', None],
+        'active': ['yes', 'N', 'maybe', None],
+        'joined': ['2024-01-01', 'bad', None, '2024-02-03'],
+        'score': [1.5, None, 2, 3],
+    })
+    df, report = coerce_columns(df, {'id': 'int64', 'active': 'bool', 'joined': {'type': 'date'},
+                                     'score': 'float32'})
+    assert df['id'].tolist()[:2] == [1, 2] and df['id'].isna().tolist() == [False, False, True, True]
+    assert df['active'].tolist()[:2] == [True, False]
+    assert str(df['score'].dtype) == 'float32'
+    assert report == {
+        'id': {'dtype': 'int64', 'errors': 1, 'examples': ['x']},
+        'active': {'dtype': 'boolean', 'errors': 1, 'examples': ['maybe']},
+        'joined': {'dtype': 'date', 'errors': 1, 'examples': ['bad']},
+    }
@@ -0,0 +1,166 @@
+import os
+import json
+import socket
+import threading
+import pytest
+import paramiko
+from sftp_source import extract_sftp_files, iter_sftp_frames, download, get_transport, close_transports
+
+
+# ---------- LOCAL PARAMIKO STUB SERVER ----------
+class StubServer(paramiko.ServerInterface):
+    def __init__(self, root):
+        self.root = root
+
+    def check_auth_password(self, username, password):
+        if (username, password) == ("foo", "pass"):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+
+class StubHandle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class StubSFTP(paramiko.SFTPServerInterface):
+    """Serves the server's root directory read-only."""
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.root = server.root
+
+    def local(self, path):
+        return os.path.join(self.root, path.lstrip("/"))
+
+    def list_folder(self, path):
+        entries = []
+        for name in os.listdir(self.local(path)):
+            attr = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(self.local(path), name)))
+            attr.filename = name
+            entries.append(attr)
+        return entries
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self.local(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def open(self, path, flags, attr):
+        try:
+            f = open(self.local(path), "rb")
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        handle = StubHandle(flags)
+        handle.readfile = f
+        return handle
+
+
+@pytest.fixture(scope="module")
+def host_key():
+    return paramiko.RSAKey.generate(1024)
+
+
+@pytest.fixture
+def sftp_server(tmp_path, host_key):
+    root = tmp_path / "remote"
+    (root / "upload").mkdir(parents=True)
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen()
+    connections = []
+
+    def serve():
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(host_key)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, StubSFTP)
+            transport.start_server(server=StubServer(str(root)))
+            connections.append(transport)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield {"host": "127.0.0.1", "port": listener.getsockname()[1], "root": root / "upload", "connections": connections}
+    close_transports()
+    listener.close()
+    for transport in connections:
+        transport.close()
+
+
+def write_csv(folder, name, ids):
+    (folder / name).write_text("id\n" + "".join(f"{i}\n" for i in ids))
+
+
+# Glob-filtered directory listing, read over parallel channels of one pooled transport
+def test_extract_directory_in_parallel(sftp_server, tmp_path):
+    write_csv(sftp_server["root"], "a.csv", [1, 2])
+    write_csv(sftp_server["root"], "b.csv", [3])
+    (sftp_server["root"] / "notes.md").write_text("ignored")
+
+    df, manifest = extract_sftp_files(sftp_server["host"], sftp_server["port"], "foo", "pass", "/upload",
+                                      pattern="*.csv", workers=2, local_dir=str(tmp_path / "local"))
+    assert df["id"].tolist() == [1, 2, 3]
+    assert sorted(manifest) == ["/upload/a.csv", "/upload/b.csv"]
+    assert (tmp_path / "local" / "a.csv").exists()
+
+    # Streaming again reuses the same transport and parses without a local copy
+    df, _ = extract_sftp_files(sftp_server["host"], sftp_server["port"], "foo", "pass", "/upload",
+                               pattern="*.csv", stream=True, local_dir=str(tmp_path / "unused"))
+    assert len(df) == 3
+    assert not (tmp_path / "unused").exists()
+    assert len(sftp_server["connections"]) == 1
+
+
+# Only new or changed files (by size + mtime) are read again
+def test_manifest_skips_unchanged(sftp_server, tmp_path):
+    write_csv(sftp_server["root"], "a.csv", [1])
+    args = (sftp_server["host"], sftp_server["port"], "foo", "pass", "/upload")
+    _, manifest = extract_sftp_files(*args, stream=True)
+
+    write_csv(sftp_server["root"], "b.csv", [2])
+    df, manifest = extract_sftp_files(*args, stream=True, manifest=manifest)
+    assert df["id"].tolist() == [2]
+    assert extract_sftp_files(*args, stream=True, manifest=manifest)[0].empty
+
+
+# A partial download of the same remote version resumes where it stopped
+def test_download_resumes(sftp_server, tmp_path):
+    write_csv(sftp_server["root"], "big.csv", range(1000))
+    transport = get_transport(sftp_server["host"], sftp_server["port"], "foo", "pass")
+    sftp = paramiko.SFTPClient.from_transport(transport)
+    attrs = sftp.stat("/upload/big.csv")
+
+    content = (sftp_server["root"] / "big.csv").read_bytes()
+    local = tmp_path / "local"
+    local.mkdir()
+    # Marker bytes stand in for the first 100 bytes: a resumed download never re-fetches them
+    (local / "big.csv.part").write_bytes(b"X" * 100)
+    (local / "big.csv.part.json").write_text(json.dumps({"size": attrs.st_size, "mtime": attrs.st_mtime}))
+
+    path = download(sftp, "/upload/big.csv", attrs, str(local))
+    sftp.close()
+    data = open(path, "rb").read()
+    assert data[:100] == b"X" * 100 and data[100:] == content[100:]
+    assert not (local / "big.csv.part.json").exists()
+
+
+# Chunked streaming splits remote files into frames of at most chunk_size rows
+def test_iter_sftp_frames(sftp_server):
+    write_csv(sftp_server["root"], "a.csv", range(5))
+    frames = list(iter_sftp_frames(sftp_server["host"], sftp_server["port"], "foo", "pass",
+                                   "/upload/a.csv", chunk_size=2))
+    assert [len(frame) for frame in frames] == [2, 2, 1]
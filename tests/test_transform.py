@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from loader import build_engine_url, load_dataframe_to_postgres
+from transform import apply_transforms, compile_sql, run_sql_transforms
+
+DB_CONFIG = {
+    "type": "postgres", "host": "localhost", "port": 5432,
+    "database": "elt_db", "user": "elt_user", "password": "elt_password",
+}
+
+STEPS = [
+    {'rename': {'dept_name': 'dept'}},
+    {'cast': {'amount': 'float64'}},
+    {'derive': {'net': 'amount * 0.8', 'label': "concat(upper(dept), '-', id)"}},
+    {'filter': "net > 10 and dept in ['eng', 'ops']"},
+    {'aggregate': {'group_by': ['dept'], 'metrics': {'rows': 'count()', 'total': 'sum(net)'}}},
+]
+
+SALES = pd.DataFrame({
+    'id': [1, 2, 3, 4, 5],
+    'dept_name': ['eng', 'eng', 'ops', 'hr', 'ops'],
+    'amount': ['100', '50', '10', '500', '20'],
+})
+
+
+# Row-level steps run as vectorized pandas operations
+def test_apply_transforms_row_steps():
+    df = apply_transforms(SALES, STEPS[:4])
+    assert df['id'].tolist() == [1, 2, 5]
+    assert df['label'].tolist() == ['ENG-1', 'ENG-2', 'OPS-5']
+    assert df['net'].tolist() == [80.0, 40.0, 16.0]
+
+
+# Aggregation groups the filtered rows
+def test_apply_transforms_aggregate():
+    df = apply_transforms(SALES, STEPS)
+    assert df.to_dict('records') == [{'dept': 'eng', 'rows': 2, 'total': 120.0},
+                                     {'dept': 'ops', 'rows': 1, 'total': 16.0}]
+
+
+# Steps compile to a single SELECT with one CTE per step
+def test_compile_sql():
+    sql, columns = compile_sql(STEPS, 'sales', ['id', 'dept_name', 'amount'])
+    assert sql.startswith('WITH s0 AS (SELECT "id" AS "id", "dept_name" AS "dept"')
+    assert 'CAST("amount" AS DOUBLE PRECISION)' in sql
+    assert '"dept" IN (\'eng\', \'ops\')' in sql
+    assert columns == ['dept', 'rows', 'total']
+
+
+# Unknown steps and unsupported expressions are rejected
+def test_invalid_transforms():
+    with pytest.raises(ValueError):
+        apply_transforms(SALES, [{'pivot': {}}])
+    with pytest.raises(ValueError):
+        apply_transforms(SALES, [{'derive': {'x': '__import__("os")'}}])
+
+
+# Pushdown gives the same result inside PostgreSQL, as a table or a materialized view
+@pytest.mark.parametrize("materialized_view", [False, True])
+def test_run_sql_transforms(materialized_view):
+    target = 'sales_by_dept_mv' if materialized_view else 'sales_by_dept'
+    engine = create_engine(build_engine_url(DB_CONFIG))
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP {'MATERIALIZED VIEW' if materialized_view else 'TABLE'} IF EXISTS {target}"))
+        conn.execute(text("DROP TABLE IF EXISTS sales CASCADE"))
+    load_dataframe_to_postgres(SALES, DB_CONFIG, 'sales')
+
+    transforms = {'steps': STEPS, 'target_table': target, 'materialized_view': materialized_view}
+    for _ in range(2):  # Re-running replaces (or refreshes) the result instead of appending
+        run_sql_transforms(DB_CONFIG, transforms, 'sales')
+    result = pd.read_sql(f'SELECT * FROM {target} ORDER BY dept', engine)
+    assert result.to_dict('records') == apply_transforms(SALES, STEPS).to_dict('records')
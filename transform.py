@@ -0,0 +1,304 @@
+import ast
+import operator
+import logging
+import pandas as pd
+from sqlalchemy import inspect
+from schema_types import parse_spec, coerce_series
+from loader import engine_for
+
+STEP_KINDS = ("rename", "cast", "derive", "filter", "aggregate")
+AGGREGATES = {"count": "count", "sum": "sum", "avg": "mean", "mean": "mean", "min": "min", "max": "max",
+              "count_distinct": "nunique"}
+SQL_TYPES = {"int8": "SMALLINT", "int16": "SMALLINT", "int32": "INTEGER", "int64": "BIGINT",
+             "float32": "REAL", "float64": "DOUBLE PRECISION", "object": "TEXT", "string": "TEXT",
+             "category": "TEXT", "boolean": "BOOLEAN", "date": "DATE", "datetime64[ns]": "TIMESTAMP"}
+
+# ---------- EXPRESSIONS ----------
+# Expressions use a small Python-like syntax (columns, literals, arithmetic, comparisons,
+# and/or/not, `in [...]` and a few functions) that compiles to both pandas and SQL
+BIN_OPS = {ast.Add: ("+", operator.add), ast.Sub: ("-", operator.sub), ast.Mult: ("*", operator.mul),
+           ast.Div: ("/", operator.truediv), ast.Mod: ("%", operator.mod)}
+CMP_OPS = {ast.Eq: ("=", operator.eq), ast.NotEq: ("<>", operator.ne), ast.Lt: ("<", operator.lt),
+           ast.LtE: ("<=", operator.le), ast.Gt: (">", operator.gt), ast.GtE: (">=", operator.ge)}
+
+
+def parse_expression(expression):
+    return ast.parse(str(expression), mode="eval").body
+
+
+def quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def sql_literal(value):
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def literal_list(node):
+    if not isinstance(node, (ast.List, ast.Tuple)):
+        raise ValueError("'in' needs a literal list")
+    return [ast.literal_eval(element) for element in node.elts]
+
+
+def pandas_concat(*values):
+    parts = [v.astype("string").fillna("") if isinstance(v, pd.Series) else str(v) for v in values]
+    result = parts[0]
+    for part in parts[1:]:
+        result = result + part
+    return result
+
+
+def pandas_coalesce(*values):
+    result = values[0]
+    for value in values[1:]:
+        result = result.fillna(value) if isinstance(result, pd.Series) else result
+    return result
+
+
+PANDAS_FUNCTIONS = {
+    "lower": lambda s: s.str.lower(),
+    "upper": lambda s: s.str.upper(),
+    "length": lambda s: s.str.len(),
+    "abs": lambda s: s.abs(),
+    "round": lambda s, digits=0: s.round(digits),
+    "isnull": lambda s: s.isna(),
+    "notnull": lambda s: s.notna(),
+    "coalesce": pandas_coalesce,
+    "concat": pandas_concat,
+}
+SQL_FUNCTIONS = {
+    "lower": lambda s: f"lower({s})",
+    "upper": lambda s: f"upper({s})",
+    "length": lambda s: f"length({s})",
+    "abs": lambda s: f"abs({s})",
+    "round": lambda s, digits="0": f"round(CAST({s} AS NUMERIC), {digits})",
+    "isnull": lambda s: f"({s} IS NULL)",
+    "notnull": lambda s: f"({s} IS NOT NULL)",
+    "coalesce": lambda *args: f"coalesce({', '.join(args)})",
+    "concat": lambda *args: f"concat({', '.join(args)})",
+}
+
+
+def eval_pandas(node, df):
+    """Evaluate a parsed expression over df with vectorized Series operations."""
+    if isinstance(node, ast.Name):
+        return df[node.id]
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in BIN_OPS:
+        return BIN_OPS[type(node.op)][1](eval_pandas(node.left, df), eval_pandas(node.right, df))
+    if isinstance(node, ast.BoolOp):
+        values = [eval_pandas(value, df) for value in node.values]
+        combine = operator.and_ if isinstance(node.op, ast.And) else operator.or_
+        result = values[0]
+        for value in values[1:]:
+            result = combine(result, value)
+        return result
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return ~eval_pandas(node.operand, df)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -eval_pandas(node.operand, df)
+    if isinstance(node, ast.Compare):
+        result, left = None, eval_pandas(node.left, df)
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                part = left.isin(literal_list(comparator))
+                part = ~part if isinstance(op, ast.NotIn) else part
+                right = None
+            else:
+                right = eval_pandas(comparator, df)
+                part = CMP_OPS[type(op)][1](left, right)
+            result = part if result is None else result & part
+            left = right
+        return result
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in PANDAS_FUNCTIONS:
+        return PANDAS_FUNCTIONS[node.func.id](*[eval_pandas(arg, df) for arg in node.args])
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def to_sql(node):
+    """Compile a parsed expression to a PostgreSQL expression."""
+    if isinstance(node, ast.Name):
+        return quote(node.id)
+    if isinstance(node, ast.Constant):
+        return sql_literal(node.value)
+    if isinstance(node, ast.BinOp) and type(node.op) in BIN_OPS:
+        left, right = to_sql(node.left), to_sql(node.right)
+        if isinstance(node.op, ast.Div):
+            # pandas division is true division, PostgreSQL integer division truncates
+            left = f"CAST({left} AS DOUBLE PRECISION)"
+        return f"({left} {BIN_OPS[type(node.op)][0]} {right})"
+    if isinstance(node, ast.BoolOp):
+        joiner = " AND " if isinstance(node.op, ast.And) else " OR "
+        return "(" + joiner.join(to_sql(value) for value in node.values) + ")"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return f"(NOT {to_sql(node.operand)})"
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return f"(-{to_sql(node.operand)})"
+    if isinstance(node, ast.Compare):
+        parts, left = [], to_sql(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                values = ", ".join(sql_literal(value) for value in literal_list(comparator))
+                parts.append(f"{left} {'NOT IN' if isinstance(op, ast.NotIn) else 'IN'} ({values})")
+                right = None
+            else:
+                right = to_sql(comparator)
+                parts.append(f"{left} {CMP_OPS[type(op)][0]} {right}")
+            left = right
+        return "(" + " AND ".join(parts) + ")"
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in SQL_FUNCTIONS:
+        return SQL_FUNCTIONS[node.func.id](*[to_sql(arg) for arg in node.args])
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def parse_metric(expression):
+    """Parse an aggregate such as ``sum(amount)`` or ``count()`` into (function, column or None)."""
+    node = parse_expression(expression)
+    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in AGGREGATES):
+        raise ValueError(f"Unsupported aggregate: {expression}")
+    if not node.args:
+        if node.func.id != "count":
+            raise ValueError(f"{node.func.id}() needs a column")
+        return "count", None
+    if not isinstance(node.args[0], ast.Name):
+        raise ValueError(f"Aggregates take a column name: {expression}")
+    return node.func.id, node.args[0].id
+
+
+# ---------- STEPS ----------
+def step_of(step):
+    if not isinstance(step, dict) or len(step) != 1:
+        raise ValueError(f"A transform step is a single-key mapping, got: {step}")
+    (kind, arg), = step.items()
+    if kind not in STEP_KINDS:
+        raise ValueError(f"Unknown transform step: {kind}")
+    return kind, arg
+
+
+def has_aggregate(steps):
+    return any(step_of(step)[0] == "aggregate" for step in steps or [])
+
+
+def apply_transforms(df, steps):
+    """Run the transform steps over df as vectorized pandas operations."""
+    for step in steps or []:
+        kind, arg = step_of(step)
+        if kind == "rename":
+            df = df.rename(columns=arg)
+        elif kind == "cast":
+            df = df.copy()
+            for col, spec in arg.items():
+                df[col] = coerce_series(df[col], spec)[0]
+        elif kind == "derive":
+            df = df.copy()
+            for col, expression in arg.items():
+                df[col] = eval_pandas(parse_expression(expression), df)
+        elif kind == "filter":
+            for expression in arg if isinstance(arg, list) else [arg]:
+                mask = eval_pandas(parse_expression(expression), df)
+                df = df[mask.fillna(False).astype(bool)]
+        else:
+            df = aggregate_frame(df, arg)
+    return df.reset_index(drop=True)
+
+
+def aggregate_frame(df, arg):
+    group_by = arg.get("group_by") or []
+    named = {}
+    for name, expression in arg["metrics"].items():
+        function, column = parse_metric(expression)
+        if column is None:
+            named[name] = (group_by[0] if group_by else df.columns[0], "size")
+        else:
+            named[name] = (column, AGGREGATES[function])
+    if not group_by:
+        return df.assign(_all=0).groupby("_all").agg(**named).reset_index(drop=True)
+    return df.groupby(group_by, as_index=False, dropna=False, observed=True).agg(**named)
+
+
+def compile_sql(steps, source_table, columns):
+    """Compile the steps to one SELECT over source_table (with the given columns); returns (sql, columns)."""
+    ctes = []
+    current, columns = quote(source_table), list(columns)
+
+    def add(select):
+        nonlocal current
+        ctes.append(f"s{len(ctes)} AS ({select})")
+        current = f"s{len(ctes) - 1}"
+
+    for step in steps:
+        kind, arg = step_of(step)
+        if kind == "rename":
+            add("SELECT " + ", ".join(f"{quote(col)} AS {quote(arg.get(col, col))}" for col in columns)
+                + f" FROM {current}")
+            columns = [arg.get(col, col) for col in columns]
+        elif kind == "cast":
+            select = [f"CAST({quote(col)} AS {SQL_TYPES[parse_spec(arg[col])[1]]}) AS {quote(col)}"
+                      if col in arg else quote(col) for col in columns]
+            add("SELECT " + ", ".join(select) + f" FROM {current}")
+        elif kind == "derive":
+            # One level per derived column, so later ones can use earlier ones as in pandas
+            for col, expression in arg.items():
+                select = [quote(c) for c in columns if c != col] + [f"{to_sql(parse_expression(expression))} AS {quote(col)}"]
+                columns = [c for c in columns if c != col] + [col]
+                add("SELECT " + ", ".join(select) + f" FROM {current}")
+        elif kind == "filter":
+            conditions = [to_sql(parse_expression(e)) for e in (arg if isinstance(arg, list) else [arg])]
+            add(f"SELECT * FROM {current} WHERE " + " AND ".join(conditions))
+        else:
+            group_by = arg.get("group_by") or []
+            select = [quote(col) for col in group_by]
+            for name, expression in arg["metrics"].items():
+                function, column = parse_metric(expression)
+                if column is None:
+                    select.append(f"count(*) AS {quote(name)}")
+                elif function == "count_distinct":
+                    select.append(f"count(DISTINCT {quote(column)}) AS {quote(name)}")
+                else:
+                    sql_function = "avg" if function == "mean" else function
+                    select.append(f"{sql_function}({quote(column)}) AS {quote(name)}")
+            sql = "SELECT " + ", ".join(select) + f" FROM {current}"
+            if group_by:
+                sql += " GROUP BY " + ", ".join(quote(col) for col in group_by)
+            add(sql)
+            columns = group_by + list(arg["metrics"])
+
+    if not ctes:
+        return f"SELECT * FROM {current}", columns
+    return f"WITH {', '.join(ctes)} SELECT * FROM {current}", columns
+
+
+# ---------- PUSHDOWN ----------
+def run_sql_transforms(db_config, transforms, source_table):
+    """Run the transforms inside PostgreSQL over the loaded table, in one transaction.
+
+    The result replaces the contents of ``target_table`` (INSERT ... SELECT) or,
+    with ``materialized_view: true``, is a materialized view refreshed on later runs.
+    """
+    target = transforms.get("target_table") or f"{source_table}_transformed"
+    engine = engine_for(db_config)
+    with engine.begin() as conn:
+        columns = [column["name"] for column in inspect(conn).get_columns(source_table)]
+        query, _ = compile_sql(transforms.get("steps") or [], source_table, columns)
+        # Compiled SQL holds no bind parameters; escape % for the driver's paramstyle
+        query = query.replace("%", "%%")
+        if transforms.get("materialized_view"):
+            exists = conn.exec_driver_sql(
+                "SELECT 1 FROM pg_matviews WHERE matviewname = %(name)s", {"name": target}).first()
+            if exists:
+                conn.exec_driver_sql(f"REFRESH MATERIALIZED VIEW {quote(target)}")
+            else:
+                conn.exec_driver_sql(f"CREATE MATERIALIZED VIEW {quote(target)} AS {query}")
+        else:
+            conn.exec_driver_sql(f"CREATE TABLE IF NOT EXISTS {quote(target)} AS {query} WITH NO DATA")
+            conn.exec_driver_sql(f"TRUNCATE {quote(target)}")
+            conn.exec_driver_sql(f"INSERT INTO {quote(target)} {query}")
+    logging.info("Transforms pushed down: '%s' -> '%s'", source_table, target)
+    return target